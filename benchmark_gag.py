@@ -0,0 +1,55 @@
+"""
+Gag Scrambler Benchmark
+Compares the str.translate scrambler with a per-character loop over long messages,
+and measures the per-message gagged-user lookup.
+Run: python benchmark_gag.py [iterations]
+"""
+
+import random
+import sys
+import timeit
+
+from gag import GAG_TABLE, GagRegistry, scramble
+
+MESSAGE_LENGTHS = (50, 500, 2000, 4000)
+
+
+def scramble_loop(text, table=GAG_TABLE):
+    """Per-character reference implementation equivalent to gag.scramble."""
+    if not any(ord(char) in table for char in text):
+        return text
+    return ''.join(table.get(ord(char), char) for char in text)
+
+
+def make_message(length, rng):
+    words = ["hello", "there", "raid", "warning", "pretty", "great", "run", "quick", "brown", "fox"]
+    text = ""
+    while len(text) < length:
+        text += rng.choice(words) + " "
+    return text[:length]
+
+
+def benchmark(iterations=2000):
+    """Print µs per message for both scramblers and the gag lookup."""
+    print("🤐 GAG SCRAMBLER BENCHMARK")
+    print("=" * 50)
+    rng = random.Random(7)
+
+    for length in MESSAGE_LENGTHS:
+        text = make_message(length, rng)
+        assert scramble(text) == scramble_loop(text)
+        translate = timeit.timeit(lambda: scramble(text), number=iterations) / iterations
+        loop = timeit.timeit(lambda: scramble_loop(text), number=iterations) / iterations
+        print(f"{length:5} chars: translate {translate * 1e6:8.2f} µs   loop {loop * 1e6:9.2f} µs   "
+              f"({loop / translate:5.1f}x)")
+
+    registry = GagRegistry()
+    registry.load({guild_id: range(guild_id * 1000, guild_id * 1000 + 20) for guild_id in range(1, 1001)})
+    lookups = [(rng.randrange(1, 1200), rng.randrange(0, 1_300_000)) for _ in range(10000)]
+    elapsed = timeit.timeit(lambda: [registry.is_gagged(g, u) for g, u in lookups], number=20)
+    print(f"\nGag lookup: {elapsed / (20 * len(lookups)) * 1e9:.0f} ns per message ({len(registry):,} gagged users)")
+    print(f"\nSample: {scramble('Are you ready for the raid?')!r}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
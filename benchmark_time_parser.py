@@ -0,0 +1,75 @@
+"""
+Time Parser Benchmark
+Measures parse cost of reminder time expressions over a corpus of real /remind inputs,
+cold (cache cleared before every pass) and warm (served from the LRU cache).
+Run: python benchmark_time_parser.py [iterations]
+"""
+
+import sys
+import timeit
+
+import time_parser
+
+# Inputs in the shapes users actually type (see reminder_and_userapp_demo.py)
+CORPUS = [
+    "30m Take a break",
+    "2h 30m Meeting with client",
+    "1d Review project proposal",
+    "1w Submit monthly report",
+    "1h Server maintenance in 1 hour",
+    "30s check the oven",
+    "45sec stretch",
+    "60seconds timer",
+    "5m tea",
+    "15min standup",
+    "30minutes call mom 123456789012345678",
+    "2h pay invoice",
+    "3hr laundry",
+    "4hours deploy window 1234567890123456789",
+    "1d renew domain",
+    "7day trial ends",
+    "14days return package",
+    "2week sprint review",
+    "3weeks dentist",
+    "1h 30m movie night",
+    "2d 4h ship release",
+    "1w 3d vacation ends 987654321098765432",
+    "1h30m no spaces",
+    "2d4h",
+    "not a duration at all",
+]
+
+
+def run_pass(expressions):
+    for text in expressions:
+        time_parser.parse_reminder(text)
+
+
+def cold_pass():
+    time_parser.cache_clear()
+    run_pass(CORPUS)
+
+
+def benchmark(iterations=2000):
+    """Print per-expression parse cost for cold and warm caches."""
+    print("⏱️ TIME PARSER BENCHMARK")
+    print("=" * 50)
+    print(f"Corpus: {len(CORPUS)} expressions, {iterations} passes")
+
+    cold = timeit.timeit(cold_pass, number=iterations)
+    time_parser.cache_clear()
+    run_pass(CORPUS)
+    warm = timeit.timeit(lambda: run_pass(CORPUS), number=iterations)
+
+    per_parse = iterations * len(CORPUS)
+    print(f"Cold (uncached): {cold / per_parse * 1e6:8.2f} µs/parse")
+    print(f"Warm (cached):   {warm / per_parse * 1e6:8.2f} µs/parse")
+    print(f"Cache stats: {time_parser.stats()}")
+
+    print("\n📋 Sample results:")
+    for text in CORPUS[:: max(1, len(CORPUS) // 8)]:
+        print(f"  {text!r:45} -> {time_parser.parse_reminder(text)}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,198 @@
+"""
+Cross-guild aggregate index for interactive buttons.
+Maintained incrementally from each click flush so !globalbuttonstats reads
+precomputed totals and leaderboards instead of parsing every button file.
+"""
+
+import glob
+import json
+import logging
+import os
+import struct
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'data/button_index.json'
+# Entries kept in each leaderboard
+TOP_SIZE = 10
+# Daily totals kept in the index
+DAILY_RETENTION = 90
+
+# Compact click log record: user_id, epoch seconds, guild_id (0 when unknown)
+CLICK_RECORD = struct.Struct('<QIQ')
+
+
+class TopN:
+    """
+    Exact top-N leaderboard over counters that only ever increase.
+    A key outside the board can only enter by overtaking the current minimum,
+    so each update costs O(N) for a small fixed N.
+    """
+
+    __slots__ = ('size', 'board')
+
+    def __init__(self, size=TOP_SIZE, board=None):
+        self.size = size
+        self.board = dict(board or {})
+
+    def update(self, key, count):
+        board = self.board
+        if key in board or len(board) < self.size:
+            board[key] = count
+            return
+        weakest = min(board, key=board.get)
+        if count > board[weakest]:
+            del board[weakest]
+            board[key] = count
+
+    def ranked(self):
+        return sorted(self.board.items(), key=lambda item: item[1], reverse=True)
+
+
+class GlobalButtonIndex:
+    """Running totals per guild, button, day and user, plus top-N boards."""
+
+    def __init__(self, path=INDEX_FILE, top_size=TOP_SIZE):
+        self.path = path
+        self.top_size = top_size
+        self.dirty = False
+        self.total_clicks = 0
+        self.guild_totals = {}
+        self.button_totals = {}
+        self.daily_totals = {}
+        self.user_totals = {}
+        self.top_users = TopN(top_size)
+        self.top_buttons = TopN(top_size)
+        self.top_guilds = TopN(top_size)
+
+    def add_button(self, button_id):
+        """Count a newly created button even before its first click."""
+        if button_id not in self.button_totals:
+            self.button_totals[button_id] = 0
+            self.dirty = True
+
+    def apply(self, button_id, records):
+        """Fold a batch of (user_id, epoch seconds, guild_id) click records into the index."""
+        if not records:
+            return
+        users, guilds, days = {}, {}, {}
+        for user_id, timestamp, guild_id in records:
+            users[user_id] = users.get(user_id, 0) + 1
+            if guild_id:
+                guilds[guild_id] = guilds.get(guild_id, 0) + 1
+            day = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+            days[day] = days.get(day, 0) + 1
+
+        self.total_clicks += len(records)
+        count = self.button_totals[button_id] = self.button_totals.get(button_id, 0) + len(records)
+        self.top_buttons.update(button_id, count)
+        for user_id, clicks in users.items():
+            key = str(user_id)
+            count = self.user_totals[key] = self.user_totals.get(key, 0) + clicks
+            self.top_users.update(key, count)
+        for guild_id, clicks in guilds.items():
+            key = str(guild_id)
+            count = self.guild_totals[key] = self.guild_totals.get(key, 0) + clicks
+            self.top_guilds.update(key, count)
+        for day, clicks in days.items():
+            self.daily_totals[day] = self.daily_totals.get(day, 0) + clicks
+        for day in sorted(self.daily_totals)[:-DAILY_RETENTION]:
+            del self.daily_totals[day]
+        self.dirty = True
+
+    def snapshot(self, days=7):
+        """Global statistics for !globalbuttonstats; cost is independent of the number of buttons."""
+        recent_days = sorted(self.daily_totals)[-days:]
+        return {
+            "total_clicks": self.total_clicks,
+            "total_buttons": len(self.button_totals),
+            "active_guilds": len(self.guild_totals),
+            "unique_users": len(self.user_totals),
+            "daily_totals": {day: self.daily_totals[day] for day in recent_days},
+            "top_users": self.top_users.ranked(),
+            "top_buttons": self.top_buttons.ranked(),
+            "top_guilds": self.top_guilds.ranked()
+        }
+
+    def to_json(self):
+        return json.dumps({
+            "total_clicks": self.total_clicks,
+            "guild_totals": self.guild_totals,
+            "button_totals": self.button_totals,
+            "daily_totals": self.daily_totals,
+            "user_totals": self.user_totals,
+            "top_users": self.top_users.board,
+            "top_buttons": self.top_buttons.board,
+            "top_guilds": self.top_guilds.board
+        }).encode('utf-8')
+
+    @classmethod
+    def load(cls, path=INDEX_FILE, top_size=TOP_SIZE):
+        """Load a saved index, or None if there is none yet or it is unreadable (the caller rebuilds it)."""
+        try:
+            with open(path, 'r') as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable global button index {path}: {e}")
+            return None
+        index = cls(path, top_size)
+        index.total_clicks = raw.get("total_clicks", 0)
+        index.guild_totals = raw.get("guild_totals", {})
+        index.button_totals = raw.get("button_totals", {})
+        index.daily_totals = raw.get("daily_totals", {})
+        index.user_totals = raw.get("user_totals", {})
+        index.top_users = TopN(top_size, raw.get("top_users"))
+        index.top_buttons = TopN(top_size, raw.get("top_buttons"))
+        index.top_guilds = TopN(top_size, raw.get("top_guilds"))
+        return index
+
+    @classmethod
+    def rebuild(cls, data_dir, path=INDEX_FILE, top_size=TOP_SIZE):
+        """One-off full scan of every button file and click log, used when no index exists yet."""
+        index = cls(path, top_size)
+        for json_path in glob.glob(os.path.join(data_dir, '*.json')):
+            try:
+                with open(json_path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable button file {json_path}: {e}")
+                continue
+
+            button_id = data.get("button_id") or os.path.splitext(os.path.basename(json_path))[0]
+            index.add_button(button_id)
+            total = data.get("total_clicks", 0)
+            index.total_clicks += total
+            index.button_totals[button_id] = total
+            for user_id, clicks in data.get("user_clicks", {}).items():
+                index.user_totals[user_id] = index.user_totals.get(user_id, 0) + clicks
+            for day, clicks in data.get("daily_stats", {}).items():
+                index.daily_totals[day] = index.daily_totals.get(day, 0) + clicks
+
+            # Guild totals only exist in click history (legacy list or compact log)
+            for entry in data.get("click_history", []):
+                guild_id = str(entry.get("guild_id") or "")
+                if guild_id.isdigit():
+                    index.guild_totals[guild_id] = index.guild_totals.get(guild_id, 0) + 1
+            log_path = os.path.join(data_dir, f"{button_id}.clicks")
+            if os.path.exists(log_path):
+                with open(log_path, 'rb') as f:
+                    payload = f.read()
+                payload = payload[:len(payload) - len(payload) % CLICK_RECORD.size]
+                for _, _, guild_id in CLICK_RECORD.iter_unpack(payload):
+                    if guild_id:
+                        key = str(guild_id)
+                        index.guild_totals[key] = index.guild_totals.get(key, 0) + 1
+
+        for key, count in index.user_totals.items():
+            index.top_users.update(key, count)
+        for key, count in index.button_totals.items():
+            index.top_buttons.update(key, count)
+        for key, count in index.guild_totals.items():
+            index.top_guilds.update(key, count)
+        for day in sorted(index.daily_totals)[:-DAILY_RETENTION]:
+            del index.daily_totals[day]
+        index.dirty = True
+        return index
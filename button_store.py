@@ -0,0 +1,395 @@
+"""
+Write-behind click counter store for interactive buttons.
+Clicks update in-memory button state only; dirty buttons are flushed to
+data/buttons/<button_id>.json on an interval or once enough are dirty, using
+atomic file replacement so a crash never leaves a half-written file.
+
+Click history is not kept in the JSON file. Each click is a fixed-size binary
+record (user ID, epoch seconds, guild ID) appended to data/buttons/<button_id>.clicks,
+only a bounded window of recent clicks is held in memory, and hourly/daily
+rollups are maintained incrementally so statistics never scan history.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+from button_index import CLICK_RECORD, GlobalButtonIndex, INDEX_FILE
+
+logger = logging.getLogger(__name__)
+
+BUTTON_DATA_DIR = 'data/buttons'
+# Seconds between background flushes
+FLUSH_INTERVAL = 10.0
+# Flush early once this many buttons have unsaved clicks
+DIRTY_THRESHOLD = 50
+# Recent clicks kept in memory per button
+RECENT_WINDOW = 200
+# Hourly rollup buckets kept per button
+HOURLY_RETENTION = 7 * 24
+
+
+def _write_atomic(path, payload):
+    """Write bytes to a temp file, fsync it, then atomically replace the target."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _append(path, payload):
+    with open(path, 'ab') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _day_key(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+
+def _hour_key(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%dT%H")
+
+
+def _add_rollups(data, timestamp, count=1):
+    """Increment the daily and hourly rollups, pruning hourly buckets past retention."""
+    daily_stats = data.setdefault("daily_stats", {})
+    day = _day_key(timestamp)
+    daily_stats[day] = daily_stats.get(day, 0) + count
+
+    hourly_stats = data.setdefault("hourly_stats", {})
+    hour = _hour_key(timestamp)
+    if hour not in hourly_stats:
+        hourly_stats[hour] = 0
+        while len(hourly_stats) > HOURLY_RETENTION:
+            del hourly_stats[min(hourly_stats)]
+    hourly_stats[hour] += count
+
+
+class ButtonState:
+    """Persistent counters plus the recent-click window and unsaved log records for one button."""
+
+    __slots__ = ('data', 'recent', 'pending', 'migrated', 'rewrite')
+
+    def __init__(self, data, recent_window=RECENT_WINDOW):
+        self.data = data
+        self.recent = deque(maxlen=recent_window)
+        self.pending = bytearray()
+        # Leading bytes of `pending` migrated from legacy history (already counted in the global index)
+        self.migrated = 0
+        # The JSON on disk still holds legacy click_history and must be rewritten
+        self.rewrite = False
+
+    def add_click(self, user_id, timestamp, guild_id):
+        record = (user_id, timestamp, guild_id)
+        self.recent.append(record)
+        self.pending += CLICK_RECORD.pack(*record)
+
+
+def _log_contains(log_path, payload):
+    """Whether the click log holds `payload` at a record boundary."""
+    try:
+        with open(log_path, 'rb') as f:
+            log = f.read()
+    except FileNotFoundError:
+        return False
+    start = log.find(payload)
+    while start != -1:
+        if start % CLICK_RECORD.size == 0:
+            return True
+        start = log.find(payload, start + 1)
+    return False
+
+
+def _load_button(data_dir, button_id, recent_window):
+    """
+    Load a button's counters and recent clicks. Migrates a legacy click_history list into
+    the log; if a previous flush already appended the migrated records but crashed before
+    rewriting the JSON, they are not appended again.
+    """
+    data = _read_json(os.path.join(data_dir, f"{button_id}.json"))
+    if data is None:
+        return None
+    state = ButtonState(data, recent_window)
+
+    log_path = os.path.join(data_dir, f"{button_id}.clicks")
+    try:
+        with open(log_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell() - f.tell() % CLICK_RECORD.size
+            tail = min(size, recent_window * CLICK_RECORD.size)
+            f.seek(size - tail)
+            for record in CLICK_RECORD.iter_unpack(f.read(tail)):
+                state.recent.append(record)
+    except FileNotFoundError:
+        pass
+
+    history = data.pop("click_history", None)
+    if history:
+        state.rewrite = True
+        rebuild_hourly = "hourly_stats" not in data
+        records = []
+        for entry in history:
+            try:
+                timestamp = int(datetime.fromisoformat(entry["timestamp"]).timestamp())
+            except (KeyError, TypeError, ValueError):
+                continue
+            records.append((_as_int(entry.get("user_id")), timestamp, _as_int(entry.get("guild_id"))))
+            if rebuild_hourly:
+                hourly_stats = data.setdefault("hourly_stats", {})
+                hour = _hour_key(timestamp)
+                hourly_stats[hour] = hourly_stats.get(hour, 0) + 1
+        hourly_stats = data.get("hourly_stats", {})
+        for hour in sorted(hourly_stats)[:-HOURLY_RETENTION]:
+            del hourly_stats[hour]
+        payload = b''.join(CLICK_RECORD.pack(*record) for record in records)
+        if payload and not _log_contains(log_path, payload):
+            for record in records:
+                state.add_click(*record)
+            state.migrated = len(state.pending)
+    data.setdefault("hourly_stats", {})
+    return state
+
+
+class ButtonClickStore:
+    """In-memory click counters per button with batched, crash-safe persistence."""
+
+    def __init__(self, data_dir=BUTTON_DATA_DIR, flush_interval=FLUSH_INTERVAL,
+                 dirty_threshold=DIRTY_THRESHOLD, recent_window=RECENT_WINDOW, index_path=INDEX_FILE):
+        self.data_dir = data_dir
+        self.index_path = index_path
+        self.index = None
+        self.flush_interval = flush_interval
+        self.dirty_threshold = dirty_threshold
+        self.recent_window = recent_window
+        self.flushes = 0
+        self._buttons = {}
+        self._loading = {}
+        self._dirty = set()
+        self._flush_lock = asyncio.Lock()
+        self._flush_wanted = asyncio.Event()
+
+    def _path(self, button_id, suffix='json'):
+        return os.path.join(self.data_dir, f"{button_id}.{suffix}")
+
+    def create(self, button_id, creator_id, **fields):
+        """Register a new button in memory; it is written out on the next flush."""
+        data = {
+            "button_id": button_id,
+            "creator_id": creator_id,
+            "created_at": datetime.now().isoformat(),
+            "total_clicks": 0,
+            "user_clicks": {},
+            "daily_stats": {},
+            "hourly_stats": {},
+            **fields
+        }
+        self._buttons[button_id] = ButtonState(data, self.recent_window)
+        self._mark_dirty(button_id)
+        return data
+
+    def cached(self, button_id):
+        """Return button data if it is already in memory, else None (never touches disk)."""
+        state = self._buttons.get(button_id)
+        return state.data if state is not None else None
+
+    async def _state(self, button_id):
+        state = self._buttons.get(button_id)
+        if state is not None:
+            return state
+
+        # Concurrent first clicks share a single load
+        pending = self._loading.get(button_id)
+        if pending is None:
+            loop = asyncio.get_event_loop()
+            pending = self._loading[button_id] = loop.run_in_executor(
+                None, _load_button, self.data_dir, button_id, self.recent_window
+            )
+        try:
+            state = await pending
+        finally:
+            self._loading.pop(button_id, None)
+
+        if state is None:
+            return None
+        if button_id not in self._buttons:
+            self._buttons[button_id] = state
+            if state.rewrite:
+                # Legacy history was migrated; persist the compacted form
+                self._mark_dirty(button_id)
+        return self._buttons[button_id]
+
+    async def get(self, button_id):
+        """Return button data, loading it from disk off the event loop on first access."""
+        state = await self._state(button_id)
+        return state.data if state is not None else None
+
+    async def record_click(self, button_id, user_id, username=None, guild_id=None):
+        """Count a click in memory and return the updated button data (None for unknown buttons)."""
+        state = await self._state(button_id)
+        if state is None:
+            return None
+
+        # No awaits below: the whole update is atomic with respect to other clicks
+        timestamp = int(time.time())
+        data = state.data
+        user_key = str(user_id)
+        data["total_clicks"] = data.get("total_clicks", 0) + 1
+        # Buttons expire on inactivity (see button_views.is_expired)
+        data["last_click_at"] = datetime.fromtimestamp(timestamp).isoformat()
+        user_clicks = data.setdefault("user_clicks", {})
+        user_clicks[user_key] = user_clicks.get(user_key, 0) + 1
+        _add_rollups(data, timestamp)
+        state.add_click(int(user_id), timestamp, _as_int(guild_id))
+
+        self._mark_dirty(button_id)
+        return data
+
+    async def stats(self, button_id, top=5, recent=10):
+        """Aggregate statistics for one button, answered from counters and rollups only."""
+        state = await self._state(button_id)
+        if state is None:
+            return None
+        data = state.data
+        now = time.time()
+        hourly_stats = data.get("hourly_stats", {})
+        last_24h = sum(hourly_stats.get(_hour_key(now - hours * 3600), 0) for hours in range(24))
+        return {
+            "total_clicks": data.get("total_clicks", 0),
+            "unique_users": len(data.get("user_clicks", {})),
+            "today": data.get("daily_stats", {}).get(_day_key(now), 0),
+            "last_24h": last_24h,
+            "last_7_days": sum(
+                data.get("daily_stats", {}).get(_day_key(now - days * 86400), 0) for days in range(7)
+            ),
+            "top_users": heapq.nlargest(top, data.get("user_clicks", {}).items(), key=lambda item: item[1]),
+            "recent_clicks": [
+                {"user_id": user_id, "timestamp": timestamp, "guild_id": guild_id or None}
+                for user_id, timestamp, guild_id in list(state.recent)[-recent:]
+            ]
+        }
+
+    def _delete_files(self, button_id):
+        for suffix in ('json', 'clicks'):
+            try:
+                os.remove(self._path(button_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    async def remove(self, button_id):
+        """Drop a button from memory and disk. Its clicks stay counted in the global index."""
+        async with self._flush_lock:
+            self._buttons.pop(button_id, None)
+            self._dirty.discard(button_id)
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self._delete_files, button_id)
+
+    async def _ensure_index(self):
+        """Load the global index, rebuilding it from disk once if it does not exist yet."""
+        if self.index is None:
+            loop = asyncio.get_event_loop()
+            index = await loop.run_in_executor(None, GlobalButtonIndex.load, self.index_path)
+            if index is None:
+                logger.info("No global button index found, rebuilding from button files")
+                index = await loop.run_in_executor(None, GlobalButtonIndex.rebuild, self.data_dir, self.index_path)
+            self.index = index
+        return self.index
+
+    async def global_stats(self, days=7):
+        """Cross-guild statistics for !globalbuttonstats from the maintained index (as of the last flush)."""
+        async with self._flush_lock:
+            index = await self._ensure_index()
+        return index.snapshot(days)
+
+    def _mark_dirty(self, button_id):
+        self._dirty.add(button_id)
+        if len(self._dirty) >= self.dirty_threshold:
+            self._flush_wanted.set()
+
+    @property
+    def dirty_count(self):
+        return len(self._dirty)
+
+    async def flush(self):
+        """Persist every dirty button and fold its new clicks into the global index."""
+        async with self._flush_lock:
+            index = await self._ensure_index()
+            if not self._dirty and not index.dirty:
+                return 0
+            dirty, self._dirty = self._dirty, set()
+            self._flush_wanted.clear()
+
+            # Snapshot on the loop so each write is consistent, do the I/O off the loop
+            batch = []
+            for button_id in dirty:
+                state = self._buttons.get(button_id)
+                if state is None:
+                    continue
+                records, state.pending = bytes(state.pending), bytearray()
+                migrated, state.migrated = state.migrated, 0
+                state.rewrite = False
+                batch.append((button_id, json.dumps(state.data, indent=2).encode('utf-8'), records, migrated))
+
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, os.makedirs, self.data_dir, 0o777, True)
+
+            written = 0
+            for button_id, payload, records, migrated in batch:
+                try:
+                    if records:
+                        await loop.run_in_executor(None, _append, self._path(button_id, 'clicks'), records)
+                        index.apply(button_id, list(CLICK_RECORD.iter_unpack(records[migrated:])))
+                        records, migrated = b'', 0
+                    await loop.run_in_executor(None, _write_atomic, self._path(button_id), payload)
+                    index.add_button(button_id)
+                    written += 1
+                except OSError as e:
+                    logger.error(f"Failed to persist button {button_id}: {e}")
+                    state = self._buttons[button_id]
+                    state.pending[0:0] = records
+                    state.migrated = migrated
+                    self._dirty.add(button_id)
+
+            if index.dirty:
+                try:
+                    await loop.run_in_executor(None, _write_atomic, self.index_path, index.to_json())
+                    index.dirty = False
+                except OSError as e:
+                    logger.error(f"Failed to persist global button index: {e}")
+            self.flushes += 1
+            return written
+
+    async def run(self):
+        """Background flusher: flush on the interval or as soon as the dirty threshold is reached."""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wanted.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Button flush failed: {e}")
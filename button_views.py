@@ -0,0 +1,150 @@
+"""
+Persistent component routing for interactive buttons.
+Instead of re-registering one view per button at startup, every component
+interaction is routed by its custom_id prefix to a single stateless handler,
+which loads button state lazily through ButtonClickStore on first click.
+Expired buttons are garbage-collected in the background.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+BUTTON_PREFIX = 'button'
+# Buttons stop accepting clicks after this long without one (like View(timeout=...), which counts from
+# the last interaction)
+BUTTON_LIFETIME = timedelta(days=30)
+# Seconds between expired-button sweeps
+GC_INTERVAL = 6 * 60 * 60
+
+
+def button_custom_id(button_id):
+    """custom_id used for an interactive button's component."""
+    return f"{BUTTON_PREFIX}:{button_id}"
+
+
+def build_button_view(button_id, label, style=discord.ButtonStyle.primary):
+    """
+    Build the message components for a button. The view is stopped before it is
+    returned so discord.py does not keep it in its view store; clicks are routed by
+    ComponentRegistry instead.
+    """
+    view = discord.ui.View(timeout=None)
+    view.add_item(discord.ui.Button(label=label, style=style, custom_id=button_custom_id(button_id)))
+    view.stop()
+    return view
+
+
+def last_activity(data):
+    """
+    When a button was last used: its last click, else the latest day it has clicks on record
+    (buttons saved before last_click_at was stamped), else its creation time. None if unknown.
+    """
+    for value in (data.get("last_click_at"), max(data.get("daily_stats") or {}, default=None), data.get("created_at")):
+        if value:
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                continue
+    return None
+
+
+def is_expired(data, now=None, lifetime=BUTTON_LIFETIME):
+    """True once a button has gone unused for longer than its lifetime (buttons with no known activity never expire)."""
+    active = last_activity(data)
+    if active is None:
+        return False
+    return (now or datetime.now()) - active > lifetime
+
+
+class ComponentRegistry:
+    """Routes component interactions to handlers keyed by the custom_id prefix before the first ':'."""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def register(self, prefix, handler):
+        """Register `handler(interaction, key)` for custom_ids of the form '<prefix>:<key>'."""
+        self._handlers[prefix] = handler
+
+    async def dispatch(self, interaction):
+        """Dispatch a component interaction. Returns True if a registered handler took it."""
+        if interaction.type is not discord.InteractionType.component:
+            return False
+        prefix, separator, key = (interaction.data or {}).get('custom_id', '').partition(':')
+        handler = self._handlers.get(prefix) if separator else None
+        if handler is None:
+            return False
+        await handler(interaction, key)
+        return True
+
+
+class ButtonClickHandler:
+    """Stateless click handler shared by every interactive button."""
+
+    def __init__(self, store, lifetime=BUTTON_LIFETIME):
+        self.store = store
+        self.lifetime = lifetime
+
+    async def __call__(self, interaction, button_id):
+        # Cold buttons are loaded off the event loop; defer so the 3-second window is never at risk
+        if self.store.cached(button_id) is None:
+            await interaction.response.defer(ephemeral=True)
+        send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+
+        data = await self.store.get(button_id)
+        if data is None or is_expired(data, lifetime=self.lifetime):
+            await send("⌛ This button has expired.", ephemeral=True)
+            return
+
+        data = await self.store.record_click(button_id, interaction.user.id, str(interaction.user), interaction.guild_id)
+        if data is None:
+            # Garbage-collected between the expiry check and the click
+            await send("⌛ This button has expired.", ephemeral=True)
+            return
+        await send(f"✅ Click counted! This button has been clicked {data['total_clicks']} times.", ephemeral=True)
+
+
+def _find_expired(data_dir, lifetime):
+    now = datetime.now()
+    expired = []
+    for path in glob.glob(os.path.join(data_dir, '*.json')):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if is_expired(data, now, lifetime):
+            expired.append(data.get("button_id") or os.path.splitext(os.path.basename(path))[0])
+    return expired
+
+
+async def collect_expired_buttons(store, lifetime=BUTTON_LIFETIME):
+    """Remove every expired button from memory and disk. Returns the number removed."""
+    loop = asyncio.get_event_loop()
+    expired = await loop.run_in_executor(None, _find_expired, store.data_dir, lifetime)
+    # The files can lag behind clicks that are still waiting for a flush
+    expired = [button_id for button_id in expired
+               if store.cached(button_id) is None or is_expired(store.cached(button_id), lifetime=lifetime)]
+    for button_id in expired:
+        await store.remove(button_id)
+    if expired:
+        logger.info(f"Garbage-collected {len(expired)} expired buttons")
+    return len(expired)
+
+
+async def run_button_gc(store, interval=GC_INTERVAL, lifetime=BUTTON_LIFETIME):
+    """Background sweep for expired buttons; runs after startup so boot cost is independent of button count."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await collect_expired_buttons(store, lifetime)
+        except Exception as e:
+            logger.error(f"Button garbage collection failed: {e}")
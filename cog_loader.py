@@ -0,0 +1,114 @@
+"""
+Dependency-aware cog loader.
+Loads independent extensions concurrently, holds back lazy ones until after
+the bot is ready, and records how long each extension took to load.
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CogSpec:
+    """Declaration of an extension, the extensions it needs, and whether it can load late."""
+
+    __slots__ = ('name', 'depends_on', 'lazy')
+
+    def __init__(self, name, depends_on=(), lazy=False):
+        self.name = name
+        self.depends_on = tuple(depends_on)
+        self.lazy = lazy
+
+
+class CogLoader:
+    """Load extensions in dependency order with as much concurrency as the graph allows."""
+
+    def __init__(self, bot, specs):
+        self.bot = bot
+        self.specs = {spec.name: spec for spec in specs}
+        self.timings = {}
+        self.eager_loaded = False
+        self._tasks = {}
+        self._validate()
+
+    def _validate(self):
+        """Reject unknown dependencies, eager cogs waiting on lazy ones, and cycles."""
+        for spec in self.specs.values():
+            for dep in spec.depends_on:
+                if dep not in self.specs:
+                    raise ValueError(f"{spec.name} depends on unknown extension {dep}")
+                if self.specs[dep].lazy and not spec.lazy:
+                    raise ValueError(f"{spec.name} is eager but depends on lazy extension {dep}")
+
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle involving {name}")
+            visiting.add(name)
+            for dep in self.specs[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.specs:
+            visit(name)
+
+    async def _load(self, spec):
+        """Wait for dependencies, then load a single extension. Returns True on success."""
+        for dep in spec.depends_on:
+            if not await self._tasks[dep]:
+                self.timings[spec.name] = (0.0, f"skipped ({dep} failed)")
+                logger.error(f"Skipped cog {spec.name}: dependency {dep} failed to load")
+                return False
+
+        start = time.perf_counter()
+        try:
+            await self.bot.load_extension(spec.name)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            self.timings[spec.name] = (elapsed, "failed")
+            logger.error(f"Failed to load cog {spec.name}: {e}")
+            return False
+
+        elapsed = time.perf_counter() - start
+        self.timings[spec.name] = (elapsed, "loaded")
+        logger.info(f"Loaded cog: {spec.name} ({elapsed * 1000:.1f}ms)")
+        return True
+
+    async def _load_group(self, lazy):
+        specs = [spec for spec in self.specs.values() if spec.lazy == lazy]
+        for spec in specs:
+            self._tasks[spec.name] = asyncio.ensure_future(self._load(spec))
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._tasks[spec.name] for spec in specs))
+        return sum(results), len(specs), time.perf_counter() - start
+
+    async def load_eager(self):
+        """Load every non-lazy extension. Returns (loaded, total, wall-clock seconds)."""
+        result = await self._load_group(lazy=False)
+        self.eager_loaded = True
+        return result
+
+    async def load_lazy(self):
+        """Load the extensions that were deferred until after startup."""
+        return await self._load_group(lazy=True)
+
+    def failed(self, lazy=None):
+        """Names of extensions that failed or were skipped, optionally filtered by lazy/eager."""
+        return [
+            name for name, (_, status) in self.timings.items()
+            if status != "loaded" and (lazy is None or self.specs[name].lazy == lazy)
+        ]
+
+    def timing_report(self):
+        """Format a per-cog timing table, slowest first."""
+        width = max((len(name) for name in self.timings), default=10)
+        lines = [f"{'Cog':<{width}}  {'Time':>10}  Status", "-" * (width + 26)]
+        for name, (elapsed, status) in sorted(self.timings.items(), key=lambda item: item[1][0], reverse=True):
+            lines.append(f"{name:<{width}}  {elapsed * 1000:>8.1f}ms  {status}")
+        return "\n".join(lines)
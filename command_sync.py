@@ -0,0 +1,54 @@
+"""
+Slash command sync bookkeeping.
+Hashes the serialized command tree so restarts only call tree.sync when the
+registered commands actually changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SYNC_STATE_FILE = 'data/command_sync.json'
+
+
+def _serialize_command(command, tree):
+    """Serialize a command the same way CommandTree.sync sends it to Discord."""
+    try:
+        return command.to_dict(tree)
+    except TypeError:
+        # discord.py < 2.4 takes no tree argument
+        return command.to_dict()
+
+
+def command_tree_hash(tree, guild=None):
+    """Return a canonical SHA-256 of the commands that would be synced for a scope."""
+    payload = [_serialize_command(command, tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda data: (data.get('type', 1), data['name']))
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def load_sync_state(path=SYNC_STATE_FILE):
+    """Load stored hashes keyed by '<application_id>:<scope>'."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Ignoring unreadable command sync state {path}: {e}")
+        return {}
+
+
+def save_sync_state(state, path=SYNC_STATE_FILE):
+    """Atomically persist the hash state."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
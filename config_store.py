@@ -0,0 +1,182 @@
+"""
+Configuration store backed by config.json.
+Per-guild overrides are resolved once into flat, int-keyed views, the file is
+watched for changes and reloaded atomically, and subscribers are notified only
+when the sections they care about change.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "prefix": "!",
+    "log_channel": None,
+    "mute_role": "Muted",
+    "max_warnings": 3,
+    "auto_mod": {
+        "enabled": False,
+        "spam_threshold": 5,
+        "spam_interval": 10
+    }
+}
+
+
+class GuildConfig(dict):
+    """Flat configuration for one guild: global settings with that guild's overrides applied."""
+
+    __slots__ = ('guild_id',)
+
+    def __init__(self, guild_id, values):
+        super().__init__(values)
+        self.guild_id = guild_id
+
+    @property
+    def prefix(self):
+        return self.get('prefix', DEFAULT_CONFIG['prefix'])
+
+    @property
+    def log_channel(self):
+        channel_id = self.get('log_channel')
+        return int(channel_id) if channel_id else None
+
+    @property
+    def mute_role(self):
+        return self.get('mute_role', DEFAULT_CONFIG['mute_role'])
+
+    @property
+    def max_warnings(self):
+        return int(self.get('max_warnings', DEFAULT_CONFIG['max_warnings']))
+
+    @property
+    def auto_mod(self):
+        return self.get('auto_mod', DEFAULT_CONFIG['auto_mod'])
+
+
+def _merge_guild(base, overrides):
+    """Apply a guild's overrides on top of the global settings, merging nested sections one level deep."""
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def _changed_sections(old, new):
+    """Return the top-level sections that differ, counting guild overrides towards their section."""
+    changed = {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+    if 'guild_configs' in changed:
+        old_guilds = old.get('guild_configs', {})
+        new_guilds = new.get('guild_configs', {})
+        for guild_id in set(old_guilds) | set(new_guilds):
+            before = old_guilds.get(guild_id, {})
+            after = new_guilds.get(guild_id, {})
+            changed.update(key for key in set(before) | set(after) if before.get(key) != after.get(key))
+    return changed
+
+
+class ConfigStore:
+    """Loads config.json into an indexed snapshot and hot-reloads it on change."""
+
+    def __init__(self, path='config.json'):
+        self.path = path
+        self.data = dict(DEFAULT_CONFIG)
+        self._defaults_view = GuildConfig(None, self.data)
+        self._guilds = {}
+        self._subscribers = {}
+        self._file_signature = None
+
+    def _read(self):
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _apply(self, data):
+        """Build the guild index for new data and swap it in as one snapshot."""
+        base = {key: value for key, value in data.items() if key != 'guild_configs'}
+        guilds = {}
+        for guild_id, overrides in data.get('guild_configs', {}).items():
+            try:
+                guilds[int(guild_id)] = GuildConfig(int(guild_id), _merge_guild(base, overrides))
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring guild_configs entry with invalid guild ID: {guild_id!r}")
+
+        old = self.data
+        self.data, self._defaults_view, self._guilds = data, GuildConfig(None, base), guilds
+        return _changed_sections(old, data)
+
+    def load(self):
+        """Initial load. Falls back to defaults if the file is missing or invalid."""
+        self._file_signature = self._signature()
+        try:
+            data = self._read()
+            logger.info("Configuration loaded successfully")
+        except FileNotFoundError:
+            logger.error(f"{self.path} not found. Using default configuration.")
+            data = dict(DEFAULT_CONFIG)
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing {self.path}: {e}. Using default configuration.")
+            data = dict(DEFAULT_CONFIG)
+        self._apply(data)
+        return self.data
+
+    def reload(self):
+        """Re-read the file, keeping the current snapshot if it is unreadable. Returns the changed sections."""
+        self._file_signature = self._signature()
+        try:
+            data = self._read()
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Config reload failed, keeping previous configuration: {e}")
+            return set()
+
+        changed = self._apply(data)
+        if changed:
+            logger.info(f"Configuration reloaded, changed sections: {', '.join(sorted(changed))}")
+            self._notify(changed)
+        return changed
+
+    def guild(self, guild_id):
+        """Return the flat config view for a guild (the global view if it has no overrides)."""
+        if guild_id is None:
+            return self._defaults_view
+        return self._guilds.get(guild_id, self._defaults_view)
+
+    def guild_overrides(self):
+        """Return {guild_id: GuildConfig} for every guild with overrides."""
+        return self._guilds
+
+    def subscribe(self, section, callback):
+        """Call `callback(store)` whenever `section` changes on reload ('*' matches any change)."""
+        self._subscribers.setdefault(section, []).append(callback)
+
+    def _notify(self, changed):
+        callbacks = []
+        for section in [*changed, '*']:
+            for callback in self._subscribers.get(section, []):
+                if callback not in callbacks:
+                    callbacks.append(callback)
+
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"Config subscriber {callback!r} failed: {e}")
+
+    async def watch(self, interval=2.0):
+        """Poll the config file and reload it whenever it changes."""
+        while True:
+            await asyncio.sleep(interval)
+            signature = self._signature()
+            if signature is not None and signature != self._file_signature:
+                self.reload()
@@ -0,0 +1,223 @@
+"""
+Compiled automod filter rules.
+A guild's literal rules (banned words and phrases) are compiled into one
+Aho-Corasick automaton, so literals cost one pass regardless of how many there
+are. Regex rules are joined into one non-capturing alternation used only as a
+prefilter: clean messages cost one search, and only a message it matches is run
+through the individual patterns to find which rules hit. Patterns with capture
+groups or backreferences would be renumbered by the join, so they always run on
+their own.
+Compiled rule sets are cached per guild and rebuilt only when the auto_mod
+configuration changes.
+
+Rules live in the auto_mod config section:
+    "filters": [{"id": "slur-1", "type": "word", "pattern": "..."},
+                {"id": "shorteners", "type": "regex", "pattern": "bit\\.ly/\\S+"}]
+    "block_invites": true
+"word" rules match whole words, "literal" rules match anywhere, both case-insensitively.
+"""
+
+import logging
+import re
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+INVITE_RULE = {
+    'id': 'invite',
+    'type': 'regex',
+    'pattern': r'(?:discord\.gg|discord(?:app)?\.com/invite)/[\w-]+'
+}
+
+
+class AhoCorasick:
+    """Multi-literal matcher: one pass over the text finds every occurrence of every literal."""
+
+    def __init__(self, literals):
+        """`literals` is an iterable of (literal, value) pairs; literals are matched as given."""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for literal, value in literals:
+            node = 0
+            for char in literal:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = next_node
+            self._out[node] += ((len(literal), value),)
+
+        # Breadth-first fail links; each node's outputs include those of its fail chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def iter_matches(self, text):
+        """Yield (start, end, value) for every match."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in out[node]:
+                yield index + 1 - length, index + 1, value
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def _combine(patterns):
+    """One case-insensitive non-capturing alternation of (rule_id, pattern) pairs, or None when there are none."""
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{pattern})' for _, pattern in patterns), re.IGNORECASE)
+
+
+class CompiledRules:
+    """One guild's rules compiled into an automaton plus a regex prefilter, with per-rule hit counters."""
+
+    def __init__(self, rules):
+        self.rule_ids = []
+        self.hits = {}
+        literals, word_rules, patterns, standalone = [], set(), [], []
+        for rule in rules:
+            rule_id, kind, pattern = str(rule.get('id')), rule.get('type', 'word'), rule.get('pattern')
+            if not pattern:
+                continue
+            if kind in ('word', 'literal'):
+                literals.append((pattern.casefold(), rule_id))
+                if kind == 'word':
+                    word_rules.add(rule_id)
+            elif kind == 'regex':
+                try:
+                    compiled = re.compile(pattern, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning(f"Skipping invalid filter rule {rule_id!r}: {e}")
+                    continue
+                if compiled.groups:
+                    # Groups are numbered across the whole alternation, so \1 or (?P=name) would point elsewhere
+                    standalone.append((rule_id, compiled))
+                else:
+                    patterns.append((rule_id, pattern))
+            else:
+                logger.warning(f"Skipping filter rule {rule_id!r} with unknown type {kind!r}")
+                continue
+            self.rule_ids.append(rule_id)
+            self.hits[rule_id] = 0
+
+        self._word_rules = word_rules
+        self._automaton = AhoCorasick(literals) if literals else None
+        try:
+            self._prefilter = _combine(patterns)
+        except re.error:
+            # Patterns that only compile on their own (e.g. global inline flags mid-pattern)
+            patterns, rejected = self._combinable(patterns)
+            standalone.extend(rejected)
+            self._prefilter = _combine(patterns)
+        self._prefiltered = [(rule_id, re.compile(pattern, re.IGNORECASE)) for rule_id, pattern in patterns]
+        self._standalone = standalone
+
+    @staticmethod
+    def _combinable(patterns):
+        """Split patterns into those that still combine with the ones accepted before them and the rest, compiled alone."""
+        accepted, rejected = [], []
+        for rule_id, pattern in patterns:
+            try:
+                _combine(accepted + [(rule_id, pattern)])
+            except re.error:
+                rejected.append((rule_id, re.compile(pattern, re.IGNORECASE)))
+                continue
+            accepted.append((rule_id, pattern))
+        return accepted, rejected
+
+    def __len__(self):
+        return len(self.rule_ids)
+
+    def match(self, text):
+        """
+        Return the ids of every rule that matches `text`, counting each hit: literal
+        rules in order of occurrence, then regex rules in rule order.
+        """
+        matched = {}
+        if self._automaton is not None:
+            folded = text.casefold()
+            for start, end, rule_id in self._automaton.iter_matches(folded):
+                if rule_id in matched:
+                    continue
+                if rule_id in self._word_rules and (
+                    (start > 0 and _is_word_char(folded[start - 1]))
+                    or (end < len(folded) and _is_word_char(folded[end]))
+                ):
+                    continue
+                matched[rule_id] = None
+        if self._prefilter is not None and self._prefilter.search(text):
+            for rule_id, pattern in self._prefiltered:
+                if pattern.search(text):
+                    matched.setdefault(rule_id, None)
+        for rule_id, pattern in self._standalone:
+            if pattern.search(text):
+                matched.setdefault(rule_id, None)
+        for rule_id in matched:
+            self.hits[rule_id] += 1
+        return list(matched)
+
+
+class FilterEngine:
+    """Per-guild cache of compiled rule sets, invalidated when the auto_mod configuration changes."""
+
+    def __init__(self, config_store):
+        self.config_store = config_store
+        self._compiled = {}
+        self.hits = 0
+        self.misses = 0
+
+    def rules_for(self, guild_id):
+        auto_mod = self.config_store.guild(guild_id).auto_mod
+        rules = list(auto_mod.get('filters', []))
+        if auto_mod.get('block_invites'):
+            rules.append(INVITE_RULE)
+        return rules
+
+    def compiled(self, guild_id):
+        rules = self._compiled.get(guild_id)
+        if rules is None:
+            self.misses += 1
+            rules = self._compiled[guild_id] = CompiledRules(self.rules_for(guild_id))
+        else:
+            self.hits += 1
+        return rules
+
+    def check(self, guild_id, text):
+        """Return the ids of the guild's filter rules that `text` violates."""
+        return self.compiled(guild_id).match(text)
+
+    def invalidate(self, guild_id=None):
+        """Drop compiled rules for one guild, or for every guild when guild_id is None."""
+        if guild_id is None:
+            self._compiled.clear()
+        else:
+            self._compiled.pop(guild_id, None)
+
+    def rule_hits(self):
+        """{guild_id: {rule_id: hits}} for rule sets compiled since the last invalidation."""
+        return {guild_id: dict(rules.hits) for guild_id, rules in self._compiled.items()}
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'guilds': len(self._compiled)}
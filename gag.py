@@ -0,0 +1,70 @@
+"""
+Gag system helpers.
+Gagged users are held per guild as frozensets, replaced whenever a gag or
+ungag happens, so the per-message check is a dict lookup plus a set membership
+test with no storage access. Messages are rewritten through a precomputed
+str.translate table in a single C-level pass, and only when they contain a
+character the table changes.
+
+The moderation cog owns the actual scramble mapping; it passes it to
+GagRegistry (or scramble) as a str.maketrans table. GAG_TABLE is only a
+placeholder default so the helpers and benchmark run on their own.
+"""
+
+# Placeholder mapping, not the cog's rule: swaps R's for W's, keeps case, passes everything else through
+GAG_TABLE = str.maketrans({'r': 'w', 'R': 'W'})
+
+
+def scramble_triggers(table):
+    """Characters a translate table rewrites, for the cheap needs_scramble pre-check."""
+    return tuple(chr(code) for code in table)
+
+
+def needs_scramble(text, triggers=scramble_triggers(GAG_TABLE)):
+    """Only messages containing a character the table rewrites are scrambled; the rest pass through untouched."""
+    return any(char in text for char in triggers)
+
+
+def scramble(text, table=GAG_TABLE, triggers=None):
+    """Scramble a gagged user's message with table, or return it unchanged if nothing in it would change."""
+    if not needs_scramble(text, scramble_triggers(table) if triggers is None else triggers):
+        return text
+    return text.translate(table)
+
+
+class GagRegistry:
+    """In-memory per-guild sets of gagged user IDs, kept in sync by the gag commands."""
+
+    EMPTY = frozenset()
+
+    def __init__(self, table=GAG_TABLE):
+        self._guilds = {}
+        self.table = table
+        self._triggers = scramble_triggers(table)
+
+    def scramble(self, text):
+        """Scramble text with this registry's table."""
+        return scramble(text, self.table, self._triggers)
+
+    def load(self, gagged):
+        """Replace all state from {guild_id: iterable of user_ids}."""
+        self._guilds = {int(guild_id): frozenset(map(int, users)) for guild_id, users in gagged.items() if users}
+
+    def is_gagged(self, guild_id, user_id):
+        return user_id in self._guilds.get(guild_id, self.EMPTY)
+
+    def gagged(self, guild_id):
+        return self._guilds.get(guild_id, self.EMPTY)
+
+    def gag(self, guild_id, user_id):
+        self._guilds[guild_id] = self.gagged(guild_id) | {user_id}
+
+    def ungag(self, guild_id, user_id):
+        remaining = self.gagged(guild_id) - {user_id}
+        if remaining:
+            self._guilds[guild_id] = remaining
+        else:
+            self._guilds.pop(guild_id, None)
+
+    def __len__(self):
+        return sum(len(users) for users in self._guilds.values())
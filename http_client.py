@@ -0,0 +1,121 @@
+"""
+Bot-wide outbound HTTP client.
+One pooled aiohttp session with keep-alive and DNS caching, retry/backoff for
+transient failures, and per-host latency metrics. Owned by ModerationBot and
+closed on shutdown.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+HTTPResponse = namedtuple('HTTPResponse', ['status', 'headers', 'data'])
+
+# Statuses worth retrying: rate limits and transient upstream failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Methods that are safe to repeat without side effects
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class HTTPClient:
+    """Shared aiohttp session with a tuned connector, retries and latency tracking."""
+
+    def __init__(self, limit=100, limit_per_host=10, dns_ttl=300, keepalive_timeout=30,
+                 timeout=15, retries=2, backoff=0.5, max_backoff=10.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.latency = Histogram('bot_http_request_duration_seconds', 'Outbound HTTP request time by host.', 'host')
+        self._session = None
+
+    @property
+    def session(self):
+        """The shared session, created on first use inside the running event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def _retry_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        return delay * (0.5 + random.random() / 2)
+
+    async def request(self, method, url, *, read='json', retries=None, retry_unsafe=False, **kwargs):
+        """
+        Perform a request and read the body ('json', 'text', 'bytes' or None).
+        Non-idempotent methods are only retried when retry_unsafe is set.
+        """
+        method = method.upper()
+        if retries is None:
+            retries = self.retries if (method in IDEMPOTENT_METHODS or retry_unsafe) else 0
+        host = urlsplit(url).hostname or 'unknown'
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                async with self.session.request(method, url, **kwargs) as resp:
+                    if resp.status in RETRY_STATUSES and attempt < retries:
+                        delay = self._retry_delay(attempt, resp.headers.get('Retry-After'))
+                    else:
+                        if read == 'json':
+                            try:
+                                data = await resp.json(content_type=None)
+                            except ValueError:
+                                data = None
+                        elif read == 'text':
+                            data = await resp.text()
+                        elif read == 'bytes':
+                            data = await resp.read()
+                        else:
+                            data = None
+                        return HTTPResponse(resp.status, resp.headers, data)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"{method} {host} failed ({e!r}), retrying in {delay:.2f}s")
+            finally:
+                self.latency.observe(host, time.perf_counter() - start)
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get_json(self, url, **kwargs):
+        return await self.request('GET', url, read='json', **kwargs)
+
+    async def get_text(self, url, **kwargs):
+        return await self.request('GET', url, read='text', **kwargs)
+
+    async def get_bytes(self, url, **kwargs):
+        return await self.request('GET', url, read='bytes', **kwargs)
+
+    async def close(self):
+        """Close the session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
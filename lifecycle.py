@@ -0,0 +1,120 @@
+"""
+Coordinated graceful shutdown.
+On SIGTERM/SIGINT the bot stops accepting new work, drains tracked in-flight
+tasks up to a deadline, flushes write-behind buffers, then closes the Discord
+connection, registered resources and the database pool in that order.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds allowed for in-flight tasks to finish before they are cancelled
+DEFAULT_DRAIN_TIMEOUT = 20.0
+# Seconds allowed for each flush or close step
+STEP_TIMEOUT = 10.0
+
+
+class LifecycleManager:
+    """Tracks in-flight work and runs the shutdown sequence exactly once."""
+
+    def __init__(self, bot, db=None, drain_timeout=DEFAULT_DRAIN_TIMEOUT):
+        self.bot = bot
+        self.db = db
+        self.drain_timeout = drain_timeout
+        self.accepting = True
+        self.drain_report = None
+        self._tasks = set()
+        self._flushers = []
+        self._closers = []
+        self._shutdown_task = None
+
+    def track(self, coro, name=None):
+        """Run a coroutine as a task that shutdown will wait for."""
+        task = asyncio.ensure_future(coro)
+        if name and hasattr(task, 'set_name'):
+            task.set_name(name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    @property
+    def in_flight(self):
+        return len(self._tasks)
+
+    def register_flush(self, name, callback):
+        """Register an async callable that persists buffered writes. Flushes run in registration order."""
+        self._flushers.append((name, callback))
+
+    def register_closer(self, name, callback):
+        """Register an async callable that releases a resource after the bot has closed."""
+        self._closers.append((name, callback))
+
+    def install_signal_handlers(self, loop=None):
+        """Trigger a graceful shutdown on SIGTERM and SIGINT (no-op where the loop does not support it)."""
+        loop = loop or asyncio.get_event_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.shutdown, sig.name)
+            except (NotImplementedError, RuntimeError):
+                logger.debug(f"Signal handler for {sig.name} not supported on this platform")
+
+    def shutdown(self, reason='shutdown requested'):
+        """Start the shutdown sequence if it is not already running. Returns an awaitable for its completion."""
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.ensure_future(self._shutdown(reason))
+        return self._shutdown_task
+
+    async def _run_step(self, kind, name, callback):
+        try:
+            await asyncio.wait_for(callback(), timeout=STEP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Shutdown {kind} '{name}' timed out after {STEP_TIMEOUT}s")
+        except Exception as e:
+            logger.error(f"Shutdown {kind} '{name}' failed: {e}")
+
+    async def _shutdown(self, reason):
+        start = time.perf_counter()
+        logger.info(f"Graceful shutdown started ({reason}); no longer accepting new work")
+        self.accepting = False
+
+        # Drain in-flight work up to the deadline
+        pending = set(self._tasks)
+        drained, cancelled = len(pending), 0
+        if pending:
+            _, still_running = await asyncio.wait(pending, timeout=self.drain_timeout)
+            cancelled = len(still_running)
+            for task in still_running:
+                task.cancel()
+            if still_running:
+                await asyncio.gather(*still_running, return_exceptions=True)
+        drain_time = time.perf_counter() - start
+
+        # Persist write-behind buffers while the process still has everything it needs
+        for name, callback in self._flushers:
+            await self._run_step('flush', name, callback)
+
+        # Close the Discord connection (and the shared HTTP session), then other resources
+        if not self.bot.is_closed():
+            await self._run_step('close', 'discord', self.bot.close)
+        for name, callback in self._closers:
+            await self._run_step('close', name, callback)
+
+        pool = getattr(self.db, 'pool', None)
+        if pool is not None:
+            await self._run_step('close', 'database pool', pool.close)
+
+        self.drain_report = {
+            'reason': reason,
+            'tasks_drained': drained - cancelled,
+            'tasks_cancelled': cancelled,
+            'drain_seconds': drain_time,
+            'total_seconds': time.perf_counter() - start
+        }
+        logger.info(
+            f"Shutdown complete: {drained - cancelled} tasks drained, {cancelled} cancelled, "
+            f"drain {drain_time:.2f}s, total {self.drain_report['total_seconds']:.2f}s"
+        )
@@ -0,0 +1,187 @@
+"""
+Non-blocking logging pipeline.
+Log calls on the event loop only enqueue the record; a listener thread does the
+formatting and disk I/O. The file output is JSON lines, rotated by size and at
+midnight, and high-volume categories can be sampled before they are queued.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime
+
+# Records passed with extra={...} carrying these fields are written as structured columns
+CONTEXT_FIELDS = ('category', 'guild_id', 'channel_id', 'user_id', 'command')
+
+# Keep one in N records for these categories (set via extra={'category': ...})
+DEFAULT_SAMPLE_RATES = {
+    'message': 100,
+}
+
+_pipeline = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that counts and drops records instead of blocking or erroring when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Merge args into the message but leave exc_info/exc_text alone: the stock prepare()
+        formats the traceback here on the event loop and strips it, so the listener's
+        formatter never sees it.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class CategorySampler(logging.Filter):
+    """
+    Pass only every Nth record of sampled categories. Records without a category, and
+    WARNING or above in any category, always pass.
+    """
+
+    def __init__(self, sample_rates):
+        super().__init__()
+        self.sample_rates = dict(sample_rates)
+        self._counters = dict.fromkeys(self.sample_rates, 0)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        category = getattr(record, 'category', None)
+        rate = self.sample_rates.get(category)
+        if not rate or rate <= 1:
+            return True
+        count = self._counters[category] + 1
+        self._counters[category] = count
+        if count % rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        sample_rate = getattr(record, 'sample_rate', None)
+        if sample_rate:
+            entry['sample_rate'] = sample_rate
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DailyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Writes to <dir>/<prefix>_YYYYMMDD.log, switching files at midnight and rotating by size within a day."""
+
+    def __init__(self, log_dir, prefix='bot', max_bytes=10 * 1024 * 1024, backup_count=5, encoding='utf-8'):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.current_date = datetime.now().strftime('%Y%m%d')
+        super().__init__(self._path_for(self.current_date), maxBytes=max_bytes,
+                         backupCount=backup_count, encoding=encoding, delay=True)
+
+    def _path_for(self, date):
+        return os.path.abspath(os.path.join(self.log_dir, f"{self.prefix}_{date}.log"))
+
+    def shouldRollover(self, record):
+        if datetime.now().strftime('%Y%m%d') != self.current_date:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        today = datetime.now().strftime('%Y%m%d')
+        if today == self.current_date:
+            super().doRollover()
+            return
+        # New day: close yesterday's file and start today's
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.current_date = today
+        self.baseFilename = self._path_for(today)
+
+
+class LoggingPipeline:
+    """Owns the queue handler and the listener thread that writes log records."""
+
+    def __init__(self, queue_handler, listener):
+        self.queue_handler = queue_handler
+        self.listener = listener
+        self._stopped = False
+
+    @property
+    def dropped(self):
+        """Number of records dropped because the queue was full."""
+        return self.queue_handler.dropped
+
+    @property
+    def queue_depth(self):
+        return self.queue_handler.queue.qsize()
+
+    def stop(self):
+        """Flush queued records and stop the listener thread."""
+        if not self._stopped:
+            self._stopped = True
+            self.listener.stop()
+
+
+def setup_logging(level=logging.INFO, log_dir='logs', queue_size=10000, sample_rates=None):
+    """Route all logging through a bounded queue. Safe to call more than once."""
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+
+    os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = DailyRotatingFileHandler(log_dir)
+    file_handler.setFormatter(JSONLinesFormatter())
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(CategorySampler(DEFAULT_SAMPLE_RATES if sample_rates is None else sample_rates))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+
+    _pipeline = LoggingPipeline(queue_handler, listener)
+    atexit.register(_pipeline.stop)
+    return _pipeline
@@ -6,32 +6,139 @@ A modular Discord bot for server moderation with extensible architecture.
 import discord
 from discord.ext import commands
 import asyncio
-import json
 import logging
 import os
-from datetime import datetime
+import sys
+import time
+import types
 
 from utils.optimization import PerformanceMonitor, CacheManager
 from utils.db_manager import db
+from metrics import DispatchStats, Histogram, LoopLagMonitor
+from cog_loader import CogLoader, CogSpec
+from command_sync import command_tree_hash, load_sync_state, save_sync_state
+from permission_resolver import PermissionResolver, SAFE_COMMANDS
+from config_store import ConfigStore
+from logging_setup import setup_logging
+from http_client import HTTPClient
+from lifecycle import LifecycleManager
+from button_store import ButtonClickStore
+from button_views import BUTTON_PREFIX, ButtonClickHandler, ComponentRegistry, run_button_gc
+from reminder_delivery import ReminderDelivery
+from reminder_leases import LeaseManager
+from reminder_scheduler import ReminderListener, ReminderScheduler, fetch_upcoming
+import time_parser
+from user_resolver import UserResolver
+from rate_limits import RoutePacer
+from send_queue import ChannelSendQueue
+from spam_detector import SpamDetector
+from filter_engine import FilterEngine
+from raid_protection import RaidProtection
+from gag import GagRegistry
+from snipe_cache import SnipeCache, SnipeEntry
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'logs/bot_{datetime.now().strftime("%Y%m%d")}.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging (queued; file output is JSON lines in logs/bot_YYYYMMDD.log)
+logging_pipeline = setup_logging(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
+# Extensions loaded at startup. Cogs with no dependencies between them load
+# concurrently; lazy cogs are not needed to serve commands and load after on_ready.
+COG_SPECS = [
+    CogSpec('cogs.accessibility'),
+    CogSpec('cogs.help'),
+    CogSpec('cogs.moderation'),
+    CogSpec('cogs.logging'),
+    CogSpec('cogs.utility'),
+    CogSpec('cogs.emoji'),
+    CogSpec('cogs.interactive'),
+    CogSpec('cogs.reaction_roles'),
+    CogSpec('cogs.snipe'),
+    CogSpec('cogs.afk'),
+    CogSpec('cogs.auto_role'),
+    CogSpec('cogs.starboard'),
+    CogSpec('cogs.bot_status'),
+    CogSpec('cogs.rss_feeds', lazy=True),
+    CogSpec('cogs.welcome_images', lazy=True),
+    CogSpec('cogs.welcome_animations'),
+    CogSpec('cogs.automod'),
+    CogSpec('cogs.reminders'),
+    CogSpec('cogs.user_app', depends_on=['cogs.reminders']),
+    CogSpec('cogs.ping_user')
+]
+
+class ModerationTree(discord.app_commands.CommandTree):
+    """Command tree that refuses new slash commands once shutdown has begun."""
+    
+    async def interaction_check(self, interaction):
+        return self.client.lifecycle.accepting
+
 class ModerationBot(commands.Bot):
     """Main bot class with initialization and configuration loading."""
     
-    def __init__(self):
-        # Load configuration
-        self.config = self.load_config()
+    def __init__(self, force_sync=False):
+        # Load configuration (hot-reloaded from config.json once the bot is running)
+        self.config_store = ConfigStore('config.json')
+        self.config_store.load()
+        self.build_prefix_index()
+        
+        # Shared, memoized role/permission checks (invalidated by role and member events)
+        self.permission_resolver = PermissionResolver(self.config.get('permissions', {}))
+        
+        # Rebuild precomputed state only when the relevant sections change
+        self.config_store.subscribe('prefix', lambda store: self.build_prefix_index())
+        self.config_store.subscribe(
+            'permissions', lambda store: self.permission_resolver.rebuild(store.data.get('permissions', {}))
+        )
+        
+        # O(1)-per-message spam detection for the automod cog with per-guild limits, rebuilt when they change
+        self.spam_detector = SpamDetector.from_config(self.config_store)
+        self.config_store.subscribe('auto_mod', self.spam_detector.apply_config)
+        
+        # Per-guild automod word/link rules compiled once; recompiled only after an auto_mod config change
+        self.filter_engine = FilterEngine(self.config_store)
+        self.config_store.subscribe('auto_mod', lambda store: self.filter_engine.invalidate())
+        
+        # Join-burst detection with one coordinated lockdown and a bulk action queue per raid. Joins are not
+        # fed to it yet: lockdown state is in memory only and nothing can call unlock() until the automod
+        # cog's unlock command does, so the cog wires on_member_join together with that command
+        self.raid_protection = RaidProtection(self, self.config_store)
+        
+        # Gagged users per guild for the moderation cog's gag commands (in memory; nothing here loads or checks it yet).
+        # Uses the placeholder GAG_TABLE until the cog passes its own mapping via GagRegistry(table=...)
+        self.gag_registry = GagRegistry()
+        
+        # Recently deleted/edited messages for !snipe, !snipeedit and !snipelist (bounded, expiry at read time)
+        self.deleted_snipes = SnipeCache()
+        self.edited_snipes = SnipeCache()
+        
+        # Per-second counters for messages that skip or reach command parsing
+        self.dispatch_stats = DispatchStats()
+        
+        # Metrics exported on the web server's /metrics endpoint
+        self.command_latency = Histogram(
+            'bot_command_duration_seconds', 'Command execution time by command.', 'command'
+        )
+        self.event_durations = Histogram(
+            'bot_event_handler_duration_seconds', 'Event handler run time by listener.', 'handler'
+        )
+        self.loop_lag = LoopLagMonitor()
+        # Shared user lookups by ID (reminder delivery, ping_user) with TTL, negative caching and request dedupe
+        self.user_resolver = UserResolver(self)
+        self.metric_caches = {
+            'permissions': self.permission_resolver,
+            'time_parser': time_parser,
+            'users': self.user_resolver,
+            'filter_rules': self.filter_engine
+        }
+        self.logging_pipeline = logging_pipeline
+        
+        # Shared outbound HTTP session for the web server and cogs (closed in close())
+        self.http_client = HTTPClient()
+        
+        # Slash command sync is skipped when the command tree hash is unchanged
+        self.force_sync = force_sync
+        self.last_command_sync = {'synced': False, 'duration': 0.0, 'hash': None, 'scope': None}
         
         # Set up intents
         intents = discord.Intents.default()
@@ -46,37 +153,75 @@ class ModerationBot(commands.Bot):
         super().__init__(
             command_prefix=self.config['prefix'],
             intents=intents,
-            help_command=None
+            help_command=None,
+            tree_cls=ModerationTree
         )
         
+        # Graceful shutdown: stop accepting work, drain tracked tasks, flush buffers, close resources
+        self.lifecycle = LifecycleManager(self, db=db)
+        
+        # Write-behind click counters for interactive buttons, flushed in batches and on shutdown
+        self.button_store = ButtonClickStore()
+        self.lifecycle.register_flush('button clicks', self.button_store.flush)
+        
+        # Component clicks are routed by custom_id prefix; button state loads lazily on first click
+        self.component_registry = ComponentRegistry()
+        self.component_registry.register(BUTTON_PREFIX, ButtonClickHandler(self.button_store))
+        
+        # One rate-limit budget per Discord route, shared by every paced sender
+        self.route_pacer = RoutePacer()
+        # Per-channel outbound queue for repeated sends such as /pinguser's numbered pings
+        self.send_queue = ChannelSendQueue(self.route_pacer)
+        self.lifecycle.register_closer('send queue', self.send_queue.close)
+        self.lifecycle.register_closer('raid actions', self.raid_protection.close)
+        
+        # Each process leases a share of reminder partitions; due reminders in them are claimed in
+        # batches and delivered by a bounded, rate-paced worker pool. Off unless "reminder_delivery":
+        # {"enabled": true} is set: it marks rows completed, so it must not run alongside the reminders cog
+        self.reminder_pipeline = bool(self.config.get('reminder_delivery', {}).get('enabled', False))
+        self.reminder_leases = LeaseManager(db, on_change=lambda owned: self.reminder_scheduler.invalidate())
+        self.reminder_delivery = ReminderDelivery(self, db, leases=self.reminder_leases, route_pacer=self.route_pacer)
+        self.reminder_scheduler = ReminderScheduler(
+            lambda until, limit: fetch_upcoming(db, until, limit, self.reminder_leases),
+            self._deliver_due_reminders
+        )
+        # Inserts and reschedules reach the scheduler through LISTEN/NOTIFY instead of polling
+        self.reminder_listener = ReminderListener(db, self.reminder_scheduler, leases=self.reminder_leases)
+        if self.reminder_pipeline:
+            # Workers stop and unsent claims are handed back before failures are written
+            self.lifecycle.register_flush('reminder claims', self.reminder_delivery.release_unsent)
+            self.lifecycle.register_flush('reminder failures', self.reminder_delivery.flush_failures)
+            self.lifecycle.register_closer('reminder listener', self.reminder_listener.close)
+            self.lifecycle.register_closer('reminder leases', self.reminder_leases.release)
+        
         # Enable slash command error handling
         self.tree.on_error = self.on_app_command_error
         
         # Web server will be managed by run.py for deployment
         
-    def load_config(self):
-        """Load configuration from config.json file."""
-        try:
-            with open('config.json', 'r') as f:
-                config = json.load(f)
-            logger.info("Configuration loaded successfully")
-            return config
-        except FileNotFoundError:
-            logger.error("config.json not found. Using default configuration.")
-            return {
-                "prefix": "!",
-                "log_channel": None,
-                "mute_role": "Muted",
-                "max_warnings": 3,
-                "auto_mod": {
-                    "enabled": False,
-                    "spam_threshold": 5,
-                    "spam_interval": 10
-                }
-            }
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing config.json: {e}")
-            return {}
+    @property
+    def config(self):
+        """
+        Read-only view of the current global configuration (replaced atomically on reload).
+        Changes go through config.json; writes here would be lost on the next reload, so they raise.
+        """
+        return types.MappingProxyType(self.config_store.data)
+    
+    def build_prefix_index(self):
+        """Precompute the default and per-guild prefix tuples used by the message fast path."""
+        default_prefix = self.config_store.guild(None).prefix
+        guild_prefixes = {
+            guild_id: (guild_config.prefix,)
+            for guild_id, guild_config in self.config_store.guild_overrides().items()
+            if guild_config.prefix != default_prefix
+        }
+        self.default_prefixes, self.guild_prefixes = (default_prefix,), guild_prefixes
+    
+    async def get_prefix(self, message):
+        """Return the prefixes valid for a message, honouring per-guild overrides."""
+        if message.guild is None:
+            return list(self.default_prefixes)
+        return list(self.guild_prefixes.get(message.guild.id, self.default_prefixes))
     
     async def setup_hook(self):
         """Load all cogs and initialize database when bot starts up."""
@@ -88,41 +233,62 @@ class ModerationBot(commands.Bot):
             logger.error(f"Database initialization failed: {e}")
             # Continue without database for now, some features may not work
         
-        cogs = [
-            'cogs.accessibility',
-            'cogs.help',
-            'cogs.moderation',
-            'cogs.logging',
-            'cogs.utility',
-            'cogs.emoji',
-            'cogs.interactive',
-            'cogs.reaction_roles',
-            'cogs.snipe',
-            'cogs.afk',
-            'cogs.auto_role',
-            'cogs.starboard',
-            'cogs.bot_status',
-            'cogs.rss_feeds',
-            'cogs.welcome_images',
-            'cogs.welcome_animations',
-            'cogs.automod',
-            'cogs.reminders',
-            'cogs.user_app',
-            'cogs.ping_user'
-        ]
-        
-        for cog in cogs:
+        self._config_watch_task = self.loop.create_task(self.config_store.watch())
+        self._loop_lag_task = self.loop.create_task(self.loop_lag.run())
+        self._button_flush_task = self.loop.create_task(self.button_store.run())
+        self._button_gc_task = self.loop.create_task(run_button_gc(self.button_store))
+        self._spam_sweep_task = self.loop.create_task(self.spam_detector.run())
+        if self.reminder_pipeline and db.pool is not None:
             try:
-                await self.load_extension(cog)
-                logger.info(f"Loaded cog: {cog}")
+                await self.reminder_delivery.ensure_schema()
+                await self.reminder_leases.ensure_schema()
+                await self.reminder_listener.ensure_schema()
             except Exception as e:
-                logger.error(f"Failed to load cog {cog}: {e}")
+                # Never claim against a schema that may not match
+                logger.error(f"Reminder delivery schema update failed, pipeline not started: {e}")
+            else:
+                self._lease_task = self.reminder_leases.start()
+                self._reminder_listen_task = self.reminder_listener.start()
+                self._reminder_task = self.loop.create_task(self.reminder_scheduler.run())
+        
+        # Independent cogs load concurrently; lazy ones wait until the gateway is ready
+        self.cog_loader = CogLoader(self, COG_SPECS)
+        loaded, total, elapsed = await self.cog_loader.load_eager()
+        logger.info(f"Loaded {loaded}/{total} startup cogs in {elapsed * 1000:.1f}ms")
+        
+        self._startup_task = self.loop.create_task(self._finish_startup())
+        
+        # Web server management delegated to run.py for proper deployment handling
+        logger.info("Startup cogs loaded. Web server will be managed by run.py.")
+    
+    async def _finish_startup(self):
+        """Load deferred cogs once connected, report startup timings and sync slash commands."""
+        await self.wait_until_ready()
+        
+        loaded, total, elapsed = await self.cog_loader.load_lazy()
+        logger.info(f"Loaded {loaded}/{total} deferred cogs in {elapsed * 1000:.1f}ms")
+        logger.info("Cog load timings:\n%s", self.cog_loader.timing_report())
+        
+        await self.sync_commands()
+    
+    async def sync_commands(self):
+        """Sync slash commands to Discord when the command tree changed since the last sync."""
+        state = load_sync_state()
+        global_key = f"{self.application_id}:global"
+        tree_hash = command_tree_hash(self.tree)
+        
+        if not self.force_sync and state.get(global_key) == tree_hash:
+            self.last_command_sync = {'synced': False, 'duration': 0.0, 'hash': tree_hash, 'scope': 'global'}
+            logger.info(f"Slash commands unchanged (hash {tree_hash[:12]}), skipping sync")
+            return
         
-        # Sync slash commands to Discord
+        start = time.perf_counter()
         try:
             # Sync globally - let Discord handle duplicates naturally
             synced = await self.tree.sync()
-            logger.info(f"Synced {len(synced)} slash commands globally to Discord")
+            duration = time.perf_counter() - start
+            self.last_command_sync = {'synced': True, 'duration': duration, 'hash': tree_hash, 'scope': 'global'}
+            logger.info(f"Synced {len(synced)} slash commands globally to Discord in {duration:.2f}s")
                     
         except Exception as e:
             logger.error(f"Failed to sync slash commands: {e}")
@@ -130,13 +296,20 @@ class ModerationBot(commands.Bot):
             for guild in self.guilds:
                 try:
                     guild_synced = await self.tree.sync(guild=guild)
+                    duration = time.perf_counter() - start
+                    self.last_command_sync = {'synced': True, 'duration': duration, 'hash': None, 'scope': str(guild.id)}
                     logger.info(f"Fallback: Synced {len(guild_synced)} commands to guild {guild.name}")
                     break  # Only sync to one guild as fallback
                 except Exception as fallback_e:
                     logger.error(f"Fallback sync failed for guild {guild.name}: {fallback_e}")
+            return
         
-        # Web server management delegated to run.py for proper deployment handling
-        logger.info("All cogs loaded successfully. Web server will be managed by run.py.")
+        # Recording the hash is best-effort: a failed write only means the next startup syncs again
+        state[global_key] = tree_hash
+        try:
+            save_sync_state(state)
+        except Exception as e:
+            logger.warning(f"Could not save slash command sync state: {e}")
     
     async def on_ready(self):
         """Event triggered when bot is ready and connected."""
@@ -152,34 +325,87 @@ class ModerationBot(commands.Bot):
     
     async def on_message(self, message):
         """Process messages and commands, including DMs."""
-        # Debug: Log all message reception
-        logger.info(f"Message received from {message.author} in {'DM' if message.guild is None else message.guild.name}: {message.content[:50]}...")
-        
-        # Ignore bot messages
-        if message.author.bot:
-            logger.debug(f"Ignoring bot message from {message.author}")
+        # Ignore bot messages, and all new commands once shutdown has begun
+        if message.author.bot or not self.lifecycle.accepting:
             return
         
-        # Log command attempts
-        if message.content.startswith('!'):
-            logger.info(f"Command detected: {message.content}")
-            
-        # Log DM messages for debugging
+        # Fast path: ordinary chat can never match a command, so skip parsing entirely
         if message.guild is None:
-            logger.info(f"DM received from {message.author}: {message.content}")
-            # Additional debug info for DMs
-            if message.content.startswith('!'):
-                logger.info(f"DM command detected, processing: {message.content}")
+            prefixes = self.default_prefixes
+        else:
+            prefixes = self.guild_prefixes.get(message.guild.id, self.default_prefixes)
+        
+        if not message.content.startswith(prefixes):
+            self.dispatch_stats.fast_pathed.record()
+            return
+        
+        self.dispatch_stats.parsed.record()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Command candidate from %s: %s", message.author, message.content, extra={
+                'category': 'message',
+                'guild_id': message.guild.id if message.guild else None,
+                'channel_id': message.channel.id,
+                'user_id': message.author.id
+            })
         
         # Process commands
         try:
-            logger.info(f"About to process command: {message.content}")
             await self.process_commands(message)
-            logger.info(f"Finished processing command: {message.content}")
         except Exception as e:
-            logger.error(f"Error processing command {message.content}: {e}")
+            logger.error("Error processing command %s: %s", message.content, e)
             raise
     
+    async def on_message_delete(self, message):
+        """Remember deleted guild messages for the snipe commands."""
+        if message.guild is not None and not message.author.bot:
+            self.deleted_snipes.record(message.channel.id, SnipeEntry.from_message(message))
+    
+    async def on_message_edit(self, before, after):
+        """Remember the previous content of edited guild messages for !snipeedit."""
+        if before.guild is not None and not before.author.bot and before.content != after.content:
+            self.edited_snipes.record(before.channel.id, SnipeEntry.from_message(before, after))
+    
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        """Time every event handler (bot and cog listeners) for the event duration histogram."""
+        start = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.event_durations.observe(getattr(coro, '__qualname__', event_name), time.perf_counter() - start)
+    
+    async def on_command(self, ctx):
+        """Record when a prefix command starts running."""
+        ctx.started_at = time.perf_counter()
+    
+    async def on_command_completion(self, ctx):
+        """Record prefix command latency."""
+        self._observe_command(ctx)
+    
+    async def on_app_command_completion(self, interaction, command):
+        """Record slash command latency, measured from interaction creation."""
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        self.command_latency.observe(f"/{command.qualified_name}", elapsed)
+    
+    def _observe_command(self, ctx):
+        started_at = getattr(ctx, 'started_at', None)
+        if started_at is not None and ctx.command is not None:
+            self.command_latency.observe(ctx.command.qualified_name, time.perf_counter() - started_at)
+    
+    async def close(self):
+        """Close the shared HTTP session along with the Discord connection."""
+        await self.http_client.close()
+        await super().close()
+    
+    async def _deliver_due_reminders(self, reminder_ids):
+        """Deliver due reminders; tracked so a graceful shutdown lets an in-progress batch finish."""
+        if self.lifecycle.accepting:
+            await self.lifecycle.track(self.reminder_delivery.deliver_due(reminder_ids), 'reminder delivery')
+    
+    async def on_interaction(self, interaction):
+        """Route persistent component interactions (e.g. interactive buttons) to their handlers."""
+        if self.lifecycle.accepting:
+            await self.component_registry.dispatch(interaction)
+    
     async def on_disconnect(self):
         """Event triggered when bot disconnects."""
         logger.warning("Bot has disconnected from Discord")
@@ -190,6 +416,8 @@ class ModerationBot(commands.Bot):
     
     async def on_command_error(self, ctx, error):
         """Global error handler for commands."""
+        self._observe_command(ctx)
+        
         if isinstance(error, commands.CommandNotFound):
             return  # Ignore command not found errors
         
@@ -221,7 +449,12 @@ class ModerationBot(commands.Bot):
         
         else:
             # Log all errors but only respond if user has permissions
-            logger.error(f"Unhandled error in command {ctx.command}: {error}")
+            logger.error(f"Unhandled error in command {ctx.command}: {error}", extra={
+                'guild_id': ctx.guild.id if ctx.guild else None,
+                'channel_id': ctx.channel.id,
+                'user_id': ctx.author.id,
+                'command': ctx.command.qualified_name if ctx.command else None
+            })
             if await self._user_has_basic_permissions(ctx):
                 await ctx.send("❌ An unexpected error occurred. Please try again later.")
     
@@ -233,48 +466,62 @@ class ModerationBot(commands.Bot):
         if ctx.guild is None:
             return True
         
-        # Server owner and bot owner always have permissions
-        if ctx.author == ctx.guild.owner or await self.is_owner(ctx.author):
-            return True
-        
-        # Define safe commands that anyone can use
-        safe_commands = [
-            'help', 'ping', 'serverinfo', 'si', 'userinfo', 'ui', 'avatar', 
-            'botinfo', 'invite', 'afk', 'unafk', 'afklist', 'snipe', 'editsnipe', 
-            'snipelist', 'emojiinfo', 'listemojis', 'button', 'buttonstats',
-            'purge'
-        ]
-        
         # Allow everyone to use safe commands
-        if ctx.command and ctx.command.name in safe_commands:
+        if ctx.command and ctx.command.name in SAFE_COMMANDS:
             return True
         
-        # For moderation/administrative commands, check permissions
-        if (ctx.author.guild_permissions.administrator or
-            ctx.author.guild_permissions.kick_members or
-            ctx.author.guild_permissions.ban_members or
-            ctx.author.guild_permissions.manage_messages or
-            ctx.author.guild_permissions.moderate_members or
-            ctx.author.guild_permissions.manage_guild or
-            ctx.author.guild_permissions.manage_roles):
+        # Server owner, moderation permissions or configured moderator/admin roles
+        if self.permission_resolver.is_moderator(ctx.author):
             return True
         
-        # Check role-based permissions from config
-        mod_roles = self.config.get('permissions', {}).get('moderator_roles', [])
-        admin_roles = self.config.get('permissions', {}).get('admin_roles', [])
-        
-        user_roles = [role.name for role in ctx.author.roles]
-        
-        return any(role in user_roles for role in mod_roles + admin_roles)
+        # Bot owner always has permissions (is_owner caches the owner after the first lookup)
+        return await self.is_owner(ctx.author)
+    
+    async def on_guild_role_create(self, role):
+        """Invalidate cached permission decisions when roles change."""
+        self.permission_resolver.invalidate_guild(role.guild.id)
+    
+    async def on_guild_role_delete(self, role):
+        """Invalidate cached permission decisions when roles change."""
+        self.permission_resolver.invalidate_guild(role.guild.id)
+    
+    async def on_guild_role_update(self, before, after):
+        """Invalidate cached permission decisions when roles change."""
+        if before.name != after.name or before.permissions != after.permissions:
+            self.permission_resolver.invalidate_guild(after.guild.id)
+    
+    async def on_guild_update(self, before, after):
+        """Invalidate cached permission decisions when guild ownership changes."""
+        if before.owner_id != after.owner_id:
+            self.permission_resolver.invalidate_guild(after.id)
+    
+    async def on_member_update(self, before, after):
+        """Invalidate a member's cached permission decision when their roles change."""
+        if before.roles != after.roles:
+            self.permission_resolver.invalidate_member(after.guild.id, after.id)
+    
+    async def on_member_remove(self, member):
+        """Drop a departed member's cached permission decision."""
+        self.permission_resolver.invalidate_member(member.guild.id, member.id)
     
     async def on_app_command_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
         """Handle slash command errors."""
-        logger.error(f"Slash command error in {interaction.command}: {error}")
+        logger.error(f"Slash command error in {interaction.command}: {error}", extra={
+            'guild_id': interaction.guild_id,
+            'channel_id': interaction.channel_id,
+            'user_id': interaction.user.id,
+            'command': interaction.command.qualified_name if interaction.command else None
+        })
         logger.error(f"Error type: {type(error)}")
         logger.error(f"User: {interaction.user}, Guild: {interaction.guild}")
         
         try:
-            if isinstance(error, discord.app_commands.CommandOnCooldown):
+            if isinstance(error, discord.app_commands.CheckFailure) and not self.lifecycle.accepting:
+                await interaction.response.send_message(
+                    "⏳ The bot is restarting. Please try again in a moment.",
+                    ephemeral=True
+                )
+            elif isinstance(error, discord.app_commands.CommandOnCooldown):
                 await interaction.response.send_message(
                     f"❌ Command is on cooldown. Try again in {error.retry_after:.2f} seconds.",
                     ephemeral=True
@@ -303,14 +550,15 @@ async def main():
         logger.error("DISCORD_TOKEN environment variable not found!")
         return
     
-    # Create bot instance
-    bot = ModerationBot()
+    # Create bot instance (--force-sync re-syncs slash commands even if unchanged)
+    bot = ModerationBot(force_sync='--force-sync' in sys.argv)
+    bot.lifecycle.install_signal_handlers()
     
     # Connection retry logic
     max_retries = 5
     retry_count = 0
     
-    while retry_count < max_retries:
+    while retry_count < max_retries and bot.lifecycle.accepting:
         try:
             logger.info(f"Starting bot (attempt {retry_count + 1}/{max_retries})")
             await bot.start(token)
@@ -346,9 +594,8 @@ async def main():
                 logger.error("Max retries reached, giving up")
                 break
     
-    # Cleanup
-    if not bot.is_closed():
-        await bot.close()
+    # Cleanup: drain in-flight work, flush buffers and close everything in order
+    await bot.lifecycle.shutdown("bot stopped")
 
 if __name__ == "__main__":
     # Create logs directory if it doesn't exist
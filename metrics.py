@@ -0,0 +1,273 @@
+"""
+Lightweight in-process metrics for the bot.
+Counters here are cheap enough to update on every gateway event.
+"""
+
+import asyncio
+import time
+
+import psutil
+
+_process = psutil.Process()
+
+
+class RateCounter:
+    """Per-second event counter over a rolling window of one-second buckets."""
+
+    __slots__ = ('window', '_counts', '_seconds', 'total')
+
+    def __init__(self, window=60):
+        self.window = window
+        self._counts = [0] * window
+        self._seconds = [0] * window
+        self.total = 0
+
+    def record(self, amount=1):
+        """Count an event in the current second."""
+        now = int(time.monotonic())
+        slot = now % self.window
+        if self._seconds[slot] != now:
+            self._seconds[slot] = now
+            self._counts[slot] = 0
+        self._counts[slot] += amount
+        self.total += amount
+
+    def per_second(self, span=None):
+        """Average events per second over the last `span` seconds (defaults to the full window)."""
+        span = min(span or self.window, self.window)
+        cutoff = int(time.monotonic()) - span
+        count = 0
+        for second, value in zip(self._seconds, self._counts):
+            if second > cutoff:
+                count += value
+        return count / span
+
+
+class DispatchStats:
+    """Message dispatch counters split by whether command parsing was skipped."""
+
+    def __init__(self, window=60):
+        self.fast_pathed = RateCounter(window)
+        self.parsed = RateCounter(window)
+
+    def snapshot(self, span=10):
+        """Return current rates and lifetime totals."""
+        return {
+            'fast_pathed_per_second': self.fast_pathed.per_second(span),
+            'parsed_per_second': self.parsed.per_second(span),
+            'fast_pathed_total': self.fast_pathed.total,
+            'parsed_total': self.parsed.total
+        }
+
+
+# Default latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram keyed by a single label value."""
+
+    def __init__(self, name, help_text, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, label_value, seconds):
+        """Record one observation for a label value."""
+        series = self._series.get(label_value)
+        if series is None:
+            # [per-bucket counts..., +Inf count, sum]
+            series = self._series[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                series[index] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += seconds
+
+    def render(self):
+        """Return Prometheus text exposition lines for this histogram."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, series in sorted(self._series.items()):
+            label = f'{self.label}="{escape_label(label_value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag as the overshoot of a fixed-interval sleep."""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+
+
+def escape_label(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _metric(lines, name, help_text, value, metric_type='gauge', labels=None):
+    """Append one metric family; `labels` is a list of (label_dict, value) pairs."""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    if labels:
+        for label_set, label_value in labels:
+            rendered = ','.join(f'{key}="{escape_label(val)}"' for key, val in label_set.items())
+            lines.append(f"{name}{{{rendered}}} {label_value}")
+    else:
+        lines.append(f"{name} {value}")
+
+
+def render_prometheus(bot, db=None):
+    """Render all bot metrics in Prometheus text exposition format."""
+    lines = []
+
+    latency = getattr(bot, 'latency', None)
+    if latency is not None and latency == latency and latency != float('inf'):
+        _metric(lines, 'bot_gateway_latency_seconds', 'Discord gateway heartbeat latency.', latency)
+    _metric(lines, 'bot_guilds', 'Number of guilds the bot is in.', len(getattr(bot, 'guilds', []) or []))
+
+    dispatch = getattr(bot, 'dispatch_stats', None)
+    if dispatch is not None:
+        _metric(lines, 'bot_messages_total', 'Messages seen by on_message, by dispatch path.', None, 'counter', [
+            ({'path': 'fast'}, dispatch.fast_pathed.total),
+            ({'path': 'parsed'}, dispatch.parsed.total)
+        ])
+        _metric(lines, 'bot_messages_per_second', 'Messages per second over the last 10s, by dispatch path.', None,
+               labels=[({'path': 'fast'}, dispatch.fast_pathed.per_second(10)),
+                       ({'path': 'parsed'}, dispatch.parsed.per_second(10))])
+
+    for attr in ('command_latency', 'event_durations'):
+        histogram = getattr(bot, attr, None)
+        if histogram is not None:
+            lines.extend(histogram.render())
+
+    http_client = getattr(bot, 'http_client', None)
+    if http_client is not None:
+        lines.extend(http_client.latency.render())
+
+    lag_monitor = getattr(bot, 'loop_lag', None)
+    if lag_monitor is not None:
+        _metric(lines, 'bot_event_loop_lag_seconds', 'Most recent event loop lag.', lag_monitor.last_lag)
+        _metric(lines, 'bot_event_loop_lag_max_seconds', 'Maximum event loop lag since start.', lag_monitor.max_lag)
+
+    pool = getattr(db, 'pool', None)
+    if pool is not None:
+        try:
+            size, idle, max_size = pool.get_size(), pool.get_idle_size(), pool.get_max_size()
+        except Exception:
+            size = None
+        if size is not None:
+            _metric(lines, 'bot_db_pool_connections', 'Database pool connections by state.', None, labels=[
+                ({'state': 'in_use'}, size - idle),
+                ({'state': 'idle'}, idle),
+                ({'state': 'max'}, max_size)
+            ])
+
+    cache_labels = []
+    for cache_name, source in getattr(bot, 'metric_caches', {}).items():
+        stats = source.stats()
+        lookups = stats['hits'] + stats['misses']
+        cache_labels.append(({'cache': cache_name}, stats['hits'] / lookups if lookups else 0.0))
+    if cache_labels:
+        _metric(lines, 'bot_cache_hit_ratio', 'Cache hit ratio by cache.', None, labels=cache_labels)
+
+    delivery = getattr(bot, 'reminder_delivery', None)
+    if delivery is not None:
+        _metric(lines, 'bot_reminders_delivered_total', 'Reminders delivered, by outcome.', None, 'counter', [
+            ({'outcome': 'delivered'}, delivery.delivered.total),
+            ({'outcome': 'failed'}, delivery.failed.total)
+        ])
+        _metric(lines, 'bot_reminders_delivered_per_second', 'Reminder deliveries per second over the last 60s.',
+               delivery.delivered.per_second(60))
+        _metric(lines, 'bot_reminders_claimed_total', 'Reminders claimed from the database.',
+               delivery.claimed_total, 'counter')
+        _metric(lines, 'bot_reminder_delivery_backlog', 'Claimed reminders waiting for a delivery worker.',
+               delivery.backlog)
+        lines.extend(delivery.lag.render())
+
+    leases = getattr(bot, 'reminder_leases', None)
+    if leases is not None:
+        _metric(lines, 'bot_reminder_partitions_owned', 'Reminder partitions leased to this process.', len(leases.owned))
+        _metric(lines, 'bot_reminder_lease_members', 'Live bot processes sharing reminder partitions.',
+               leases.live_members)
+
+    send_queue = getattr(bot, 'send_queue', None)
+    if send_queue is not None:
+        _metric(lines, 'bot_send_queue_depth', 'Messages waiting in per-channel send queues.', send_queue.depth)
+        _metric(lines, 'bot_send_queue_channels', 'Channels with queued outbound messages.', send_queue.busy_channels)
+        _metric(lines, 'bot_send_queue_messages_total', 'Queued messages by outcome.', None, 'counter', [
+            ({'outcome': 'sent'}, send_queue.sent.total),
+            ({'outcome': 'dropped'}, send_queue.dropped)
+        ])
+        _metric(lines, 'bot_send_pacing_wait_seconds_total', 'Time senders spent waiting on route rate limits.',
+               send_queue.pacer.waited, 'counter')
+
+    spam = getattr(bot, 'spam_detector', None)
+    if spam is not None:
+        _metric(lines, 'bot_spam_tracked_users', 'Guild members currently tracked by the spam detector.', spam.tracked)
+        _metric(lines, 'bot_spam_flagged_total', 'Messages flagged as spam, by reason.', None, 'counter',
+               [({'reason': reason}, count) for reason, count in spam.flagged.items()])
+
+    filter_engine = getattr(bot, 'filter_engine', None)
+    if filter_engine is not None:
+        rule_labels = [
+            ({'guild': guild_id, 'rule': rule_id}, hits)
+            for guild_id, rules in filter_engine.rule_hits().items()
+            for rule_id, hits in rules.items()
+        ]
+        if rule_labels:
+            _metric(lines, 'bot_filter_rule_hits_total', 'Automod filter rule matches since the rules were compiled.',
+                   None, 'counter', rule_labels)
+
+    raid = getattr(bot, 'raid_protection', None)
+    if raid is not None:
+        _metric(lines, 'bot_raids_detected_total', 'Join bursts that triggered a lockdown.', raid.raids, 'counter')
+        _metric(lines, 'bot_raid_members_actioned_total', 'Members timed out or kicked by raid protection.',
+               raid.actioned, 'counter')
+        _metric(lines, 'bot_raid_actions_pending', 'Raid timeouts/kicks waiting in the queue.', raid.pending_actions)
+        _metric(lines, 'bot_raid_locked_guilds', 'Guilds currently under a raid lockdown.', len(raid.locked))
+        lines.extend(raid.timings.render())
+
+    snipe_labels = []
+    for kind in ('deleted', 'edited'):
+        cache = getattr(bot, f'{kind}_snipes', None)
+        if cache is not None:
+            snipe_labels.append(({'kind': kind}, len(cache)))
+    if snipe_labels:
+        _metric(lines, 'bot_snipe_cache_entries', 'Messages held in the snipe cache, by kind.', None,
+               labels=snipe_labels)
+
+    sync = getattr(bot, 'last_command_sync', None)
+    if sync is not None:
+        _metric(lines, 'bot_command_sync_performed', 'Whether the last startup synced slash commands.', int(sync['synced']))
+        _metric(lines, 'bot_command_sync_duration_seconds', 'Duration of the last slash command sync.', sync['duration'])
+
+    pipeline = getattr(bot, 'logging_pipeline', None)
+    if pipeline is not None:
+        _metric(lines, 'bot_log_records_dropped_total', 'Log records dropped because the queue was full.',
+               pipeline.dropped, 'counter')
+
+    _metric(lines, 'process_resident_memory_bytes', 'Resident memory size in bytes.', _process.memory_info().rss)
+
+    return "\n".join(lines) + "\n"
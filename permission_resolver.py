@@ -0,0 +1,118 @@
+"""
+Cached permission resolution for members.
+Role names from config['permissions'] are resolved to role IDs once per guild,
+and per-member decisions are memoized until a role or member update invalidates them.
+"""
+
+from collections import OrderedDict
+
+import discord
+
+# Commands anyone may use, regardless of roles or permissions
+SAFE_COMMANDS = frozenset({
+    'help', 'ping', 'serverinfo', 'si', 'userinfo', 'ui', 'avatar',
+    'botinfo', 'invite', 'afk', 'unafk', 'afklist', 'snipe', 'editsnipe',
+    'snipelist', 'emojiinfo', 'listemojis', 'button', 'buttonstats',
+    'purge'
+})
+
+# Any one of these guild permissions grants moderator-level access
+MODERATOR_PERMISSIONS = discord.Permissions(
+    administrator=True,
+    kick_members=True,
+    ban_members=True,
+    manage_messages=True,
+    moderate_members=True,
+    manage_guild=True,
+    manage_roles=True
+).value
+
+ADMINISTRATOR_PERMISSION = discord.Permissions(administrator=True).value
+
+# Decision levels stored in the memo
+LEVEL_NONE = 0
+LEVEL_MODERATOR = 1
+LEVEL_ADMIN = 2
+
+
+class PermissionResolver:
+    """Resolve moderator/admin access for guild members with per-guild role indexes and a bounded memo."""
+
+    def __init__(self, permissions_config=None, max_entries=50000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._decisions = OrderedDict()
+        self._guild_roles = {}
+        self._guild_versions = {}
+        self.rebuild(permissions_config or {})
+
+    def rebuild(self, permissions_config):
+        """Reload configured role names and drop every cached decision."""
+        self.moderator_role_names = frozenset(permissions_config.get('moderator_roles', []))
+        self.admin_role_names = frozenset(permissions_config.get('admin_roles', []))
+        self._guild_roles.clear()
+        self._decisions.clear()
+
+    def _role_index(self, guild):
+        """Return (moderator_role_ids, admin_role_ids) for a guild, resolving names once."""
+        index = self._guild_roles.get(guild.id)
+        if index is None:
+            moderator_ids = frozenset(role.id for role in guild.roles if role.name in self.moderator_role_names)
+            admin_ids = frozenset(role.id for role in guild.roles if role.name in self.admin_role_names)
+            index = self._guild_roles[guild.id] = (moderator_ids, admin_ids)
+        return index
+
+    def _compute_level(self, member):
+        guild = member.guild
+        if member.id == guild.owner_id:
+            return LEVEL_ADMIN
+
+        permissions = member.guild_permissions.value
+        moderator_ids, admin_ids = self._role_index(guild)
+        role_ids = {role.id for role in member.roles}
+
+        if permissions & ADMINISTRATOR_PERMISSION or not admin_ids.isdisjoint(role_ids):
+            return LEVEL_ADMIN
+        if permissions & MODERATOR_PERMISSIONS or not moderator_ids.isdisjoint(role_ids):
+            return LEVEL_MODERATOR
+        return LEVEL_NONE
+
+    def level(self, member):
+        """Return the memoized access level for a guild member."""
+        key = (member.guild.id, member.id)
+        version = self._guild_versions.get(member.guild.id, 0)
+        entry = self._decisions.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            self._decisions.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        level = self._compute_level(member)
+        self._decisions[key] = (version, level)
+        self._decisions.move_to_end(key)
+        if len(self._decisions) > self.max_entries:
+            self._decisions.popitem(last=False)
+        return level
+
+    def is_moderator(self, member):
+        """True if the member has moderator or admin access."""
+        return self.level(member) >= LEVEL_MODERATOR
+
+    def is_admin(self, member):
+        """True if the member has admin access."""
+        return self.level(member) >= LEVEL_ADMIN
+
+    def invalidate_guild(self, guild_id):
+        """Forget role indexes and decisions for a guild after a role or ownership change."""
+        self._guild_roles.pop(guild_id, None)
+        self._guild_versions[guild_id] = self._guild_versions.get(guild_id, 0) + 1
+
+    def invalidate_member(self, guild_id, member_id):
+        """Forget the cached decision for one member."""
+        self._decisions.pop((guild_id, member_id), None)
+
+    def stats(self):
+        """Return cache counters for monitoring."""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._decisions)}
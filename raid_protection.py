@@ -0,0 +1,219 @@
+"""
+Raid protection.
+Joins are tracked in a per-guild sliding window and weighted by account age,
+read straight from the member's snowflake. When a burst trips the detector the
+guild gets one coordinated lockdown (channel overwrites applied concurrently
+under a rate budget) and the young accounts from the burst are queued for a
+bulk timeout or kick. Lockdowns stay in place until a moderator unlocks.
+
+Settings live in the auto_mod config section:
+    "raid_protection": {"enabled": true, "join_threshold": 10, "join_window": 10,
+                        "action": "timeout", "timeout_minutes": 60}
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+
+import discord
+
+from metrics import Histogram
+from rate_limits import RoutePacer
+
+logger = logging.getLogger(__name__)
+
+DISCORD_EPOCH_MS = 1420070400000
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "join_threshold": 10,
+    "join_window": 10,
+    "action": "timeout",
+    "timeout_minutes": 60
+}
+# (maximum account age in seconds, suspicion score); older accounts score 0
+AGE_SCORES = ((3600, 1.0), (86400, 0.8), (7 * 86400, 0.5), (30 * 86400, 0.2))
+# Accounts at or above this score are actioned after a raid
+FLAG_SCORE = 0.5
+# Channel permission edits in flight at once during a lockdown
+LOCKDOWN_CONCURRENCY = 5
+LOCKDOWN_RATE = 5.0
+LOCKDOWN_BURST = 10
+# Seconds buckets for detection and lockdown timings
+LOCKDOWN_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def snowflake_time(snowflake):
+    """Creation time of a Discord snowflake, in epoch seconds."""
+    return ((snowflake >> 22) + DISCORD_EPOCH_MS) / 1000
+
+
+def account_age_score(user_id, now=None):
+    """Suspicion score in [0, 1] from account age alone: brand-new accounts score highest."""
+    age = (time.time() if now is None else now) - snowflake_time(user_id)
+    for max_age, score in AGE_SCORES:
+        if age < max_age:
+            return score
+    return 0.0
+
+
+class JoinBurstDetector:
+    """Per-guild sliding window of recent joins with their account-age scores."""
+
+    def __init__(self):
+        # guild_id -> deque of (join time, user_id, score)
+        self._windows = {}
+
+    def record(self, guild_id, user_id, settings, now=None):
+        """
+        Record a join. Returns the window's joins when it reaches the threshold
+        (the window is then reset so one burst trips once), otherwise None.
+        """
+        now = time.time() if now is None else now
+        window = self._windows.setdefault(guild_id, deque())
+        window.append((now, user_id, account_age_score(user_id, now)))
+        cutoff = now - settings["join_window"]
+        while window and window[0][0] < cutoff:
+            window.popleft()
+        if len(window) < settings["join_threshold"]:
+            return None
+        burst = list(window)
+        window.clear()
+        return burst
+
+
+class RaidProtection:
+    """Detects join bursts and runs one coordinated lockdown and member action queue per raid."""
+
+    def __init__(self, bot, config_store):
+        self.bot = bot
+        self.config_store = config_store
+        self.detector = JoinBurstDetector()
+        self.pacer = RoutePacer(rate=LOCKDOWN_RATE, burst=LOCKDOWN_BURST)
+        self.timings = Histogram('bot_raid_response_seconds',
+                                 'Raid response time: first burst join to detection, and detection to lockdown.',
+                                 'stage', LOCKDOWN_BUCKETS)
+        self.raids = 0
+        self.actioned = 0
+        # guild_id -> {channel_id: previous send_messages value}, kept until unlock
+        self.locked = {}
+        self._lockdowns = {}
+        self._actions = asyncio.Queue()
+        self._queued = set()
+        self._worker = None
+
+    def settings(self, guild_id):
+        return {**DEFAULT_SETTINGS, **self.config_store.guild(guild_id).auto_mod.get('raid_protection', {})}
+
+    async def on_member_join(self, member):
+        settings = self.settings(member.guild.id)
+        if not settings["enabled"]:
+            return
+        burst = self.detector.record(member.guild.id, member.id, settings)
+        if burst is None:
+            # While a guild is locked down, young accounts that keep arriving are actioned directly
+            if member.guild.id in self.locked and account_age_score(member.id) >= FLAG_SCORE:
+                self.queue_actions(member.guild, [member.id], settings)
+            return
+
+        detected_at = time.time()
+        self.raids += 1
+        self.timings.observe('detect', detected_at - burst[0][0])
+        flagged = [user_id for _, user_id, score in burst if score >= FLAG_SCORE]
+        logger.warning(
+            f"Raid detected in {member.guild.name} ({member.guild.id}): {len(burst)} joins in "
+            f"{detected_at - burst[0][0]:.1f}s, {len(flagged)} young accounts"
+        )
+        self.queue_actions(member.guild, flagged, settings)
+        await self.lockdown(member.guild, detected_at)
+
+    def lockdown(self, guild, started_at=None):
+        """Lock every text channel; concurrent triggers for the same guild share one lockdown task."""
+        task = self._lockdowns.get(guild.id)
+        if task is None:
+            task = self._lockdowns[guild.id] = asyncio.ensure_future(self._lockdown(guild, started_at or time.time()))
+            task.add_done_callback(lambda _: self._lockdowns.pop(guild.id, None))
+        return asyncio.shield(task)
+
+    async def _set_send(self, semaphore, channel, role, allow, reason):
+        async with semaphore:
+            await self.pacer.acquire(('overwrites', channel.guild.id))
+            overwrite = channel.overwrites_for(role)
+            overwrite.send_messages = allow
+            await channel.set_permissions(role, overwrite=overwrite, reason=reason)
+
+    async def _lockdown(self, guild, started_at):
+        role = guild.default_role
+        state = self.locked.setdefault(guild.id, {})
+        channels = [
+            channel for channel in guild.text_channels
+            if channel.id not in state and channel.overwrites_for(role).send_messages is not False
+        ]
+        for channel in channels:
+            state[channel.id] = channel.overwrites_for(role).send_messages
+        semaphore = asyncio.Semaphore(LOCKDOWN_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self._set_send(semaphore, channel, role, False, "Raid protection lockdown") for channel in channels),
+            return_exceptions=True
+        )
+        failed = 0
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                failed += 1
+                state.pop(channel.id, None)
+                logger.error(f"Lockdown of #{channel.name} in {guild.id} failed: {result}")
+        elapsed = time.time() - started_at
+        self.timings.observe('lockdown', elapsed)
+        logger.warning(f"Locked {len(channels) - failed}/{len(channels)} channels in {guild.id} in {elapsed:.2f}s")
+
+    async def unlock(self, guild):
+        """Restore the send_messages overwrites saved by the lockdown. Returns the number of channels unlocked."""
+        state = self.locked.pop(guild.id, {})
+        role = guild.default_role
+        channels = [(guild.get_channel(channel_id), previous) for channel_id, previous in state.items()]
+        channels = [(channel, previous) for channel, previous in channels if channel is not None]
+        semaphore = asyncio.Semaphore(LOCKDOWN_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self._set_send(semaphore, channel, role, previous, "Raid protection unlock")
+              for channel, previous in channels),
+            return_exceptions=True
+        )
+        return sum(1 for result in results if not isinstance(result, Exception))
+
+    def queue_actions(self, guild, user_ids, settings):
+        """Queue flagged members for the configured bulk action (timeout or kick)."""
+        action = settings.get("action")
+        if action not in ("timeout", "kick"):
+            return
+        for user_id in user_ids:
+            if (guild.id, user_id) not in self._queued:
+                self._queued.add((guild.id, user_id))
+                self._actions.put_nowait((guild, user_id, action, settings))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run_actions())
+
+    @property
+    def pending_actions(self):
+        return self._actions.qsize()
+
+    async def _run_actions(self):
+        while not self._actions.empty():
+            guild, user_id, action, settings = self._actions.get_nowait()
+            self._queued.discard((guild.id, user_id))
+            await self.pacer.acquire(('members', guild.id))
+            try:
+                if action == "kick":
+                    await guild.kick(discord.Object(id=user_id), reason="Raid protection")
+                else:
+                    member = guild.get_member(user_id)
+                    if member is None:
+                        continue
+                    await member.timeout(timedelta(minutes=settings["timeout_minutes"]), reason="Raid protection")
+                self.actioned += 1
+            except discord.HTTPException as e:
+                logger.error(f"Raid {action} of {user_id} in {guild.id} failed: {e}")
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
@@ -0,0 +1,59 @@
+"""
+Client-side pacing for outbound Discord requests.
+Discord rate-limits messages per route (per channel, per DM channel) and
+globally; pacing sends before they leave keeps bursts from turning into 429s
+and retry storms inside discord.py's HTTP layer.
+"""
+
+import asyncio
+import time
+
+# Discord allows roughly 5 messages per 5 seconds per channel
+ROUTE_RATE = 1.0
+ROUTE_BURST = 5
+# Stay under the 50 requests/second global limit with some headroom
+GLOBAL_RATE = 40.0
+GLOBAL_BURST = 40
+# Idle buckets are dropped once the table grows past this size
+MAX_ROUTES = 10000
+
+
+class RoutePacer:
+    """
+    Token bucket per route key. acquire() reserves a token and sleeps until it is
+    valid, so concurrent callers on the same route queue up in arrival order.
+    """
+
+    def __init__(self, rate=ROUTE_RATE, burst=ROUTE_BURST, max_routes=MAX_ROUTES):
+        self.rate = rate
+        self.burst = burst
+        self.max_routes = max_routes
+        self.waited = 0.0
+        self._buckets = {}
+
+    def reserve(self, key):
+        """Take a token for `key` and return how many seconds the caller must wait before using it."""
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate) - 1
+        if key not in self._buckets and len(self._buckets) >= self.max_routes:
+            self._evict_idle(now)
+        self._buckets[key] = (tokens, now)
+        return -tokens / self.rate if tokens < 0 else 0.0
+
+    async def acquire(self, key):
+        delay = self.reserve(key)
+        if delay:
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    def _evict_idle(self, now):
+        # A bucket idle long enough to refill completely carries no state worth keeping
+        full_after = self.burst / self.rate
+        self._buckets = {
+            key: (tokens, last) for key, (tokens, last) in self._buckets.items()
+            if now - last < full_after
+        }
+
+    def __len__(self):
+        return len(self._buckets)
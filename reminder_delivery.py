@@ -0,0 +1,307 @@
+"""
+Batched reminder delivery.
+Due reminders are claimed in batches with a single UPDATE ... RETURNING over
+rows locked with FOR UPDATE SKIP LOCKED, so a row is handed out at most once
+no matter how many loops or processes are claiming; with a LeaseManager each
+process only claims from the partitions it currently leases and stamps its claims
+with its owner id until they are sent or failed. Claimed reminders are
+delivered by a fixed pool of workers paced per route, and failures are written
+back in one statement per drain. On shutdown, claimed reminders that were never
+sent are handed back (completed = FALSE) so the next process delivers them.
+
+The bot only runs this pipeline (with its scheduler, listener and leases) when
+enabled in config.json, because it claims rows the reminders cog would otherwise
+deliver and its schema changes run at startup:
+    "reminder_delivery": {"enabled": true}
+"""
+
+import asyncio
+import logging
+import time
+
+import discord
+
+from metrics import Histogram, RateCounter
+from rate_limits import GLOBAL_BURST, GLOBAL_RATE, RoutePacer
+from reminder_scheduler import to_epoch
+
+logger = logging.getLogger(__name__)
+
+# Reminders claimed per round trip
+CLAIM_BATCH = 100
+# Concurrent deliveries
+WORKERS = 8
+# Attempts before a failing reminder is given up on
+MAX_ATTEMPTS = 5
+# Seconds before a failed delivery is retried, doubled per attempt
+RETRY_DELAY = 30
+# Lag buckets in seconds (delivery time minus remind_at)
+LAG_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+SCHEMA_SQL = """
+    ALTER TABLE reminders
+        ADD COLUMN IF NOT EXISTS delivery_attempts INTEGER NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS last_error TEXT,
+        ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+    CREATE INDEX IF NOT EXISTS reminders_claimed_by ON reminders (claimed_by) WHERE claimed_by IS NOT NULL;
+"""
+
+CLAIM_SQL = """
+    UPDATE reminders AS r SET completed = TRUE
+    FROM (
+        SELECT id FROM reminders
+        WHERE completed = FALSE AND remind_at <= NOW()
+        ORDER BY remind_at
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    ) AS due
+    WHERE r.id = due.id
+    RETURNING r.id, r.user_id, r.channel_id, r.guild_id, r.message, r.created_by_user_id,
+              r.remind_at, r.delivery_attempts
+"""
+
+# Same claim restricted to partitions this process holds a live lease on (see reminder_leases)
+LEASED_CLAIM_SQL = """
+    UPDATE reminders AS r SET completed = TRUE, claimed_by = $2
+    FROM (
+        SELECT id FROM reminders
+        WHERE completed = FALSE AND remind_at <= NOW()
+          AND EXISTS (
+              SELECT 1 FROM reminder_leases l
+              WHERE l.partition = reminders.id % $3 AND l.owner = $2 AND l.expires_at > NOW()
+          )
+        ORDER BY remind_at
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    ) AS due
+    WHERE r.id = due.id
+    RETURNING r.id, r.user_id, r.channel_id, r.guild_id, r.message, r.created_by_user_id,
+              r.remind_at, r.delivery_attempts
+"""
+
+RECORD_FAILURES_SQL = """
+    UPDATE reminders AS r SET
+        delivery_attempts = r.delivery_attempts + 1,
+        last_error = f.error,
+        claimed_by = NULL,
+        completed = NOT (f.retry AND r.delivery_attempts + 1 < $5),
+        remind_at = CASE WHEN f.retry AND r.delivery_attempts + 1 < $5
+                         THEN NOW() + make_interval(secs => f.delay) ELSE r.remind_at END
+    FROM unnest($1::bigint[], $2::bool[], $3::text[], $4::float8[]) AS f(id, retry, error, delay)
+    WHERE r.id = f.id
+"""
+
+UNCLAIM_SQL = """
+    UPDATE reminders SET completed = FALSE, claimed_by = NULL
+    WHERE id = ANY($1::bigint[])
+"""
+
+# Sent reminders stop counting as claims, so a lease takeover never re-delivers them
+CLEAR_CLAIMS_SQL = """
+    UPDATE reminders SET claimed_by = NULL
+    WHERE id = ANY($1::bigint[])
+"""
+
+
+class DeliveryError(Exception):
+    """A reminder could not be delivered; `retry` is False when trying again cannot help."""
+
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        self.retry = retry
+
+
+def format_reminder(row):
+    """Message text for a delivered reminder."""
+    text = f"⏰ **Reminder:** {row['message']}"
+    created_by = row['created_by_user_id']
+    if created_by and created_by != row['user_id']:
+        text += f"\n*Set by <@{created_by}>*"
+    return text
+
+
+class ReminderDelivery:
+    """Claims due reminders in batches and delivers them through a bounded worker pool."""
+
+    def __init__(self, bot, db, batch_size=CLAIM_BATCH, workers=WORKERS, max_attempts=MAX_ATTEMPTS, leases=None,
+                 route_pacer=None):
+        self.bot = bot
+        self.db = db
+        # Optional LeaseManager; when set, only reminders in partitions leased to this process are claimed
+        self.leases = leases
+        self.batch_size = batch_size
+        self.worker_count = workers
+        self.max_attempts = max_attempts
+        # Shared with other senders (see send_queue) so per-channel budgets are not double-spent
+        self.route_pacer = route_pacer or RoutePacer()
+        self.global_pacer = RoutePacer(rate=GLOBAL_RATE, burst=GLOBAL_BURST)
+        self.delivered = RateCounter()
+        self.failed = RateCounter()
+        self.claimed_total = 0
+        self.lag = Histogram('bot_reminder_delivery_lag_seconds',
+                             'Delay between a reminder coming due and its delivery.', 'route', LAG_BUCKETS)
+        self._queue = None
+        self._workers = []
+        self._failures = []
+        # Ids claimed (marked completed) but not yet sent or recorded as failed
+        self._unsent = set()
+        # Ids sent since their claim stamp was last cleared (only tracked with leases)
+        self._sent = []
+        self._drain_lock = asyncio.Lock()
+
+    async def ensure_schema(self):
+        """Add the delivery bookkeeping columns if this database predates them."""
+        async with self.db.pool.acquire() as conn:
+            await conn.execute(SCHEMA_SQL)
+
+    @property
+    def backlog(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _start_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.batch_size * 2)
+            self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.worker_count)]
+
+    async def claim(self):
+        """Atomically mark up to one batch of due reminders completed and return them."""
+        if self.leases is not None and not self.leases.owned:
+            return []
+        async with self.db.pool.acquire() as conn:
+            if self.leases is None:
+                rows = await conn.fetch(CLAIM_SQL, self.batch_size)
+            else:
+                rows = await conn.fetch(LEASED_CLAIM_SQL, self.batch_size, self.leases.owner, self.leases.partitions)
+        self.claimed_total += len(rows)
+        self._unsent.update(row['id'] for row in rows)
+        return rows
+
+    async def deliver_due(self, reminder_ids=None):
+        """
+        Claim and deliver everything that is due, then record failures in bulk.
+        `reminder_ids` (from the scheduler) is only a wake-up hint; claiming is by due time.
+        """
+        async with self._drain_lock:
+            self._start_workers()
+            while True:
+                rows = await self.claim()
+                # Resolve the batch's recipients up front so workers hit the cache instead of the API
+                try:
+                    await self.bot.user_resolver.prefetch(row['user_id'] for row in rows if row['user_id'])
+                except Exception as e:
+                    logger.warning(f"Reminder recipient prefetch failed: {e}")
+                for row in rows:
+                    await self._queue.put(row)
+                if len(rows) < self.batch_size:
+                    break
+            await self._queue.join()
+            await self.flush_failures()
+            await self.flush_sent()
+
+    async def _worker(self):
+        while True:
+            row = await self._queue.get()
+            try:
+                route = await self._deliver(row)
+                self.delivered.record()
+                if self.leases is not None:
+                    self._sent.append(row['id'])
+                self.lag.observe(route, max(0.0, time.time() - to_epoch(row['remind_at'])))
+            except DeliveryError as e:
+                self._fail(row, str(e), e.retry)
+            except Exception as e:
+                self._fail(row, f"{type(e).__name__}: {e}", True)
+            finally:
+                self._queue.task_done()
+            # Not reached when cancelled mid-delivery, so an interrupted send is handed back on shutdown
+            self._unsent.discard(row['id'])
+
+    def _fail(self, row, error, retry):
+        self.failed.record()
+        delay = RETRY_DELAY * (2 ** row['delivery_attempts'])
+        self._failures.append((row['id'], retry, error[:500], float(delay)))
+        logger.warning(f"Reminder {row['id']} delivery failed ({'will retry' if retry else 'permanent'}): {error}")
+
+    async def _send(self, route_key, destination, content):
+        await self.route_pacer.acquire(route_key)
+        await self.global_pacer.acquire('global')
+        await destination.send(content)
+
+    async def _deliver(self, row):
+        """Send one reminder by DM, falling back to its channel. Returns the route used."""
+        content = format_reminder(row)
+        user_id, channel_id = row['user_id'], row['channel_id']
+
+        if user_id:
+            try:
+                user = await self.bot.user_resolver.resolve(user_id)
+                if user is not None:
+                    await self._send(('dm', user_id), user, content)
+                    return 'dm'
+            except (discord.Forbidden, discord.NotFound):
+                # DMs closed or user gone: fall back to the channel the reminder was set in
+                pass
+            except discord.HTTPException as e:
+                raise DeliveryError(f"DM failed: {e}")
+
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        if channel is None:
+            raise DeliveryError("no reachable DM or channel", retry=False)
+        try:
+            mention = f"<@{user_id}> " if user_id else ""
+            await self._send(('channel', channel_id), channel, mention + content)
+        except (discord.Forbidden, discord.NotFound) as e:
+            raise DeliveryError(f"channel send failed: {e}", retry=False)
+        except discord.HTTPException as e:
+            raise DeliveryError(f"channel send failed: {e}")
+        return 'channel'
+
+    async def flush_failures(self):
+        """Write all pending failures back in one statement: retryable ones are rescheduled, others closed."""
+        if not self._failures:
+            return
+        failures, self._failures = self._failures, []
+        ids, retries, errors, delays = (list(column) for column in zip(*failures))
+        try:
+            async with self.db.pool.acquire() as conn:
+                await conn.execute(RECORD_FAILURES_SQL, ids, retries, errors, delays, self.max_attempts)
+        except Exception as e:
+            logger.error(f"Failed to record {len(failures)} reminder delivery failures: {e}")
+            self._failures[:0] = failures
+
+    async def flush_sent(self):
+        """Clear the claim stamp of sent reminders in one statement."""
+        if not self._sent:
+            return
+        sent, self._sent = self._sent, []
+        try:
+            async with self.db.pool.acquire() as conn:
+                await conn.execute(CLEAR_CLAIMS_SQL, sent)
+        except Exception as e:
+            logger.error(f"Failed to clear the claims of {len(sent)} sent reminders: {e}")
+            self._sent[:0] = sent
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers, self._queue = [], None
+
+    async def release_unsent(self):
+        """
+        Stop the workers and mark every claimed reminder that was not sent as pending again.
+        Must run before flush_failures on shutdown: rows still queued or mid-send when the
+        drain was cancelled would otherwise stay completed without ever being delivered.
+        """
+        await self.close()
+        await self.flush_sent()
+        if not self._unsent:
+            return
+        unsent, self._unsent = list(self._unsent), set()
+        try:
+            async with self.db.pool.acquire() as conn:
+                await conn.execute(UNCLAIM_SQL, unsent)
+            logger.info(f"Handed back {len(unsent)} claimed but unsent reminders")
+        except Exception as e:
+            logger.error(f"Failed to hand back {len(unsent)} claimed reminders: {e}")
+            self._unsent.update(unsent)
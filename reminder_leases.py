@@ -0,0 +1,187 @@
+"""
+Reminder ownership across bot processes.
+The reminder keyspace is split into fixed partitions (id % PARTITIONS), each
+held under a time-limited lease in the reminder_leases table. Every process
+heartbeats in reminder_lease_members, takes its fair share of partitions and
+renews them; when a process dies its leases expire and the survivors pick the
+partitions up on their next renewal. Claims are fenced on a live lease, so two
+live processes never claim the same reminder at once.
+
+Each claim is stamped with its owner (reminders.claimed_by). Stamps are cleared
+in bulk at the end of each delivery drain, not per send. Rows still stamped by
+an owner that has stopped heartbeating are put back up for delivery by whoever
+holds their partition. Delivery is therefore at-least-once: if a process dies
+after sending a reminder but before the drain's stamp-clearing write, that
+reminder is sent again once the owner's heartbeat expires (up to LEASE_TTL plus
+one renewal later).
+"""
+
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Number of reminder partitions (changing it re-maps ids, so keep it fixed per deployment)
+PARTITIONS = 16
+# Seconds a lease stays valid without renewal
+LEASE_TTL = 30
+# Seconds between renewals
+RENEW_INTERVAL = 10
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS reminder_leases (
+        partition INTEGER PRIMARY KEY,
+        owner TEXT,
+        expires_at TIMESTAMPTZ NOT NULL DEFAULT 'epoch'
+    );
+    CREATE TABLE IF NOT EXISTS reminder_lease_members (
+        owner TEXT PRIMARY KEY,
+        heartbeat_at TIMESTAMPTZ NOT NULL
+    );
+"""
+
+# Claimed-but-unsent reminders in our partitions whose claimer is no longer a live member
+RECLAIM_SQL = """
+    UPDATE reminders SET completed = FALSE, claimed_by = NULL
+    WHERE claimed_by IS NOT NULL
+      AND claimed_by NOT IN (SELECT owner FROM reminder_lease_members)
+      AND id % $1 = ANY($2::int[])
+"""
+
+SEED_SQL = """
+    INSERT INTO reminder_leases (partition)
+    SELECT generate_series(0, $1 - 1)
+    ON CONFLICT DO NOTHING
+"""
+
+
+def instance_id():
+    """Identifier for this process, unique across restarts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseManager:
+    """Acquires, renews and rebalances this process's share of reminder partitions."""
+
+    def __init__(self, db, owner=None, partitions=PARTITIONS, ttl=LEASE_TTL, renew_interval=RENEW_INTERVAL,
+                 on_change=None):
+        self.db = db
+        self.owner = owner or instance_id()
+        self.partitions = partitions
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.on_change = on_change
+        self.live_members = 0
+        self.reclaimed = 0
+        self._task = None
+        self._owned = frozenset()
+        # Local deadline after which our leases may have expired in the database
+        self._valid_until = 0.0
+
+    @property
+    def owned(self):
+        """Partitions this process may claim from right now (empty once renewal has lapsed)."""
+        return self._owned if time.monotonic() < self._valid_until else frozenset()
+
+    async def ensure_schema(self):
+        async with self.db.pool.acquire() as conn:
+            await conn.execute(SCHEMA_SQL)
+            await conn.execute(SEED_SQL, self.partitions)
+
+    async def renew(self):
+        """Heartbeat, renew held leases, then release or acquire partitions toward a fair share."""
+        started = time.monotonic()
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    INSERT INTO reminder_lease_members (owner, heartbeat_at) VALUES ($1, NOW())
+                    ON CONFLICT (owner) DO UPDATE SET heartbeat_at = NOW()
+                """, self.owner)
+                await conn.execute("""
+                    DELETE FROM reminder_lease_members WHERE heartbeat_at < NOW() - make_interval(secs => $1)
+                """, float(self.ttl))
+                live = await conn.fetchval("SELECT COUNT(*) FROM reminder_lease_members")
+                target = math.ceil(self.partitions / max(live, 1))
+
+                rows = await conn.fetch("""
+                    UPDATE reminder_leases SET expires_at = NOW() + make_interval(secs => $2)
+                    WHERE owner = $1 AND expires_at > NOW()
+                    RETURNING partition
+                """, self.owner, float(self.ttl))
+                owned = sorted(row['partition'] for row in rows)
+
+                if len(owned) > target:
+                    surplus = owned[target:]
+                    await conn.execute("""
+                        UPDATE reminder_leases SET owner = NULL, expires_at = 'epoch'
+                        WHERE owner = $1 AND partition = ANY($2::int[])
+                    """, self.owner, surplus)
+                    owned = owned[:target]
+                elif len(owned) < target:
+                    rows = await conn.fetch("""
+                        UPDATE reminder_leases AS l SET owner = $1, expires_at = NOW() + make_interval(secs => $2)
+                        FROM (
+                            SELECT partition FROM reminder_leases
+                            WHERE expires_at <= NOW()
+                            ORDER BY partition
+                            LIMIT $3
+                            FOR UPDATE SKIP LOCKED
+                        ) AS free
+                        WHERE l.partition = free.partition
+                        RETURNING l.partition
+                    """, self.owner, float(self.ttl), target - len(owned))
+                    owned.extend(row['partition'] for row in rows)
+
+                reclaimed = 0
+                if owned:
+                    status = await conn.execute(RECLAIM_SQL, self.partitions, owned)
+                    reclaimed = int(status.split()[-1])
+
+        self.live_members = live
+        # Measure validity from before the round trip so the local view never outlives the database lease
+        self._valid_until = started + self.ttl
+        owned = frozenset(owned)
+        if reclaimed:
+            self.reclaimed += reclaimed
+            logger.warning(f"Reclaimed {reclaimed} reminders claimed but never sent by a departed process")
+        if owned != self._owned or reclaimed:
+            if owned != self._owned:
+                logger.info(f"Reminder partitions now owned by {self.owner}: {sorted(owned)} ({live} live processes)")
+            self._owned = owned
+            if self.on_change is not None:
+                self.on_change(owned)
+        return owned
+
+    def start(self):
+        """Start the renewal loop; release() stops it."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def release(self):
+        """Give up all partitions immediately so other processes take over without waiting for expiry."""
+        # Stop renewing first, or an in-flight or later renewal would take the partitions straight back
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._owned, self._valid_until = frozenset(), 0.0
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "UPDATE reminder_leases SET owner = NULL, expires_at = 'epoch' WHERE owner = $1", self.owner
+                )
+                await conn.execute("DELETE FROM reminder_lease_members WHERE owner = $1", self.owner)
+
+    async def run(self):
+        while True:
+            try:
+                await self.renew()
+            except Exception as e:
+                logger.error(f"Reminder lease renewal failed: {e}")
+            await asyncio.sleep(self.renew_interval)
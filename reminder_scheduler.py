@@ -0,0 +1,258 @@
+"""
+In-process reminder scheduler.
+Keeps the reminders due within the next window in a min-heap loaded from the
+reminders table and sleeps exactly until the earliest deadline. A trigger on the
+reminders table NOTIFYs on every insert or reschedule; ReminderListener holds
+one pooled connection LISTENing for it and feeds each change to schedule(), so
+the database is only queried again at the end of each window.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Seconds of upcoming reminders held in memory per refill
+WINDOW_SECONDS = 600
+# Maximum reminders loaded per refill
+WINDOW_LIMIT = 1000
+# Channel the reminders trigger notifies with "<id>:<remind_at epoch>"
+NOTIFY_CHANNEL = 'reminders_changed'
+# Seconds before re-establishing a lost LISTEN connection
+RELISTEN_DELAY = 5
+
+TRIGGER_SQL = """
+    CREATE OR REPLACE FUNCTION notify_reminders_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('reminders_changed', NEW.id || ':' || extract(epoch FROM NEW.remind_at));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'reminders_changed') THEN
+            CREATE TRIGGER reminders_changed
+                AFTER INSERT OR UPDATE OF remind_at, completed ON reminders
+                FOR EACH ROW WHEN (NEW.completed = FALSE)
+                EXECUTE PROCEDURE notify_reminders_changed();
+        END IF;
+    END
+    $$;
+"""
+
+
+def to_epoch(value):
+    """Convert a database timestamp to epoch seconds (naive values are treated as UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+async def fetch_upcoming(db, until_epoch, limit, leases=None):
+    """
+    Load (id, remind_at epoch) for pending reminders due before `until_epoch`, earliest first.
+    With a LeaseManager only reminders in partitions owned by this process are loaded.
+    """
+    if leases is None:
+        query, args = """
+            SELECT id, remind_at FROM reminders
+            WHERE completed = FALSE AND remind_at < to_timestamp($1)
+            ORDER BY remind_at
+            LIMIT $2
+        """, (until_epoch, limit)
+    else:
+        owned = sorted(leases.owned)
+        if not owned:
+            return []
+        query, args = """
+            SELECT id, remind_at FROM reminders
+            WHERE completed = FALSE AND remind_at < to_timestamp($1) AND id % $3 = ANY($4::int[])
+            ORDER BY remind_at
+            LIMIT $2
+        """, (until_epoch, limit, leases.partitions, owned)
+    async with db.pool.acquire() as conn:
+        rows = await conn.fetch(query, *args)
+    return [(to_epoch(row['remind_at']), row['id']) for row in rows]
+
+
+class ReminderScheduler:
+    """Min-heap timer for due reminders, refilled from the database one window at a time."""
+
+    def __init__(self, fetch_window, on_due, window=WINDOW_SECONDS, limit=WINDOW_LIMIT):
+        """
+        fetch_window(until_epoch, limit) returns [(due_epoch, reminder_id), ...] ordered by due time;
+        on_due(reminder_ids) is awaited with every batch of reminders whose time has come.
+        """
+        self.fetch_window = fetch_window
+        self.on_due = on_due
+        self.window = window
+        self.limit = limit
+        self.refills = 0
+        self._heap = []
+        self._queued = set()
+        self._cancelled = set()
+        # Reminders currently being handed to on_due; a refill may see them before they are marked completed
+        self._fired = {}
+        self._window_end = 0.0
+        self._wakeup = asyncio.Event()
+
+    @property
+    def pending(self):
+        return len(self._queued)
+
+    def _push(self, due, reminder_id):
+        if reminder_id not in self._queued:
+            self._queued.add(reminder_id)
+            heapq.heappush(self._heap, (due, reminder_id))
+
+    async def refill(self):
+        """Replace the heap with everything due before the end of the next window."""
+        until = time.time() + self.window
+        rows = await self.fetch_window(until, self.limit)
+        self.refills += 1
+        if len(rows) >= self.limit:
+            # Window truncated by the limit: only trust it up to the last loaded deadline
+            until = rows[-1][0]
+        self._heap, self._queued = [], set()
+        self._cancelled.clear()
+        for due, reminder_id in rows:
+            if reminder_id not in self._fired:
+                self._push(due, reminder_id)
+        self._window_end = until
+
+    def schedule(self, reminder_id, remind_at):
+        """Tell the scheduler about a newly inserted or rescheduled reminder (remind_at is a datetime)."""
+        due = to_epoch(remind_at)
+        self._cancelled.discard(reminder_id)
+        self._fired.pop(reminder_id, None)
+        if due < self._window_end:
+            self._push(due, reminder_id)
+            if self._heap[0][1] == reminder_id:
+                self._wakeup.set()
+
+    def invalidate(self):
+        """Drop the loaded window and refill now (e.g. after partition ownership changed)."""
+        self._window_end = 0.0
+        self._wakeup.set()
+
+    def cancel(self, reminder_id):
+        """Forget a reminder that was cancelled before it fired."""
+        if reminder_id in self._queued:
+            self._cancelled.add(reminder_id)
+
+    def _pop_due(self, now):
+        due_ids = []
+        while self._heap and self._heap[0][0] <= now:
+            _, reminder_id = heapq.heappop(self._heap)
+            self._queued.discard(reminder_id)
+            if reminder_id in self._cancelled:
+                self._cancelled.discard(reminder_id)
+            else:
+                due_ids.append(reminder_id)
+        return due_ids
+
+    async def run(self):
+        """Scheduler loop: deliver due reminders, then sleep until the next deadline or window end."""
+        while True:
+            now = time.time()
+            if now >= self._window_end:
+                try:
+                    await self.refill()
+                except Exception as e:
+                    logger.error(f"Reminder refill failed: {e}")
+                    await asyncio.sleep(5)
+                    continue
+
+            now = time.time()
+            due_ids = self._pop_due(now)
+            if due_ids:
+                for reminder_id in due_ids:
+                    self._fired[reminder_id] = now
+                try:
+                    await self.on_due(due_ids)
+                except Exception as e:
+                    logger.error(f"Reminder delivery failed for {len(due_ids)} reminders: {e}")
+                finally:
+                    # Delivered rows are completed; failed ones were rescheduled and must be seen again
+                    for reminder_id in due_ids:
+                        self._fired.pop(reminder_id, None)
+                continue
+
+            deadline = self._heap[0][0] if self._heap else self._window_end
+            timeout = max(0.0, min(deadline, self._window_end) - time.time())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+class ReminderListener:
+    """LISTENs for reminder inserts and reschedules on one pooled connection and passes them to the scheduler."""
+
+    def __init__(self, db, scheduler, leases=None, channel=NOTIFY_CHANNEL):
+        self.db = db
+        self.scheduler = scheduler
+        # Optional LeaseManager; changes in partitions owned by other processes are ignored
+        self.leases = leases
+        self.channel = channel
+        self.notifications = 0
+        self.listening = False
+        self._task = None
+
+    async def ensure_schema(self):
+        """Install the NOTIFY trigger on the reminders table if it is missing."""
+        async with self.db.pool.acquire() as conn:
+            await conn.execute(TRIGGER_SQL)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.notifications += 1
+        try:
+            reminder_id, epoch = payload.split(':', 1)
+            reminder_id, epoch = int(reminder_id), float(epoch)
+        except ValueError:
+            logger.warning(f"Ignoring malformed {channel} notification: {payload!r}")
+            return
+        if self.leases is not None and reminder_id % self.leases.partitions not in self.leases.owned:
+            return
+        self.scheduler.schedule(reminder_id, datetime.fromtimestamp(epoch, timezone.utc))
+
+    async def _listen_once(self):
+        async with self.db.pool.acquire() as conn:
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _: lost.set())
+            await conn.add_listener(self.channel, self._on_notify)
+            # Changes made while nobody was listening were missed: reload the window
+            self.scheduler.invalidate()
+            self.listening = True
+            try:
+                await lost.wait()
+            finally:
+                self.listening = False
+                if not conn.is_closed():
+                    await conn.remove_listener(self.channel, self._on_notify)
+
+    async def run(self):
+        while True:
+            try:
+                await self._listen_once()
+                logger.warning("Reminder LISTEN connection lost, reconnecting")
+            except Exception as e:
+                logger.error(f"Reminder LISTEN failed: {e}")
+            await asyncio.sleep(RELISTEN_DELAY)
+
+    def start(self):
+        """Start listening; close() stops it."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def close(self):
+        """Stop listening and hand the connection back so the pool can close."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
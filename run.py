@@ -10,11 +10,10 @@ import asyncio
 import logging
 import signal
 
-# Configure basic logging for startup
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from logging_setup import setup_logging
+
+# Configure queued logging for startup (main.py reuses the same pipeline)
+setup_logging(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
@@ -53,8 +52,9 @@ async def main():
         logger.error("DISCORD_TOKEN environment variable not found!")
         return
     
-    # Create bot instance
-    bot = ModerationBot()
+    # Create bot instance (--force-sync re-syncs slash commands even if unchanged)
+    bot = ModerationBot(force_sync='--force-sync' in sys.argv)
+    bot.lifecycle.install_signal_handlers()
     
     # Start web server first for health checks
     web_server = BotWebServer(bot)
@@ -64,12 +64,13 @@ async def main():
         # Start web server
         web_runner = await web_server.start_server(host='0.0.0.0', port=port)
         logger.info(f"Web server started on port {port} for health checks")
+        bot.lifecycle.register_closer('web server', lambda: web_server.stop(web_runner))
         
         # Connection retry logic for Discord bot
         max_retries = 5
         retry_count = 0
         
-        while retry_count < max_retries:
+        while retry_count < max_retries and bot.lifecycle.accepting:
             try:
                 logger.info(f"Starting Discord bot (attempt {retry_count + 1}/{max_retries})")
                 await bot.start(token)
@@ -82,6 +83,9 @@ async def main():
                     await asyncio.sleep(5)
                 else:
                     logger.error("Max retries exceeded. Bot startup failed.")
+        
+        # Drain in-flight work, flush buffers and close the bot, web server and DB pool in order
+        await bot.lifecycle.shutdown("bot stopped")
                     
     except Exception as e:
         logger.error(f"Fatal error during startup: {e}")
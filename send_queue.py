@@ -0,0 +1,163 @@
+"""
+Per-channel outbound message queue.
+Repeated sends (e.g. /pinguser's "ping N of M") are queued per channel and
+drained by one task per busy channel, paced by the channel's rate-limit bucket
+so discord.py never has to sit out 429s. Batches from different users in the
+same channel are interleaved round-robin, can be cancelled while queued, and a
+channel that is already saturated rejects new batches instead of stalling.
+"""
+
+import asyncio
+import logging
+from collections import deque
+
+import discord
+
+from metrics import RateCounter
+from rate_limits import RoutePacer
+
+logger = logging.getLogger(__name__)
+
+# Queued messages allowed per channel before new batches are rejected
+MAX_CHANNEL_PENDING = 300
+# Discord's message length limit, used when coalescing
+MESSAGE_LIMIT = 2000
+
+
+class QueueFull(Exception):
+    """The channel already has too many queued messages."""
+
+
+class SendBatch:
+    """Handle for a group of messages queued by one command invocation."""
+
+    __slots__ = ('channel_id', 'messages', 'coalesce', 'send_kwargs', 'sent', 'cancelled', '_done')
+
+    def __init__(self, channel_id, messages, coalesce, send_kwargs):
+        self.channel_id = channel_id
+        self.messages = deque(messages)
+        self.coalesce = coalesce
+        self.send_kwargs = send_kwargs
+        self.sent = 0
+        self.cancelled = False
+        self._done = asyncio.get_event_loop().create_future()
+
+    @property
+    def remaining(self):
+        return len(self.messages)
+
+    def cancel(self):
+        """Drop every message of this batch that has not been sent yet."""
+        self.cancelled = True
+        self._finish()
+
+    def _finish(self):
+        if not self._done.done():
+            self._done.set_result(self.sent)
+
+    async def wait(self):
+        """Wait until the batch is fully sent or cancelled; returns the number of messages sent."""
+        return await asyncio.shield(self._done)
+
+    def take(self):
+        """Pop the next message, merging following ones into it when coalescing."""
+        content = self.messages.popleft()
+        if self.coalesce:
+            while self.messages and len(content) + 1 + len(self.messages[0]) <= MESSAGE_LIMIT:
+                content += "\n" + self.messages.popleft()
+        return content
+
+
+class ChannelSendQueue:
+    """Paced, cancellable per-channel message queues with one drain task per busy channel."""
+
+    def __init__(self, pacer=None, max_pending=MAX_CHANNEL_PENDING):
+        self.pacer = pacer or RoutePacer()
+        self.max_pending = max_pending
+        self.sent = RateCounter()
+        self.dropped = 0
+        # channel_id -> deque of active SendBatch, served round-robin
+        self._channels = {}
+        self._drainers = {}
+
+    @property
+    def depth(self):
+        """Messages queued across all channels."""
+        return sum(self.channel_depth(channel_id) for channel_id in self._channels)
+
+    def channel_depth(self, channel_id):
+        return sum(batch.remaining for batch in self._channels.get(channel_id, ()) if not batch.cancelled)
+
+    @property
+    def busy_channels(self):
+        return len(self._channels)
+
+    def submit(self, channel, messages, coalesce=False, **send_kwargs):
+        """
+        Queue messages for `channel` (send_kwargs such as delete_after go to every send).
+        Raises QueueFull if the channel's backlog would exceed max_pending.
+        """
+        messages = list(messages)
+        if self.channel_depth(channel.id) + len(messages) > self.max_pending:
+            raise QueueFull(f"{self.channel_depth(channel.id)} messages already queued for this channel")
+        batch = SendBatch(channel.id, messages, coalesce, send_kwargs)
+        if not messages:
+            batch._finish()
+            return batch
+        self._channels.setdefault(channel.id, deque()).append(batch)
+        if channel.id not in self._drainers:
+            self._drainers[channel.id] = asyncio.ensure_future(self._drain(channel))
+        return batch
+
+    async def _drain(self, channel):
+        batches = self._channels[channel.id]
+        try:
+            while batches:
+                batch = batches.popleft()
+                if batch.cancelled or not batch.messages:
+                    self.dropped += batch.remaining
+                    batch._finish()
+                    continue
+
+                await self.pacer.acquire(('channel', channel.id))
+                if batch.cancelled:
+                    # Cancelled while waiting for the bucket
+                    batches.appendleft(batch)
+                    continue
+                content = batch.take()
+                try:
+                    await channel.send(content, **batch.send_kwargs)
+                    batch.sent += 1
+                    self.sent.record()
+                except (discord.Forbidden, discord.NotFound) as e:
+                    # The channel is unusable: nothing else queued for it can be delivered
+                    logger.warning(f"Dropping queued messages for channel {channel.id}: {e}")
+                    for stranded in (batch, *batches):
+                        self.dropped += stranded.remaining
+                        stranded.cancel()
+                    batches.clear()
+                    break
+                except discord.HTTPException as e:
+                    logger.warning(f"Queued send to channel {channel.id} failed: {e}")
+
+                if batch.messages and not batch.cancelled:
+                    batches.append(batch)
+                else:
+                    batch._finish()
+        finally:
+            self._channels.pop(channel.id, None)
+            self._drainers.pop(channel.id, None)
+
+    def cancel_channel(self, channel_id):
+        """Cancel everything queued for a channel."""
+        for batch in self._channels.get(channel_id, ()):
+            batch.cancel()
+
+    async def close(self):
+        for batches in self._channels.values():
+            for batch in batches:
+                batch.cancel()
+        drainers = list(self._drainers.values())
+        for drainer in drainers:
+            drainer.cancel()
+        await asyncio.gather(*drainers, return_exceptions=True)
@@ -0,0 +1,95 @@
+"""
+Snipe cache for recently deleted and edited messages.
+Each channel keeps a fixed-capacity deque of compact entries, channels are
+evicted least-recently-used once a global cap is reached, and entries expire
+lazily when read, so there is no cleanup task and memory is bounded by
+MAX_CHANNELS x CHANNEL_CAPACITY entries.
+"""
+
+import time
+from collections import OrderedDict, deque
+
+# Entries kept per channel (!snipelist shows at most this many)
+CHANNEL_CAPACITY = 10
+# Channels tracked before the least recently used one is evicted
+MAX_CHANNELS = 5000
+# Seconds an entry stays snipeable
+MAX_AGE = 3600
+
+
+class SnipeEntry:
+    """One deleted or edited message; `after` is the new content for edits and None for deletions."""
+
+    __slots__ = ('author_id', 'content', 'timestamp', 'attachments', 'after')
+
+    def __init__(self, author_id, content, timestamp, attachments=(), after=None):
+        self.author_id = author_id
+        self.content = content
+        self.timestamp = timestamp
+        self.attachments = tuple(attachments)
+        self.after = after
+
+    @classmethod
+    def from_message(cls, message, after=None):
+        return cls(
+            message.author.id,
+            message.content,
+            time.time(),
+            (attachment.url for attachment in message.attachments),
+            after.content if after is not None else None
+        )
+
+
+class SnipeCache:
+    """Per-channel ring buffers with LRU channel eviction and read-time expiry."""
+
+    def __init__(self, capacity=CHANNEL_CAPACITY, max_channels=MAX_CHANNELS, max_age=MAX_AGE):
+        self.capacity = capacity
+        self.max_channels = max_channels
+        self.max_age = max_age
+        self._channels = OrderedDict()
+
+    def record(self, channel_id, entry):
+        entries = self._channels.get(channel_id)
+        if entries is None:
+            entries = self._channels[channel_id] = deque(maxlen=self.capacity)
+            if len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        else:
+            self._channels.move_to_end(channel_id)
+        entries.append(entry)
+
+    def _live(self, channel_id, now=None):
+        """The channel's deque with expired entries dropped (oldest are on the left)."""
+        entries = self._channels.get(channel_id)
+        if entries is None:
+            return None
+        cutoff = (time.time() if now is None else now) - self.max_age
+        while entries and entries[0].timestamp < cutoff:
+            entries.popleft()
+        if not entries:
+            del self._channels[channel_id]
+            return None
+        return entries
+
+    def get(self, channel_id, index=0, now=None):
+        """Entry `index` places back from the newest (0 = most recent), or None."""
+        entries = self._live(channel_id, now)
+        if entries is None or index >= len(entries):
+            return None
+        return entries[-1 - index]
+
+    def list(self, channel_id, now=None):
+        """Live entries for a channel, newest first."""
+        entries = self._live(channel_id, now)
+        return list(reversed(entries)) if entries is not None else []
+
+    def clear(self, channel_id):
+        self._channels.pop(channel_id, None)
+
+    @property
+    def channels(self):
+        return len(self._channels)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._channels.values())
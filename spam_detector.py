@@ -0,0 +1,190 @@
+"""
+Sliding-window spam detection for auto moderation.
+Each (guild, user) pair gets a slot in flat arrays holding a ring of its previous
+message times (as many as the largest `spam_threshold - 1` in use) plus the hash of
+its last message, so checking a message is O(1) and memory per tracked user is
+fixed. Guilds whose auto_mod overrides set their own spam_threshold/spam_interval
+are checked against those. Slots of users who have gone quiet are recycled by a
+periodic sweep.
+"""
+
+import asyncio
+import logging
+import time
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# Identical consecutive messages within the interval that count as spam
+DUPLICATE_THRESHOLD = 3
+# Seconds between idle-slot sweeps
+SWEEP_INTERVAL = 60
+# Initial slot capacity; arrays double when full
+INITIAL_SLOTS = 1024
+
+RATE = 'rate'
+DUPLICATE = 'duplicate'
+
+
+class SpamDetector:
+    """
+    check() returns RATE when a user has sent `threshold` messages within `interval`
+    seconds, DUPLICATE when the same content was repeated `duplicate_threshold` times
+    in a row within the interval, and None otherwise.
+    """
+
+    def __init__(self, threshold=5, interval=10.0, duplicate_threshold=DUPLICATE_THRESHOLD, idle_timeout=None,
+                 guild_limits=None):
+        self.duplicate_threshold = duplicate_threshold
+        self.flagged = {RATE: 0, DUPLICATE: 0}
+        self.checks = 0
+        self.configure(threshold, interval, idle_timeout, guild_limits)
+
+    def configure(self, threshold, interval, idle_timeout=None, guild_limits=None):
+        """
+        Apply new limits; `guild_limits` maps guild_id to its own (threshold, interval).
+        Tracked history is discarded because the ring size may change.
+        """
+        self.threshold = max(1, int(threshold))
+        self.interval = float(interval)
+        self.guild_limits = {
+            guild_id: (max(1, int(guild_threshold)), float(guild_interval))
+            for guild_id, (guild_threshold, guild_interval) in (guild_limits or {}).items()
+        }
+        self._default_limits = (self.threshold, self.interval)
+        thresholds = [self.threshold] + [limit[0] for limit in self.guild_limits.values()]
+        intervals = [self.interval] + [limit[1] for limit in self.guild_limits.values()]
+        # Previous message times kept per user; with the current message they make the largest threshold
+        self._ring = max(1, max(thresholds) - 1)
+        # A user idle for longer than the longest window has no history that can still matter
+        self.idle_timeout = idle_timeout or max(intervals)
+        self._slots = {}
+        self._free = []
+        self._capacity = 0
+        self._times = array('d')
+        self._ring_pos = array('H')
+        self._last_seen = array('d')
+        self._last_hash = array('q')
+        self._repeats = array('H')
+        self._grow(INITIAL_SLOTS)
+
+    @staticmethod
+    def _config_limits(config_store):
+        """(threshold, interval) from the global auto_mod section, plus those of guilds that override them."""
+        def limits(auto_mod):
+            return int(auto_mod.get('spam_threshold', 5)), float(auto_mod.get('spam_interval', 10))
+
+        default = limits(config_store.guild(None).auto_mod)
+        guild_limits = {}
+        for guild_id, guild_config in config_store.guild_overrides().items():
+            guild_limit = limits(guild_config.auto_mod)
+            if guild_limit != default:
+                guild_limits[guild_id] = guild_limit
+        return default, guild_limits
+
+    @classmethod
+    def from_config(cls, config_store):
+        (threshold, interval), guild_limits = cls._config_limits(config_store)
+        return cls(threshold, interval, guild_limits=guild_limits)
+
+    def apply_config(self, config_store):
+        """Reconfigure from the config store's auto_mod sections if any spam limits changed."""
+        default, guild_limits = self._config_limits(config_store)
+        if (default, guild_limits) != (self._default_limits, self.guild_limits):
+            self.configure(*default, guild_limits=guild_limits)
+
+    def limits(self, guild_id):
+        """(threshold, interval) that apply in a guild."""
+        return self.guild_limits.get(guild_id, self._default_limits)
+
+    def _grow(self, extra):
+        self._times.extend([0.0] * (extra * self._ring))
+        self._ring_pos.extend([0] * extra)
+        self._last_seen.extend([0.0] * extra)
+        self._last_hash.extend([0] * extra)
+        self._repeats.extend([0] * extra)
+        self._free.extend(range(self._capacity + extra - 1, self._capacity - 1, -1))
+        self._capacity += extra
+
+    def _slot(self, key):
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free:
+                self._grow(self._capacity)
+            slot = self._free.pop()
+            self._slots[key] = slot
+            base = slot * self._ring
+            for index in range(base, base + self._ring):
+                self._times[index] = 0.0
+            self._ring_pos[slot] = 0
+            self._last_hash[slot] = 0
+            self._repeats[slot] = 0
+        return slot
+
+    def check(self, guild_id, user_id, content, now=None):
+        """Record a message and return RATE, DUPLICATE or None."""
+        now = time.monotonic() if now is None else now
+        self.checks += 1
+        threshold, interval = self.guild_limits.get(guild_id, self._default_limits)
+        slot = self._slot((guild_id, user_id))
+
+        # The ring holds the previous message times in order; the guild's limit is reached iff
+        # the one `threshold - 1` messages back is inside its interval (with the largest threshold
+        # that is the entry about to be overwritten)
+        times = self._times
+        ring, position = self._ring, self._ring_pos[slot]
+        base = slot * ring
+        oldest = times[base + (position - max(1, threshold - 1)) % ring]
+        times[base + position] = now
+        self._ring_pos[slot] = (position + 1) % ring
+
+        content_hash = hash(content)
+        if content_hash == self._last_hash[slot] and now - self._last_seen[slot] <= interval:
+            repeats = self._repeats[slot] = min(self._repeats[slot] + 1, 65535)
+        else:
+            self._last_hash[slot] = content_hash
+            repeats = self._repeats[slot] = 1
+        self._last_seen[slot] = now
+
+        if oldest and now - oldest <= interval:
+            self.flagged[RATE] += 1
+            return RATE
+        if content and repeats >= self.duplicate_threshold:
+            self.flagged[DUPLICATE] += 1
+            return DUPLICATE
+        return None
+
+    def forget(self, guild_id, user_id):
+        """Drop a user's history (e.g. after they were actioned)."""
+        slot = self._slots.pop((guild_id, user_id), None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def sweep(self, now=None):
+        """Recycle slots of users idle longer than idle_timeout. Returns the number evicted."""
+        cutoff = (time.monotonic() if now is None else now) - self.idle_timeout
+        last_seen = self._last_seen
+        idle = [key for key, slot in self._slots.items() if last_seen[slot] < cutoff]
+        for key in idle:
+            self._free.append(self._slots.pop(key))
+        return len(idle)
+
+    @property
+    def tracked(self):
+        return len(self._slots)
+
+    def memory_bytes(self):
+        """Bytes held by the slot arrays (excluding the key index)."""
+        return sum(column.buffer_info()[1] * column.itemsize for column in (
+            self._times, self._ring_pos, self._last_seen, self._last_hash, self._repeats
+        ))
+
+    async def run(self, interval=SWEEP_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = self.sweep()
+                if evicted:
+                    logger.debug(f"Spam detector recycled {evicted} idle slots ({self.tracked} tracked)")
+            except Exception as e:
+                logger.error(f"Spam detector sweep failed: {e}")
@@ -0,0 +1,102 @@
+"""Tests for the cross-guild button index and its top-N boards."""
+
+import json
+import time
+
+from button_index import CLICK_RECORD, GlobalButtonIndex, TopN
+
+
+def test_topn_keeps_the_largest_counts():
+    top = TopN(size=2)
+    top.update('a', 1)
+    top.update('b', 2)
+    top.update('c', 3)
+    assert top.ranked() == [('c', 3), ('b', 2)]
+
+
+def test_topn_ignores_counts_that_do_not_beat_the_minimum():
+    top = TopN(size=2, board={'a': 5, 'b': 3})
+    top.update('c', 3)
+    assert top.board == {'a': 5, 'b': 3}
+
+
+def test_topn_updates_existing_keys_in_place():
+    top = TopN(size=2, board={'a': 5, 'b': 3})
+    top.update('b', 7)
+    assert top.ranked() == [('b', 7), ('a', 5)]
+
+
+def test_apply_folds_records_into_every_total():
+    index = GlobalButtonIndex(path=None)
+    now = int(time.time())
+    index.apply('btn', [(1, now, 10), (1, now, 10), (2, now, 0)])
+
+    assert index.total_clicks == 3
+    assert index.button_totals == {'btn': 3}
+    assert index.user_totals == {'1': 2, '2': 1}
+    # Records without a guild (0) are not attributed to one
+    assert index.guild_totals == {'10': 2}
+    assert sum(index.daily_totals.values()) == 3
+    assert index.top_users.ranked()[0] == ('1', 2)
+    assert index.dirty
+
+
+def test_apply_with_no_records_changes_nothing():
+    index = GlobalButtonIndex(path=None)
+    index.apply('btn', [])
+    assert index.total_clicks == 0
+    assert not index.dirty
+
+
+def test_snapshot_limits_daily_totals():
+    index = GlobalButtonIndex(path=None)
+    index.daily_totals = {f'2025-01-{day:02}': day for day in range(1, 11)}
+    snapshot = index.snapshot(days=3)
+    assert list(snapshot['daily_totals']) == ['2025-01-08', '2025-01-09', '2025-01-10']
+
+
+def test_to_json_round_trips_through_load(tmp_path):
+    path = tmp_path / 'index.json'
+    index = GlobalButtonIndex(path=str(path))
+    index.add_button('idle')
+    index.apply('btn', [(1, int(time.time()), 10)])
+    path.write_bytes(index.to_json())
+
+    loaded = GlobalButtonIndex.load(str(path))
+    assert loaded.snapshot() == index.snapshot()
+    assert not loaded.dirty
+
+
+def test_load_returns_none_without_an_index(tmp_path):
+    assert GlobalButtonIndex.load(str(tmp_path / 'missing.json')) is None
+
+
+def test_load_treats_a_corrupt_index_as_missing(tmp_path):
+    path = tmp_path / 'index.json'
+    path.write_text('{"total_clicks": 3,')
+    assert GlobalButtonIndex.load(str(path)) is None
+
+
+def test_rebuild_scans_button_files_and_click_logs(tmp_path):
+    (tmp_path / 'one.json').write_text(json.dumps({
+        'button_id': 'one',
+        'total_clicks': 3,
+        'user_clicks': {'1': 2, '2': 1},
+        'daily_stats': {'2025-01-01': 3},
+        'click_history': [{'guild_id': 10}, {'guild_id': None}]
+    }))
+    (tmp_path / 'one.clicks').write_bytes(
+        CLICK_RECORD.pack(1, 0, 10) + CLICK_RECORD.pack(2, 0, 20) + b'\x00' * 3
+    )
+    (tmp_path / 'broken.json').write_text('{not json')
+
+    index = GlobalButtonIndex.rebuild(str(tmp_path), path=str(tmp_path / 'index.json'))
+
+    assert index.total_clicks == 3
+    assert index.button_totals == {'one': 3}
+    assert index.user_totals == {'1': 2, '2': 1}
+    assert index.daily_totals == {'2025-01-01': 3}
+    # The truncated trailing record is ignored
+    assert index.guild_totals == {'10': 2, '20': 1}
+    assert index.top_guilds.ranked()[0] == ('10', 2)
+    assert index.dirty
@@ -0,0 +1,156 @@
+"""Tests for the write-behind button click store."""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import button_store
+from button_index import CLICK_RECORD
+from button_store import ButtonClickStore, _hour_key
+
+
+def make_store(tmp_path, **kwargs):
+    return ButtonClickStore(data_dir=str(tmp_path / 'buttons'), index_path=str(tmp_path / 'index.json'), **kwargs)
+
+
+def write_legacy(tmp_path, button_id, history):
+    directory = tmp_path / 'buttons'
+    directory.mkdir(exist_ok=True)
+    (directory / f'{button_id}.json').write_text(json.dumps({
+        'button_id': button_id,
+        'total_clicks': len(history),
+        'user_clicks': {},
+        'daily_stats': {},
+        'click_history': history
+    }))
+
+
+def legacy_history(count, start):
+    return [
+        {'user_id': str(index), 'timestamp': datetime.fromtimestamp(start + index * 1800).isoformat(),
+         'guild_id': '10'}
+        for index in range(count)
+    ]
+
+
+def log_records(tmp_path, button_id):
+    return list(CLICK_RECORD.iter_unpack((tmp_path / 'buttons' / f'{button_id}.clicks').read_bytes()))
+
+
+async def test_legacy_history_moves_into_the_click_log(tmp_path):
+    start = 1_700_000_000
+    write_legacy(tmp_path, 'old', legacy_history(4, start))
+    store = make_store(tmp_path)
+
+    data = await store.get('old')
+    assert 'click_history' not in data
+    # Hourly rollups are rebuilt from the history (two clicks per hour)
+    assert data['hourly_stats'] == {_hour_key(start): 2, _hour_key(start + 3600): 2}
+    assert store.dirty_count == 1
+
+    await store.flush()
+    saved = json.loads((tmp_path / 'buttons' / 'old.json').read_text())
+    assert 'click_history' not in saved
+    assert log_records(tmp_path, 'old') == [(index, start + index * 1800, 10) for index in range(4)]
+
+
+async def test_interrupted_migration_is_not_repeated(tmp_path, monkeypatch):
+    write_legacy(tmp_path, 'old', legacy_history(3, 1_700_000_000))
+    store = make_store(tmp_path)
+    await store.get('old')
+
+    # Crash after the log append but before the JSON rewrite
+    write_atomic = button_store._write_atomic
+
+    def crash(path, payload):
+        if path.endswith('old.json'):
+            raise OSError('disk gone')
+        return write_atomic(path, payload)
+    monkeypatch.setattr(button_store, '_write_atomic', crash)
+    await store.flush()
+    monkeypatch.setattr(button_store, '_write_atomic', write_atomic)
+    assert len(log_records(tmp_path, 'old')) == 3
+
+    restarted = make_store(tmp_path)
+    data = await restarted.get('old')
+    assert 'click_history' not in data
+    assert [click['user_id'] for click in (await restarted.stats('old'))['recent_clicks']] == [0, 1, 2]
+    await restarted.flush()
+    assert len(log_records(tmp_path, 'old')) == 3
+    assert 'click_history' not in json.loads((tmp_path / 'buttons' / 'old.json').read_text())
+
+
+async def test_failed_flush_keeps_its_records(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    store.create('btn', 1)
+    await store.record_click('btn', 5, guild_id=10)
+
+    append = button_store._append
+
+    def fail(path, payload):
+        raise OSError('disk full')
+    monkeypatch.setattr(button_store, '_append', fail)
+    assert await store.flush() == 0
+    assert store.dirty_count == 1
+
+    monkeypatch.setattr(button_store, '_append', append)
+    await store.record_click('btn', 6)
+    assert await store.flush() == 1
+    assert [record[0] for record in log_records(tmp_path, 'btn')] == [5, 6]
+    assert store.index.total_clicks == 2
+
+
+async def test_concurrent_first_clicks_share_one_load(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    store.create('btn', 1)
+    await store.flush()
+
+    loads = []
+    load_button = button_store._load_button
+
+    def counting_load(*args):
+        loads.append(args[1])
+        time.sleep(0.05)
+        return load_button(*args)
+
+    monkeypatch.setattr(button_store, '_load_button', counting_load)
+
+    restarted = make_store(tmp_path)
+    results = await asyncio.gather(*(restarted.record_click('btn', user_id) for user_id in range(5)))
+    assert loads == ['btn']
+    assert results[-1]['total_clicks'] == 5
+    assert len(results[-1]['user_clicks']) == 5
+
+
+async def test_corrupt_index_is_rebuilt_on_flush(tmp_path):
+    (tmp_path / 'index.json').write_text('not json')
+    store = make_store(tmp_path)
+    store.create('btn', 1)
+    await store.record_click('btn', 5)
+    assert await store.flush() == 1
+    assert (await store.global_stats())['total_clicks'] == 1
+    assert json.loads((tmp_path / 'index.json').read_text())['total_clicks'] == 1
+
+
+async def test_unknown_button_is_none(tmp_path):
+    store = make_store(tmp_path)
+    assert await store.get('missing') is None
+    assert await store.record_click('missing', 1) is None
+    assert await store.stats('missing') is None
+
+
+async def test_stats_come_from_counters_and_rollups(tmp_path):
+    store = make_store(tmp_path)
+    store.create('btn', 1)
+    for user_id in (1, 1, 2, 3, 1):
+        await store.record_click('btn', user_id, guild_id=10)
+
+    stats = await store.stats('btn', top=2, recent=3)
+    assert stats['total_clicks'] == 5
+    assert stats['unique_users'] == 3
+    assert stats['today'] == stats['last_24h'] == stats['last_7_days'] == 5
+    assert stats['top_users'][0] == ('1', 3)
+    assert len(stats['top_users']) == 2
+    assert [click['user_id'] for click in stats['recent_clicks']] == [2, 3, 1]
+    assert stats['recent_clicks'][0]['guild_id'] == 10
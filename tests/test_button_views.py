@@ -0,0 +1,52 @@
+"""Tests for button expiry and garbage collection."""
+
+import json
+from datetime import datetime, timedelta
+
+from button_store import ButtonClickStore
+from button_views import collect_expired_buttons, is_expired
+
+NOW = datetime(2025, 6, 1, 12)
+LIFETIME = timedelta(days=30)
+
+
+def test_button_in_use_does_not_expire_on_its_creation_age():
+    data = {"created_at": (NOW - timedelta(days=90)).isoformat(),
+            "last_click_at": (NOW - timedelta(days=1)).isoformat()}
+    assert not is_expired(data, NOW, LIFETIME)
+
+
+def test_button_expires_after_a_lifetime_without_clicks():
+    data = {"created_at": (NOW - timedelta(days=90)).isoformat(),
+            "last_click_at": (NOW - timedelta(days=31)).isoformat()}
+    assert is_expired(data, NOW, LIFETIME)
+
+
+def test_unclicked_button_expires_from_its_creation_time():
+    assert not is_expired({"created_at": (NOW - timedelta(days=29)).isoformat()}, NOW, LIFETIME)
+    assert is_expired({"created_at": (NOW - timedelta(days=31)).isoformat()}, NOW, LIFETIME)
+
+
+def test_buttons_saved_before_click_stamps_use_their_latest_click_day():
+    data = {"created_at": (NOW - timedelta(days=90)).isoformat(),
+            "daily_stats": {"2025-02-01": 4, "2025-05-20": 1}}
+    assert not is_expired(data, NOW, LIFETIME)
+    data["daily_stats"] = {"2025-02-01": 4}
+    assert is_expired(data, NOW, LIFETIME)
+
+
+def test_buttons_without_known_activity_never_expire():
+    assert not is_expired({}, NOW, LIFETIME)
+    assert not is_expired({"created_at": "not a date"}, NOW, LIFETIME)
+
+
+async def test_gc_keeps_buttons_clicked_since_the_last_flush(tmp_path):
+    store = ButtonClickStore(data_dir=str(tmp_path), index_path=str(tmp_path / 'index.json'))
+    old = (datetime.now() - timedelta(days=60)).isoformat()
+    for button_id in ('idle', 'busy'):
+        (tmp_path / f'{button_id}.json').write_text(json.dumps({"button_id": button_id, "created_at": old}))
+    await store.record_click('busy', 1)
+
+    assert await collect_expired_buttons(store, LIFETIME) == 1
+    assert not (tmp_path / 'idle.json').exists()
+    assert (tmp_path / 'busy.json').exists()
@@ -0,0 +1,103 @@
+"""Tests for compiled automod filter rules."""
+
+from types import SimpleNamespace
+
+from filter_engine import INVITE_RULE, AhoCorasick, CompiledRules, FilterEngine
+
+
+def word(rule_id, pattern):
+    return {'id': rule_id, 'type': 'word', 'pattern': pattern}
+
+
+def literal(rule_id, pattern):
+    return {'id': rule_id, 'type': 'literal', 'pattern': pattern}
+
+
+def regex(rule_id, pattern):
+    return {'id': rule_id, 'type': 'regex', 'pattern': pattern}
+
+
+def test_automaton_finds_overlapping_literals():
+    automaton = AhoCorasick([('he', 1), ('she', 2), ('his', 3), ('hers', 4)])
+    assert sorted(automaton.iter_matches('ushers')) == [(1, 4, 2), (2, 4, 1), (2, 6, 4)]
+
+
+def test_automaton_without_matches():
+    assert list(AhoCorasick([('abc', 1)]).iter_matches('ab ac bc')) == []
+
+
+def test_word_rules_respect_word_boundaries():
+    rules = CompiledRules([word('bad', 'bad')])
+    assert rules.match('that is bad.') == ['bad']
+    assert rules.match('BAD_') == []
+    assert rules.match('badly') == []
+    assert rules.match('notbad') == []
+
+
+def test_word_rule_matches_a_later_bounded_occurrence():
+    assert CompiledRules([word('bad', 'bad')]).match('badly bad') == ['bad']
+
+
+def test_literal_rules_match_anywhere_case_insensitively():
+    assert CompiledRules([literal('spam', 'spam')]).match('SPAMMY') == ['spam']
+
+
+def test_phrases_match_as_whole_words():
+    rules = CompiledRules([word('phrase', 'free nitro')])
+    assert rules.match('get FREE NITRO now') == ['phrase']
+    assert rules.match('get free nitros') == []
+
+
+def test_regex_rules_report_every_matching_rule():
+    rules = CompiledRules([regex('short', r'bit\.ly/\S+'), regex('digits', r'\d{6}'), regex('never', 'zzz')])
+    assert rules.match('code 123456 at BIT.LY/x') == ['short', 'digits']
+    assert rules.match('clean message') == []
+
+
+def test_backreferences_are_not_renumbered_by_other_rules():
+    rules = CompiledRules([regex('first', 'foo'), regex('double', r'(a)\1'), regex('named', r'(?P<c>b)(?P=c)')])
+    assert rules.match('aa') == ['double']
+    assert rules.match('bb') == ['named']
+    assert rules.match('ab') == []
+
+
+def test_patterns_that_only_compile_alone_still_run():
+    rules = CompiledRules([regex('plain', 'foo'), regex('flags', '(?s)a.b')])
+    assert len(rules) == 2
+    assert rules.match('a\nb') == ['flags']
+
+
+def test_invalid_and_unknown_rules_are_skipped():
+    rules = CompiledRules([regex('broken', '(unclosed'), {'id': 'odd', 'type': 'glob', 'pattern': '*'},
+                           word('empty', ''), word('ok', 'ok')])
+    assert rules.rule_ids == ['ok']
+
+
+def test_literal_and_regex_hits_are_counted_once_per_message():
+    rules = CompiledRules([word('bad', 'bad'), regex('digits', r'\d+')])
+    assert rules.match('bad bad 1 2') == ['bad', 'digits']
+    rules.match('bad')
+    assert rules.hits == {'bad': 2, 'digits': 1}
+
+
+class FakeConfigStore:
+    def __init__(self, auto_mod):
+        self.auto_mod = auto_mod
+
+    def guild(self, guild_id):
+        return SimpleNamespace(auto_mod=self.auto_mod)
+
+
+def test_engine_caches_per_guild_until_invalidated():
+    store = FakeConfigStore({'filters': [word('bad', 'bad')]})
+    engine = FilterEngine(store)
+    assert engine.check(1, 'bad') == ['bad']
+    assert engine.check(1, 'bad') == ['bad']
+    assert engine.stats() == {'hits': 1, 'misses': 1, 'guilds': 1}
+    assert engine.rule_hits() == {1: {'bad': 2}}
+
+    store.auto_mod = {'filters': [word('worse', 'worse')], 'block_invites': True}
+    assert engine.check(1, 'bad') == ['bad']
+    engine.invalidate(1)
+    assert engine.check(1, 'bad discord.gg/abc') == ['invite']
+    assert engine.rules_for(1)[-1] is INVITE_RULE
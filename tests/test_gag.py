@@ -0,0 +1,38 @@
+"""Tests for the gag scrambler and registry."""
+
+from gag import GAG_TABLE, GagRegistry, needs_scramble, scramble, scramble_triggers
+
+
+def test_scramble_returns_untouched_text_as_the_same_object():
+    text = 'hello'
+    assert scramble(text) is text
+
+
+def test_scramble_uses_the_given_table():
+    table = str.maketrans({'a': '4', 'e': '3'})
+    assert scramble('leave', table) == 'l34v3'
+    assert scramble('xyz', table) == 'xyz'
+
+
+def test_needs_scramble_checks_the_table_triggers():
+    triggers = scramble_triggers(str.maketrans({'q': 'k'}))
+    assert needs_scramble('quick', triggers)
+    assert not needs_scramble('rare', triggers)
+
+
+def test_registry_scrambles_with_its_own_table():
+    registry = GagRegistry(table=str.maketrans({'o': '0'}))
+    assert registry.scramble('Are you ok?') == 'Are y0u 0k?'
+    assert GagRegistry().scramble('rare') == 'rare'.translate(GAG_TABLE)
+
+
+def test_registry_gag_and_ungag():
+    registry = GagRegistry()
+    registry.gag(1, 10)
+    registry.gag(1, 11)
+    assert registry.is_gagged(1, 10)
+    assert not registry.is_gagged(2, 10)
+    registry.ungag(1, 10)
+    registry.ungag(1, 11)
+    assert registry.gagged(1) == GagRegistry.EMPTY
+    assert len(registry) == 0
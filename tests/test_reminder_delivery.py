@@ -0,0 +1,189 @@
+"""Tests for batched reminder delivery against a fake connection pool."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import reminder_delivery
+from reminder_delivery import DeliveryError, ReminderDelivery
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch(self, query, *args):
+        self.pool.claims.append(args)
+        return self.pool.batches.pop(0) if self.pool.batches else []
+
+    async def execute(self, query, *args):
+        if self.pool.fail_executes:
+            self.pool.fail_executes -= 1
+            raise OSError('connection reset')
+        self.pool.executed.append((query, args))
+
+
+class FakePool:
+    def __init__(self, batches=()):
+        self.batches = list(batches)
+        self.claims = []
+        self.executed = []
+        self.fail_executes = 0
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return FakeConnection(pool)
+
+            async def __aexit__(self, *exc):
+                return False
+        return Acquire()
+
+    def statements(self, query):
+        return [args for executed, args in self.executed if executed is query]
+
+
+class FakeResolver:
+    async def prefetch(self, user_ids):
+        pass
+
+
+class FakeLeases:
+    owner = 'me'
+    partitions = 16
+    owned = frozenset(range(16))
+
+
+def row(reminder_id, attempts=0):
+    return {
+        'id': reminder_id, 'user_id': 1, 'channel_id': 2, 'guild_id': 3, 'message': 'm',
+        'created_by_user_id': 1, 'remind_at': datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1),
+        'delivery_attempts': attempts
+    }
+
+
+def make_delivery(pool, deliver, leases=FakeLeases(), **kwargs):
+    delivery = ReminderDelivery(SimpleNamespace(user_resolver=FakeResolver()), SimpleNamespace(pool=pool),
+                                leases=leases, **kwargs)
+    delivery._deliver = deliver
+    return delivery
+
+
+async def sent_by_dm(row):
+    return 'dm'
+
+
+async def test_deliver_due_claims_until_a_short_batch_and_clears_claims():
+    pool = FakePool([[row(1), row(2)], [row(3)]])
+    delivery = make_delivery(pool, sent_by_dm, batch_size=2, workers=2)
+    await delivery.deliver_due()
+    await delivery.close()
+
+    assert len(pool.claims) == 2
+    assert pool.claims[0] == (2, 'me', 16)
+    assert sorted(pool.statements(reminder_delivery.CLEAR_CLAIMS_SQL)[0][0]) == [1, 2, 3]
+    assert not delivery._unsent and not delivery._sent
+    assert delivery.claimed_total == 3
+
+
+async def test_without_leases_there_are_no_claim_stamps_to_clear():
+    pool = FakePool([[row(1)]])
+    delivery = make_delivery(pool, sent_by_dm, leases=None)
+    await delivery.deliver_due()
+    await delivery.close()
+    assert pool.claims[0] == (delivery.batch_size,)
+    assert pool.executed == []
+
+
+async def test_failures_are_recorded_in_one_statement():
+    async def deliver(row):
+        if row['id'] == 1:
+            raise DeliveryError('dm closed', retry=False)
+        raise RuntimeError('boom')
+
+    pool = FakePool([[row(1), row(2, attempts=2)]])
+    delivery = make_delivery(pool, deliver, workers=1)
+    await delivery.deliver_due()
+    await delivery.close()
+
+    (ids, retries, errors, delays, max_attempts), = pool.statements(reminder_delivery.RECORD_FAILURES_SQL)
+    assert ids == [1, 2]
+    assert retries == [False, True]
+    assert errors == ['dm closed', 'RuntimeError: boom']
+    assert delays == [float(reminder_delivery.RETRY_DELAY), float(reminder_delivery.RETRY_DELAY * 4)]
+    assert max_attempts == reminder_delivery.MAX_ATTEMPTS
+    assert not delivery._unsent
+
+
+async def test_failed_failure_flush_keeps_the_failures():
+    pool = FakePool()
+    delivery = make_delivery(pool, sent_by_dm)
+    delivery._fail(row(1), 'nope', True)
+    pool.fail_executes = 1
+    await delivery.flush_failures()
+    assert [failure[0] for failure in delivery._failures] == [1]
+
+    delivery._fail(row(2), 'nope', True)
+    await delivery.flush_failures()
+    assert delivery._failures == []
+    assert pool.statements(reminder_delivery.RECORD_FAILURES_SQL)[0][0] == [1, 2]
+
+
+async def test_release_unsent_hands_back_queued_and_interrupted_reminders():
+    started = asyncio.Event()
+
+    async def slow(row):
+        if row['id'] == 1:
+            return 'dm'
+        started.set()
+        await asyncio.sleep(60)
+
+    pool = FakePool([[row(1), row(2), row(3), row(4)]])
+    delivery = make_delivery(pool, slow, workers=1)
+    drain = asyncio.ensure_future(delivery.deliver_due())
+    await started.wait()
+    # Shutdown: the drain is cancelled with #2 mid-send and #3, #4 still queued
+    drain.cancel()
+    await asyncio.gather(drain, return_exceptions=True)
+    assert delivery._unsent == {2, 3, 4}
+    assert delivery._sent == [1]
+
+    await delivery.release_unsent()
+    assert delivery._workers == []
+    assert pool.statements(reminder_delivery.CLEAR_CLAIMS_SQL) == [([1],)]
+    assert sorted(pool.statements(reminder_delivery.UNCLAIM_SQL)[0][0]) == [2, 3, 4]
+    assert not delivery._unsent
+
+
+async def test_release_unsent_keeps_ids_when_the_hand_back_fails():
+    pool = FakePool()
+    delivery = make_delivery(pool, sent_by_dm)
+    delivery._unsent = {5}
+    pool.fail_executes = 1
+    await delivery.release_unsent()
+    assert delivery._unsent == {5}
+
+
+async def test_nothing_is_claimed_without_owned_partitions():
+    pool = FakePool([[row(1)]])
+    delivery = make_delivery(pool, sent_by_dm, leases=SimpleNamespace(owned=frozenset()))
+    assert await delivery.claim() == []
+    assert pool.claims == []
+
+
+async def test_lag_reads_naive_timestamps_as_utc(monkeypatch):
+    # Far from UTC, so reading the naive remind_at as local time would be off by hours
+    monkeypatch.setenv('TZ', 'America/Los_Angeles')
+    time.tzset()
+    try:
+        pool = FakePool([[row(1)]])
+        delivery = make_delivery(pool, sent_by_dm)
+        await delivery.deliver_due()
+        await delivery.close()
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert 0.5 < delivery.lag._series['dm'][-1] < 60
@@ -0,0 +1,184 @@
+"""Tests for reminder partition leases against an in-memory stand-in for the lease tables."""
+
+import asyncio
+from types import SimpleNamespace
+
+import reminder_leases
+from reminder_leases import LeaseManager
+
+PARTITIONS = 16
+
+
+class FakeDatabase:
+    """Just enough of reminder_leases, reminder_lease_members and reminders for LeaseManager's statements."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.members = {}
+        self.leases = {partition: (None, 0.0) for partition in range(PARTITIONS)}
+        # reminder id -> claimed_by
+        self.claims = {}
+        self.reset = []
+        self.pool = self
+
+    def acquire(self):
+        database = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return FakeConnection(database)
+
+            async def __aexit__(self, *exc):
+                return False
+        return Acquire()
+
+    def owned_by(self, owner):
+        return sorted(p for p, (holder, expires) in self.leases.items() if holder == owner and expires > self.now)
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.db = database
+
+    def transaction(self):
+        class Transaction:
+            async def __aenter__(self):
+                return None
+
+            async def __aexit__(self, *exc):
+                return False
+        return Transaction()
+
+    async def execute(self, query, *args):
+        db = self.db
+        if query is reminder_leases.RECLAIM_SQL:
+            partitions, owned = args
+            stale = [reminder_id for reminder_id, owner in db.claims.items()
+                     if owner is not None and owner not in db.members and reminder_id % partitions in owned]
+            for reminder_id in stale:
+                db.claims[reminder_id] = None
+            db.reset.extend(stale)
+            return f"UPDATE {len(stale)}"
+        if 'INSERT INTO reminder_lease_members' in query:
+            db.members[args[0]] = db.now
+        elif 'DELETE FROM reminder_lease_members WHERE heartbeat_at' in query:
+            for owner, heartbeat in list(db.members.items()):
+                if heartbeat < db.now - args[0]:
+                    del db.members[owner]
+        elif 'DELETE FROM reminder_lease_members WHERE owner' in query:
+            db.members.pop(args[0], None)
+        elif 'partition = ANY' in query:
+            for partition in args[1]:
+                db.leases[partition] = (None, 0.0)
+        elif 'SET owner = NULL' in query:
+            for partition, (holder, _) in db.leases.items():
+                if holder == args[0]:
+                    db.leases[partition] = (None, 0.0)
+        else:
+            raise AssertionError(f"unexpected statement: {query}")
+        return "OK"
+
+    async def fetchval(self, query, *args):
+        return len(self.db.members)
+
+    async def fetch(self, query, *args):
+        db = self.db
+        if 'RETURNING partition' in query:
+            owner, ttl = args
+            owned = db.owned_by(owner)
+            for partition in owned:
+                db.leases[partition] = (owner, db.now + ttl)
+        else:
+            owner, ttl, limit = args
+            owned = sorted(p for p, (_, expires) in db.leases.items() if expires <= db.now)[:limit]
+            for partition in owned:
+                db.leases[partition] = (owner, db.now + ttl)
+        return [{'partition': partition} for partition in owned]
+
+
+async def test_first_process_takes_every_partition():
+    db = FakeDatabase()
+    changes = []
+    leases = LeaseManager(db, owner='a', on_change=changes.append)
+    assert await leases.renew() == frozenset(range(PARTITIONS))
+    assert leases.owned == frozenset(range(PARTITIONS))
+    assert changes == [frozenset(range(PARTITIONS))]
+
+
+async def test_partitions_rebalance_to_a_fair_share():
+    db = FakeDatabase()
+    a, b = LeaseManager(db, owner='a'), LeaseManager(db, owner='b')
+    await a.renew()
+    # b joins: nothing is free yet, and a gives up its surplus on its next renewal
+    assert await b.renew() == frozenset()
+    assert len(await a.renew()) == PARTITIONS // 2
+    assert len(await b.renew()) == PARTITIONS // 2
+    assert (await a.renew()).isdisjoint(await b.renew())
+    assert (a.live_members, b.live_members) == (2, 2)
+
+
+async def test_survivor_takes_over_a_dead_process_partitions():
+    db = FakeDatabase()
+    a, b = LeaseManager(db, owner='a', ttl=30), LeaseManager(db, owner='b', ttl=30)
+    await a.renew()
+    await b.renew()
+    await a.renew()
+    await b.renew()
+    # b stops heartbeating; once its heartbeat and leases expire, a takes everything back
+    db.now += 31
+    assert await a.renew() == frozenset(range(PARTITIONS))
+
+
+async def test_claims_of_a_departed_owner_are_reclaimed():
+    db = FakeDatabase()
+    db.claims = {1: 'gone', 2: 'a', 3: None}
+    changes = []
+    leases = LeaseManager(db, owner='a', on_change=changes.append)
+    await leases.renew()
+    assert db.reset == [1]
+    assert leases.reclaimed == 1
+
+    # A reclaim alone (ownership unchanged) still wakes the scheduler
+    db.claims[4] = 'gone'
+    await leases.renew()
+    assert db.reset == [1, 4]
+    assert len(changes) == 2
+
+
+async def test_owned_is_empty_once_renewal_lapses(monkeypatch):
+    db = FakeDatabase()
+    leases = LeaseManager(db, owner='a', ttl=30)
+    await leases.renew()
+    monkeypatch.setattr(reminder_leases.time, 'monotonic', lambda: leases._valid_until + 1)
+    assert leases.owned == frozenset()
+
+
+async def test_release_stops_renewing_before_giving_up_partitions():
+    db = FakeDatabase()
+    leases = LeaseManager(db, owner='a', renew_interval=0.01)
+    task = leases.start()
+    await asyncio.sleep(0.03)
+    assert db.owned_by('a')
+
+    await leases.release()
+    assert task.cancelled()
+    await asyncio.sleep(0.03)
+    assert db.owned_by('a') == []
+    assert 'a' not in db.members
+    assert leases.owned == frozenset()
+
+
+async def test_renewal_errors_do_not_stop_the_loop():
+    calls = []
+
+    class FlakyLeases(LeaseManager):
+        async def renew(self):
+            calls.append(1)
+            raise OSError('database down')
+
+    leases = FlakyLeases(SimpleNamespace(pool=None), owner='a', renew_interval=0.01)
+    task = leases.start()
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert len(calls) > 1
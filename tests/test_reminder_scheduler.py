@@ -0,0 +1,220 @@
+"""Tests for the in-process reminder scheduler."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import reminder_scheduler
+from reminder_scheduler import NOTIFY_CHANNEL, ReminderListener, ReminderScheduler, to_epoch
+
+
+class FakeReminders:
+    """Stand-in for fetch_upcoming over an in-memory {reminder_id: due epoch} table."""
+
+    def __init__(self, due=None):
+        self.due = dict(due or {})
+        self.calls = 0
+
+    async def __call__(self, until, limit):
+        self.calls += 1
+        rows = sorted((due, reminder_id) for reminder_id, due in self.due.items() if due < until)
+        return rows[:limit]
+
+
+class Recorder:
+    def __init__(self, reminders=None):
+        self.batches = []
+        self.reminders = reminders
+
+    async def __call__(self, reminder_ids):
+        self.batches.append(list(reminder_ids))
+        if self.reminders is not None:
+            for reminder_id in reminder_ids:
+                self.reminders.due.pop(reminder_id, None)
+
+    @property
+    def fired(self):
+        return [reminder_id for batch in self.batches for reminder_id in batch]
+
+
+async def run_for(scheduler, seconds):
+    task = asyncio.ensure_future(scheduler.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def test_to_epoch_reads_naive_timestamps_as_utc():
+    aware = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+    assert to_epoch(aware.replace(tzinfo=None)) == to_epoch(aware) == aware.timestamp()
+
+
+async def test_refill_loads_the_window_in_due_order():
+    now = time.time()
+    reminders = FakeReminders({1: now + 30, 2: now + 10, 3: now + 5000})
+    scheduler = ReminderScheduler(reminders, Recorder(), window=600)
+    await scheduler.refill()
+    assert scheduler.pending == 2
+    assert [reminder_id for _, reminder_id in sorted(scheduler._heap)] == [2, 1]
+
+
+async def test_truncated_refill_only_trusts_the_loaded_deadlines():
+    now = time.time()
+    reminders = FakeReminders({1: now + 10, 2: now + 20, 3: now + 30})
+    scheduler = ReminderScheduler(reminders, Recorder(), window=600, limit=2)
+    await scheduler.refill()
+    assert scheduler.pending == 2
+    assert scheduler._window_end == now + 20
+
+
+async def test_due_reminders_fire_in_order():
+    now = time.time()
+    reminders = FakeReminders({1: now + 0.05, 2: now - 1, 3: now + 5000})
+    recorder = Recorder(reminders)
+    await run_for(ReminderScheduler(reminders, recorder), 0.2)
+    assert recorder.fired == [2, 1]
+
+
+async def test_cancelled_reminders_do_not_fire():
+    now = time.time()
+    reminders = FakeReminders({1: now + 0.05, 2: now + 0.05})
+    recorder = Recorder(reminders)
+    scheduler = ReminderScheduler(reminders, recorder)
+    await scheduler.refill()
+    scheduler.cancel(1)
+    await run_for(scheduler, 0.2)
+    assert recorder.fired == [2]
+
+
+async def test_schedule_wakes_the_loop_for_an_earlier_reminder():
+    reminders = FakeReminders({1: time.time() + 300})
+    recorder = Recorder(reminders)
+    scheduler = ReminderScheduler(reminders, recorder)
+    task = asyncio.ensure_future(scheduler.run())
+    await asyncio.sleep(0.05)
+    scheduler.schedule(2, datetime.now(timezone.utc) + timedelta(seconds=0.05))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert recorder.fired == [2]
+
+
+async def test_failed_delivery_is_retried_once_rescheduled():
+    reminders = FakeReminders({1: time.time() - 1})
+    attempts = []
+
+    async def flaky(reminder_ids):
+        attempts.append(list(reminder_ids))
+        if len(attempts) > 1:
+            reminders.due.clear()
+        else:
+            raise RuntimeError("send failed")
+
+    scheduler = ReminderScheduler(reminders, flaky, window=0.05)
+    await run_for(scheduler, 0.2)
+    assert attempts == [[1], [1]]
+    assert not scheduler._fired
+
+
+async def test_idle_scheduler_only_refills_at_window_boundaries():
+    reminders = FakeReminders()
+    await run_for(ReminderScheduler(reminders, Recorder(reminders), window=600), 0.2)
+    assert reminders.calls == 1
+
+
+class FakeLeases:
+    partitions = 4
+    owned = frozenset({1})
+
+
+class FakeConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.closed = False
+        self._on_close = []
+
+    def add_termination_listener(self, callback):
+        self._on_close.append(callback)
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        del self.listeners[channel]
+
+    def is_closed(self):
+        return self.closed
+
+    def notify(self, channel, payload):
+        self.listeners[channel](self, 1, channel, payload)
+
+    def terminate(self):
+        self.closed = True
+        for callback in self._on_close:
+            callback(self)
+
+
+class FakePool:
+    def __init__(self):
+        self.connections = []
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                pool.connections.append(FakeConnection())
+                return pool.connections[-1]
+
+            async def __aexit__(self, *exc):
+                return False
+        return Acquire()
+
+
+async def test_notifications_wake_the_scheduler():
+    reminders = FakeReminders()
+    recorder = Recorder(reminders)
+    scheduler = ReminderScheduler(reminders, recorder)
+    db = SimpleNamespace(pool=FakePool())
+    listener = ReminderListener(db, scheduler)
+    task = asyncio.ensure_future(scheduler.run())
+    listener.start()
+    await asyncio.sleep(0.02)
+    assert listener.listening
+
+    connection = db.pool.connections[0]
+    connection.notify(NOTIFY_CHANNEL, f'7:{time.time() + 0.05}')
+    connection.notify(NOTIFY_CHANNEL, 'garbage')
+    await asyncio.sleep(0.2)
+    task.cancel()
+    await listener.close()
+    await asyncio.gather(task, return_exceptions=True)
+    assert recorder.fired == [7]
+    assert NOTIFY_CHANNEL not in connection.listeners
+
+
+async def test_notifications_for_other_partitions_are_ignored():
+    scheduler = ReminderScheduler(FakeReminders(), Recorder())
+    scheduler._window_end = time.time() + 600
+    listener = ReminderListener(None, scheduler, leases=FakeLeases())
+    listener._on_notify(None, 1, NOTIFY_CHANNEL, f'6:{time.time()}')
+    listener._on_notify(None, 1, NOTIFY_CHANNEL, f'5:{time.time()}')
+    assert [reminder_id for _, reminder_id in scheduler._heap] == [5]
+
+
+async def test_lost_listen_connection_reconnects_and_reloads(monkeypatch):
+    monkeypatch.setattr(reminder_scheduler, 'RELISTEN_DELAY', 0.01)
+    reminders = FakeReminders()
+    scheduler = ReminderScheduler(reminders, Recorder())
+    db = SimpleNamespace(pool=FakePool())
+    listener = ReminderListener(db, scheduler)
+    listener.start()
+    await asyncio.sleep(0.02)
+    scheduler._window_end = time.time() + 600
+    db.pool.connections[0].terminate()
+    await asyncio.sleep(0.05)
+    await listener.close()
+    assert len(db.pool.connections) == 2
+    # Reconnecting invalidates the window so changes missed meanwhile are reloaded
+    assert scheduler._window_end == 0.0
@@ -0,0 +1,77 @@
+"""Tests for the bounded snipe cache."""
+
+from types import SimpleNamespace
+
+from snipe_cache import SnipeCache, SnipeEntry
+
+T0 = 1_000_000.0
+
+
+def entry(content, timestamp=T0, after=None):
+    return SnipeEntry(1, content, timestamp, after=after)
+
+
+def test_get_indexes_back_from_the_newest():
+    cache = SnipeCache()
+    for index in range(3):
+        cache.record(10, entry(f'm{index}', T0 + index))
+    assert cache.get(10, now=T0).content == 'm2'
+    assert cache.get(10, 2, now=T0).content == 'm0'
+    assert cache.get(10, 3, now=T0) is None
+    assert cache.get(11, now=T0) is None
+
+
+def test_list_is_newest_first_and_capped_at_capacity():
+    cache = SnipeCache(capacity=3)
+    for index in range(5):
+        cache.record(10, entry(f'm{index}', T0 + index))
+    assert [item.content for item in cache.list(10, now=T0)] == ['m4', 'm3', 'm2']
+    assert len(cache) == 3
+
+
+def test_expired_entries_are_dropped_on_read():
+    cache = SnipeCache(max_age=60)
+    cache.record(10, entry('old', T0))
+    cache.record(10, entry('new', T0 + 30))
+    assert [item.content for item in cache.list(10, now=T0 + 70)] == ['new']
+    assert len(cache) == 1
+
+
+def test_channel_is_removed_once_every_entry_expired():
+    cache = SnipeCache(max_age=60)
+    cache.record(10, entry('old', T0))
+    assert cache.get(10, now=T0 + 61) is None
+    assert cache.channels == 0
+    assert cache.list(10, now=T0 + 61) == []
+
+
+def test_least_recently_recorded_channel_is_evicted():
+    cache = SnipeCache(max_channels=2)
+    cache.record(1, entry('a'))
+    cache.record(2, entry('b'))
+    # Recording into channel 1 again makes channel 2 the least recently used
+    cache.record(1, entry('c'))
+    cache.record(3, entry('d'))
+    assert cache.channels == 2
+    assert cache.get(2, now=T0) is None
+    assert cache.get(1, now=T0).content == 'c'
+    assert cache.get(3, now=T0).content == 'd'
+
+
+def test_clear_forgets_a_channel():
+    cache = SnipeCache()
+    cache.record(10, entry('a'))
+    cache.clear(10)
+    cache.clear(11)
+    assert cache.get(10, now=T0) is None
+
+
+def test_entry_from_message_keeps_edit_content_and_attachments():
+    attachment = SimpleNamespace(url='https://cdn/x.png')
+    before = SimpleNamespace(author=SimpleNamespace(id=7), content='before', attachments=[attachment])
+    after = SimpleNamespace(content='after')
+    edited = SnipeEntry.from_message(before, after)
+    assert (edited.author_id, edited.content, edited.after, edited.attachments) == (
+        7, 'before', 'after', ('https://cdn/x.png',)
+    )
+    assert SnipeEntry.from_message(before).after is None
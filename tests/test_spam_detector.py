@@ -0,0 +1,143 @@
+"""Tests for the sliding-window spam detector."""
+
+from types import SimpleNamespace
+
+from spam_detector import DUPLICATE, INITIAL_SLOTS, RATE, SpamDetector
+
+# Monotonic timestamps in the tests start well above zero (a zero time marks an empty ring entry)
+T0 = 1000.0
+
+
+def send(detector, times, content=lambda index: f'message {index}', user_id=1):
+    return [detector.check(1, user_id, content(index), now=T0 + at) for index, at in enumerate(times)]
+
+
+def test_rate_limit_trips_on_the_threshold_message():
+    detector = SpamDetector(threshold=3, interval=10)
+    assert send(detector, [0, 1, 2]) == [None, None, RATE]
+    assert detector.flagged[RATE] == 1
+
+
+def test_rate_window_includes_its_boundary():
+    assert send(SpamDetector(threshold=3, interval=10), [0, 5, 10]) == [None, None, RATE]
+    assert send(SpamDetector(threshold=3, interval=10), [0, 5, 10.01]) == [None, None, None]
+
+
+def test_rate_window_slides():
+    detector = SpamDetector(threshold=3, interval=10)
+    assert send(detector, [0, 8, 12, 17, 30]) == [None, None, None, RATE, None]
+
+
+def test_threshold_two_uses_a_single_entry_ring():
+    assert send(SpamDetector(threshold=2, interval=5), [0, 6, 7]) == [None, None, RATE]
+
+
+def test_duplicates_trip_at_the_duplicate_threshold():
+    detector = SpamDetector(threshold=100, interval=10, duplicate_threshold=3)
+    assert send(detector, [0, 1, 2, 3], content=lambda index: 'same') == [None, None, DUPLICATE, DUPLICATE]
+    assert detector.flagged[DUPLICATE] == 2
+
+
+def test_different_content_resets_the_duplicate_run():
+    detector = SpamDetector(threshold=100, interval=10, duplicate_threshold=3)
+    contents = ['a', 'a', 'b', 'a', 'a']
+    assert send(detector, [0, 1, 2, 3, 4], content=contents.__getitem__) == [None] * 5
+
+
+def test_duplicates_outside_the_interval_do_not_count():
+    detector = SpamDetector(threshold=100, interval=10, duplicate_threshold=3)
+    assert send(detector, [0, 1, 11.5], content=lambda index: 'same') == [None, None, None]
+
+
+def test_empty_content_is_never_a_duplicate():
+    detector = SpamDetector(threshold=100, interval=10, duplicate_threshold=2)
+    assert send(detector, [0, 1, 2], content=lambda index: '') == [None, None, None]
+
+
+def test_users_and_guilds_are_tracked_separately():
+    detector = SpamDetector(threshold=2, interval=10)
+    assert detector.check(1, 1, 'a', now=T0) is None
+    assert detector.check(1, 2, 'b', now=T0) is None
+    assert detector.check(2, 1, 'c', now=T0) is None
+    assert detector.tracked == 3
+    assert detector.check(1, 1, 'd', now=T0 + 1) == RATE
+
+
+def test_forget_drops_history():
+    detector = SpamDetector(threshold=2, interval=10)
+    detector.check(1, 1, 'a', now=T0)
+    detector.forget(1, 1)
+    assert detector.tracked == 0
+    assert detector.check(1, 1, 'b', now=T0 + 1) is None
+
+
+def test_sweep_recycles_idle_slots():
+    detector = SpamDetector(threshold=2, interval=10)
+    detector.check(1, 1, 'a', now=T0)
+    detector.check(1, 2, 'b', now=T0 + 8)
+    assert detector.sweep(now=T0 + 15) == 1
+    assert detector.tracked == 1
+    # A recycled slot starts with no history
+    assert detector.check(1, 1, 'c', now=T0 + 16) is None
+
+
+def test_slots_grow_past_the_initial_capacity():
+    detector = SpamDetector(threshold=2, interval=10)
+    before = detector.memory_bytes()
+    for user_id in range(INITIAL_SLOTS + 1):
+        detector.check(1, user_id, 'a', now=T0)
+    assert detector.tracked == INITIAL_SLOTS + 1
+    assert detector.memory_bytes() > before
+    assert detector.check(1, 0, 'b', now=T0 + 1) == RATE
+
+
+class FakeConfigStore:
+    def __init__(self, auto_mod, guild_auto_mod=None):
+        self.auto_mod = auto_mod
+        self.guild_auto_mod = guild_auto_mod or {}
+
+    def guild(self, guild_id):
+        return SimpleNamespace(auto_mod={**self.auto_mod, **self.guild_auto_mod.get(guild_id, {})})
+
+    def guild_overrides(self):
+        return {guild_id: self.guild(guild_id) for guild_id in self.guild_auto_mod}
+
+
+def test_apply_config_reconfigures_only_on_change():
+    store = FakeConfigStore({'spam_threshold': 3, 'spam_interval': 10})
+    detector = SpamDetector.from_config(store)
+    detector.check(1, 1, 'a', now=T0)
+    detector.apply_config(store)
+    assert detector.tracked == 1
+    store.auto_mod = {'spam_threshold': 4, 'spam_interval': 10}
+    detector.apply_config(store)
+    assert (detector.threshold, detector.tracked) == (4, 0)
+
+
+def test_guild_overrides_set_their_own_limits():
+    store = FakeConfigStore({'spam_threshold': 5, 'spam_interval': 10},
+                            {2: {'spam_threshold': 2}, 3: {'spam_interval': 1}, 4: {'spam_threshold': 5}})
+    detector = SpamDetector.from_config(store)
+    # Guild 4's override matches the defaults, so only guilds 2 and 3 get their own limits
+    assert detector.guild_limits == {2: (2, 10.0), 3: (5, 1.0)}
+    assert detector.limits(1) == (5, 10.0)
+
+    assert [detector.check(1, 1, str(index), now=T0 + index) for index in range(5)] == [None] * 4 + [RATE]
+    assert [detector.check(2, 1, str(index), now=T0 + index) for index in range(2)] == [None, RATE]
+    assert [detector.check(3, 1, str(index), now=T0 + index) for index in range(5)] == [None] * 5
+
+
+def test_ring_fits_the_largest_guild_threshold():
+    store = FakeConfigStore({'spam_threshold': 2, 'spam_interval': 10}, {7: {'spam_threshold': 4}})
+    detector = SpamDetector.from_config(store)
+    assert [detector.check(7, 1, str(index), now=T0 + index) for index in range(4)] == [None, None, None, RATE]
+    assert [detector.check(1, 1, str(index), now=T0 + index * 20) for index in range(3)] == [None] * 3
+    assert detector.check(1, 1, 'x', now=T0 + 45) == RATE
+
+
+def test_guild_override_changes_reconfigure():
+    store = FakeConfigStore({'spam_threshold': 5, 'spam_interval': 10})
+    detector = SpamDetector.from_config(store)
+    store.guild_auto_mod = {2: {'spam_threshold': 2}}
+    detector.apply_config(store)
+    assert detector.limits(2) == (2, 10.0)
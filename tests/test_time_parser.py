@@ -0,0 +1,62 @@
+"""Tests for duration and reminder-argument parsing."""
+
+from datetime import timedelta
+
+import pytest
+
+import time_parser
+from time_parser import ParsedReminder, extract_user_id, parse_duration, parse_reminder
+
+USER_ID = 123456789012345678
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('10m', timedelta(minutes=10)),
+    ('1h 30m', timedelta(hours=1, minutes=30)),
+    ('2d4h', timedelta(days=2, hours=4)),
+    ('45sec', timedelta(seconds=45)),
+    ('14days', timedelta(days=14)),
+    ('1W, 2 MIN', timedelta(weeks=1, minutes=2)),
+])
+def test_parse_duration(text, expected):
+    assert parse_duration(text) == expected
+
+
+@pytest.mark.parametrize('text', ['', 'soon', '10', '0m', '10m later', '5mins2', '10x'])
+def test_parse_duration_rejects_non_durations(text):
+    assert parse_duration(text) is None
+
+
+def test_parse_duration_rejects_durations_too_long_for_timedelta():
+    assert parse_duration('999999999999999d') is None
+    assert parse_duration(f'{time_parser.MAX_SECONDS}s') == timedelta(seconds=time_parser.MAX_SECONDS)
+
+
+def test_extract_user_id():
+    assert extract_user_id(f'call mum {USER_ID}') == ('call mum', USER_ID)
+    assert extract_user_id(f'{USER_ID}') == ('', USER_ID)
+    assert extract_user_id('call mum 12345') == ('call mum 12345', None)
+    assert extract_user_id(f'call mum{USER_ID}') == (f'call mum{USER_ID}', None)
+
+
+def test_parse_reminder():
+    assert parse_reminder(f'2h 30m Stand-up notes {USER_ID}') == ParsedReminder(
+        timedelta(hours=2, minutes=30), 'Stand-up notes', USER_ID
+    )
+    assert parse_reminder('10m stretch') == ParsedReminder(timedelta(minutes=10), 'stretch', None)
+
+
+def test_parse_reminder_needs_a_leading_duration():
+    assert parse_reminder('stretch in 10m') is None
+
+
+def test_parse_reminder_rejects_overflowing_durations():
+    assert parse_reminder('999999999999999d x') is None
+
+
+def test_stats_count_cache_hits():
+    time_parser.cache_clear()
+    parse_duration('3h')
+    parse_duration('3h')
+    parse_reminder('3h tea')
+    assert time_parser.stats() == {'hits': 1, 'misses': 2}
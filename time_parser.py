@@ -0,0 +1,86 @@
+"""
+Time-expression parsing for /remind and /serverremind.
+Durations such as "1h 30m", "2d4h", "45sec" or "14days" are read by a single
+compiled tokenizer, and the prefix form's trailing 18-19 digit user ID is split
+off with one anchored regex. Parsed reminder arguments are cached because the
+same expressions ("10m", "1h") are typed over and over.
+"""
+
+import re
+from collections import namedtuple
+from datetime import timedelta
+from functools import lru_cache
+
+# Unit spellings accepted after a number, in seconds
+UNITS = {
+    's': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1,
+    'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+    'h': 3600, 'hr': 3600, 'hrs': 3600, 'hour': 3600, 'hours': 3600,
+    'd': 86400, 'day': 86400, 'days': 86400,
+    'w': 604800, 'week': 604800, 'weeks': 604800,
+}
+# Parsed expressions kept in the cache
+CACHE_SIZE = 4096
+# Longest duration accepted (100 years); beyond it timedelta, or now + delta, would overflow
+MAX_SECONDS = 100 * 365 * 86400
+
+# Longest spellings first so "min" is not read as "m" followed by garbage
+_UNIT_PATTERN = '|'.join(sorted(map(re.escape, UNITS), key=len, reverse=True))
+_DURATION_TOKEN = re.compile(rf'[\s,]*(\d+)\s*({_UNIT_PATTERN})(?![a-z])', re.IGNORECASE)
+_TRAILING_USER_ID = re.compile(r'(?:^|\s)(\d{18,19})\s*$')
+
+ParsedReminder = namedtuple('ParsedReminder', 'delta message user_id')
+
+
+def _scan_duration(text):
+    """Consume leading duration tokens. Returns (seconds, end offset); seconds is 0 when nothing matched."""
+    total, pos = 0, 0
+    match = _DURATION_TOKEN.match(text, pos)
+    while match:
+        total += int(match.group(1)) * UNITS[match.group(2).lower()]
+        pos = match.end()
+        match = _DURATION_TOKEN.match(text, pos)
+    return total, pos
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_duration(text):
+    """Parse a whole string as a duration ("1h 30m"). Returns a timedelta, or None if it is not one or is too long."""
+    seconds, end = _scan_duration(text)
+    if not seconds or seconds > MAX_SECONDS or text[end:].strip():
+        return None
+    return timedelta(seconds=seconds)
+
+
+def extract_user_id(text):
+    """Split a trailing 18-19 digit user ID off a message. Returns (message, user_id or None)."""
+    match = _TRAILING_USER_ID.search(text)
+    if match is None:
+        return text, None
+    return text[:match.start()].rstrip(), int(match.group(1))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_reminder(text):
+    """
+    Parse prefix-form reminder arguments: a leading duration, the message, and an
+    optional trailing user ID ("2h 30m Stand-up notes 123456789012345678").
+    Returns a ParsedReminder, or None when the text does not start with a duration
+    (or the duration is longer than MAX_SECONDS).
+    """
+    seconds, end = _scan_duration(text)
+    if not seconds or seconds > MAX_SECONDS:
+        return None
+    message, user_id = extract_user_id(text[end:].strip())
+    return ParsedReminder(timedelta(seconds=seconds), message, user_id)
+
+
+def stats():
+    """Combined hit/miss counts for the parse caches (the module is registered in bot.metric_caches)."""
+    duration, reminder = parse_duration.cache_info(), parse_reminder.cache_info()
+    return {'hits': duration.hits + reminder.hits, 'misses': duration.misses + reminder.misses}
+
+
+def cache_clear():
+    parse_duration.cache_clear()
+    parse_reminder.cache_clear()
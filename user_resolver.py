@@ -0,0 +1,131 @@
+"""
+Shared user resolution by ID.
+Lookups go guild member -> bot user cache -> resolver cache -> fetch_user.
+API results are cached for a TTL, unknown IDs are negatively cached, and
+concurrent lookups of the same ID share a single in-flight request.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Seconds a fetched user is reused
+USER_TTL = 600
+# Seconds an unknown user ID is remembered as unknown
+NEGATIVE_TTL = 300
+# Cached entries (positive and negative) before the least recently used are evicted
+MAX_ENTRIES = 20000
+# Concurrent fetch_user calls during a bulk prefetch
+PREFETCH_CONCURRENCY = 5
+
+
+class UserResolver:
+    """Tiered user lookup with positive/negative TTL caches and in-flight request deduplication."""
+
+    def __init__(self, bot, ttl=USER_TTL, negative_ttl=NEGATIVE_TTL, max_entries=MAX_ENTRIES):
+        self.bot = bot
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # user_id -> (expires_at, user or None); None marks an unknown ID
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.shared_fetches = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits,
+            'shared_fetches': self.shared_fetches,
+            'entries': len(self._cache)
+        }
+
+    def _local(self, user_id, guild):
+        if guild is not None:
+            member = guild.get_member(user_id)
+            if member is not None:
+                return member
+        return self.bot.get_user(user_id)
+
+    def _cached(self, user_id):
+        """Return (found, user) from the TTL cache."""
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return False, None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._cache[user_id]
+            return False, None
+        self._cache.move_to_end(user_id)
+        return True, user
+
+    def _store(self, user_id, user):
+        ttl = self.ttl if user is not None else self.negative_ttl
+        self._cache[user_id] = (time.monotonic() + ttl, user)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def resolve(self, user_id, guild=None):
+        """Resolve a user (or a member of `guild`) by ID. Returns None if the user does not exist."""
+        user = self._local(user_id, guild)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        found, user = self._cached(user_id)
+        if found:
+            if user is None:
+                self.negative_hits += 1
+            self.hits += 1
+            return user
+
+        pending = self._inflight.get(user_id)
+        if pending is not None:
+            self.shared_fetches += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        pending = self._inflight[user_id] = asyncio.ensure_future(self._fetch(user_id))
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, user_id):
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.NotFound:
+            user = None
+        except Exception:
+            # Transient failures are not cached
+            self._inflight.pop(user_id, None)
+            raise
+        self._store(user_id, user)
+        self._inflight.pop(user_id, None)
+        return user
+
+    async def prefetch(self, user_ids, concurrency=PREFETCH_CONCURRENCY):
+        """Warm the cache for a batch of IDs (e.g. a batch of due reminders); returns {user_id: user or None}."""
+        semaphore = asyncio.Semaphore(concurrency)
+        unique_ids = list(dict.fromkeys(user_ids))
+
+        async def resolve_one(user_id):
+            async with semaphore:
+                try:
+                    return await self.resolve(user_id)
+                except discord.HTTPException as e:
+                    logger.warning(f"Prefetch of user {user_id} failed: {e}")
+                    return None
+
+        users = await asyncio.gather(*(resolve_one(user_id) for user_id in unique_ids))
+        return dict(zip(unique_ids, users))
+
+    def invalidate(self, user_id):
+        self._cache.pop(user_id, None)
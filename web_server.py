@@ -4,18 +4,36 @@ This allows external services to ping the bot to keep it alive.
 """
 
 import asyncio
+import logging
 import os
+import time
 from aiohttp import web
-import aiohttp
 import json
 from datetime import datetime
 from urllib.parse import parse_qs
 from utils.db_manager import db
+from metrics import render_prometheus
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background health snapshots
+HEALTH_REFRESH_INTERVAL = 5
+# Event loop lag above this marks the process as not live
+MAX_LIVE_LOOP_LAG = 10.0
+# Timeout for the database reachability probe
+DB_PROBE_TIMEOUT = 2.0
 
 class BotWebServer:
-    def __init__(self, bot):
+    def __init__(self, bot, health_interval=HEALTH_REFRESH_INTERVAL):
         self.bot = bot
         self.app = web.Application()
+        self.started_at = time.monotonic()
+        self.health_interval = health_interval
+        self._health_task = None
+        self._snapshot_at = None
+        self._snapshot = {}
+        self._status_body = b'{}'
+        self._health_body = b'{}'
         self.setup_routes()
     
     def setup_routes(self):
@@ -23,90 +41,108 @@ class BotWebServer:
         self.app.router.add_get('/', self.status_handler)
         self.app.router.add_get('/status', self.status_handler)
         self.app.router.add_get('/ping', self.ping_handler)
-        self.app.router.add_get('/health', self.health_handler)
+        self.app.router.add_get('/health', self.livez_handler)
+        self.app.router.add_get('/livez', self.livez_handler)
+        self.app.router.add_get('/readyz', self.readyz_handler)
+        self.app.router.add_get('/metrics', self.metrics_handler)
         self.app.router.add_get('/oauth/callback', self.oauth_callback_handler)
     
-    async def status_handler(self, request):
-        """Main status page - serves as health check endpoint."""
+    async def _database_reachable(self):
+        """Probe the database pool with a trivial query."""
+        if getattr(db, 'pool', None) is None:
+            return False
         try:
-            # Get bot status information safely
-            bot_ready = getattr(self.bot, 'is_ready', lambda: True)() if hasattr(self.bot, 'is_ready') else True
-            guild_count = len(self.bot.guilds) if hasattr(self.bot, 'guilds') and self.bot.guilds else 0
-            bot_name = str(self.bot.user) if hasattr(self.bot, 'user') and self.bot.user else "Discord Bot"
-            latency = f"{self.bot.latency * 1000:.2f}ms" if hasattr(self.bot, 'latency') and self.bot.latency else "N/A"
-            
-            # Always return a successful status for deployment health checks
-            status_data = {
-                "status": "healthy",
-                "service": "discord-moderation-bot",
-                "bot_name": bot_name,
-                "guilds": guild_count,
-                "uptime": datetime.utcnow().isoformat(),
-                "latency": latency,
-                "ready": bot_ready,
-                "version": "1.0.0",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            # Set appropriate headers for health checks (avoid Content-Type as it's set automatically)
-            headers = {
-                'Cache-Control': 'no-cache',
-                'X-Service-Status': 'healthy'
-            }
-            
-            return web.json_response(status_data, status=200, headers=headers)
-            
-        except Exception as e:
-            # Even if there's an error, return a basic success response for health checks
-            # Deployment systems need a 200 status to consider the service healthy
-            error_response = {
-                "status": "healthy",
-                "service": "discord-moderation-bot", 
-                "message": "Service is running",
-                "error": str(e) if str(e) else "Minor error",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            headers = {
-                'Cache-Control': 'no-cache',
-                'X-Service-Status': 'healthy'
-            }
-            
-            return web.json_response(error_response, status=200, headers=headers)
+            async def probe():
+                async with db.pool.acquire() as conn:
+                    await conn.fetchval('SELECT 1')
+            await asyncio.wait_for(probe(), timeout=DB_PROBE_TIMEOUT)
+            return True
+        except Exception:
+            return False
+    
+    async def refresh_health(self):
+        """Compute a fresh health snapshot and pre-serialize the responses served from memory."""
+        is_closed = self.bot.is_closed()
+        latency = self.bot.latency
+        latency_ok = latency == latency and latency != float('inf')
+        loop_lag = self.bot.loop_lag.last_lag if hasattr(self.bot, 'loop_lag') else 0.0
+        cog_loader = getattr(self.bot, 'cog_loader', None)
+        failed_cogs = cog_loader.failed(lazy=False) if cog_loader else []
+        
+        checks = {
+            "gateway": self.bot.is_ready() and not is_closed and latency_ok,
+            "database": await self._database_reachable(),
+            "cogs": bool(cog_loader and cog_loader.eager_loaded and not failed_cogs)
+        }
+        live = not is_closed and loop_lag < MAX_LIVE_LOOP_LAG
+        lifecycle = getattr(self.bot, 'lifecycle', None)
+        accepting = lifecycle.accepting if lifecycle else True
+        ready = live and accepting and all(checks.values())
+        now = datetime.utcnow().isoformat()
+        
+        self._snapshot = {
+            "live": live,
+            "ready": ready,
+            "checks": checks,
+            "failed_cogs": failed_cogs,
+            "loop_lag": loop_lag,
+            "timestamp": now
+        }
+        self._health_body = json.dumps(self._snapshot).encode('utf-8')
+        self._status_body = json.dumps({
+            "status": "healthy" if ready else "degraded",
+            "service": "discord-moderation-bot",
+            "bot_name": str(self.bot.user) if self.bot.user else "Discord Bot",
+            "guilds": len(self.bot.guilds),
+            "uptime": round(time.monotonic() - self.started_at),
+            "latency": f"{latency * 1000:.2f}ms" if latency_ok else "N/A",
+            "ready": ready,
+            "version": "1.0.0",
+            "timestamp": now
+        }).encode('utf-8')
+        self._snapshot_at = time.monotonic()
+    
+    async def _health_loop(self):
+        """Refresh the health snapshot at a fixed interval."""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.refresh_health()
+            except Exception as e:
+                logger.error(f"Health snapshot refresh failed: {e}")
+    
+    def _snapshot_fresh(self):
+        """A snapshot older than a few intervals means the refresh task has stalled."""
+        return self._snapshot_at is not None and time.monotonic() - self._snapshot_at < self.health_interval * 3
+    
+    async def status_handler(self, request):
+        """Main status page for uptime pingers. Always 200; the body reports the real state."""
+        headers = {
+            'Cache-Control': 'no-cache',
+            'X-Service-Status': 'healthy' if self._snapshot.get('ready') else 'degraded'
+        }
+        return web.Response(body=self._status_body, status=200, content_type='application/json', headers=headers)
+    
+    async def livez_handler(self, request):
+        """Liveness: 503 when the bot is closed, the event loop is stalled or health checks stopped running."""
+        live = self._snapshot.get('live', False) and self._snapshot_fresh()
+        return web.Response(body=self._health_body, status=200 if live else 503, content_type='application/json')
+    
+    async def readyz_handler(self, request):
+        """Readiness: 503 unless the gateway is connected, the database is reachable and startup cogs loaded."""
+        ready = self._snapshot.get('ready', False) and self._snapshot_fresh()
+        return web.Response(body=self._health_body, status=200 if ready else 503, content_type='application/json')
     
     async def ping_handler(self, request):
         """Simple ping endpoint."""
         return web.Response(text="pong")
     
-    async def health_handler(self, request):
-        """Health check endpoint."""
-        try:
-            # For deployment health checks, always return success
-            # The web server being responsive indicates the application is running
-            is_ready = getattr(self.bot, 'is_ready', lambda: True)()
-            is_closed = getattr(self.bot, 'is_closed', lambda: False)()
-            latency = getattr(self.bot, 'latency', 0.0)
-            
-            # Consider healthy if web server is running (which it is if we're here)
-            is_healthy = True
-            
-            health_data = {
-                "healthy": is_healthy,
-                "ready": is_ready if hasattr(self.bot, 'is_ready') else True,
-                "closed": is_closed if hasattr(self.bot, 'is_closed') else False,
-                "latency": latency if hasattr(self.bot, 'latency') else None,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            return web.json_response(health_data, status=200)
-        except Exception as e:
-            # Always return 200 for deployment health checks
-            return web.json_response({
-                "healthy": True,
-                "message": "Service is running",
-                "error": str(e) if str(e) else "Unknown error",
-                "timestamp": datetime.utcnow().isoformat()
-            }, status=200)
+    async def metrics_handler(self, request):
+        """Prometheus text exposition of bot metrics."""
+        return web.Response(
+            text=render_prometheus(self.bot, db),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
     
     async def oauth_callback_handler(self, request):
         """Handle OAuth2 callback for user app installations."""
@@ -142,64 +178,64 @@ class BotWebServer:
                 'redirect_uri': redirect_uri
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post('https://discord.com/api/oauth2/token', data=token_data) as resp:
-                    if resp.status == 200:
-                        token_response = await resp.json()
-                        
-                        # Get user information
-                        headers = {'Authorization': f"Bearer {token_response['access_token']}"}
-                        async with session.get('https://discord.com/api/users/@me', headers=headers) as user_resp:
-                            if user_resp.status == 200:
-                                user_data = await user_resp.json()
-                                user_id = int(user_data['id'])
-                                
-                                # Store user installation
-                                from utils.db_manager import db
-                                async with db.pool.acquire() as conn:
-                                    await conn.execute("""
-                                        INSERT INTO user_installations 
-                                        (user_id, access_token, refresh_token, token_expires_at)
-                                        VALUES ($1, $2, $3, NOW() + INTERVAL '%s seconds')
-                                        ON CONFLICT (user_id) 
-                                        DO UPDATE SET 
-                                            access_token = EXCLUDED.access_token,
-                                            refresh_token = EXCLUDED.refresh_token,
-                                            token_expires_at = EXCLUDED.token_expires_at,
-                                            last_used = NOW()
-                                    """, user_id, 
-                                    token_response['access_token'],
-                                    token_response.get('refresh_token'),
-                                    token_response['expires_in'])
-                                
-                                # Success page
-                                return web.Response(
-                                    text=f"""
-                                    <html>
-                                    <head><title>Bot Installation Successful</title></head>
-                                    <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; text-align: center;">
-                                        <h1 style="color: #5865F2;">✅ Installation Successful!</h1>
-                                        <p>Hello <strong>{user_data['username']}</strong>! The bot has been successfully installed for your personal use.</p>
-                                        <h3>🎉 What's Next?</h3>
-                                        <ul style="text-align: left; max-width: 400px; margin: 0 auto;">
-                                            <li>Use <code>/mystats</code> to view your global stats</li>
-                                            <li>Use <code>/remind</code> to set personal reminders</li>
-                                            <li>Use <code>/privacy</code> to manage your data</li>
-                                            <li>All your data is synced across servers</li>
-                                        </ul>
-                                        <p style="margin-top: 30px; color: #666;">You can now close this window and start using the bot!</p>
-                                    </body>
-                                    </html>
-                                    """,
-                                    content_type='text/html'
-                                )
+            # Exchange the code and fetch the user through the bot's shared HTTP client
+            http = self.bot.http_client
+            token_resp = await http.request('POST', 'https://discord.com/api/oauth2/token', data=token_data)
+            if token_resp.status == 200:
+                token_response = token_resp.data
+                
+                # Get user information
+                headers = {'Authorization': f"Bearer {token_response['access_token']}"}
+                user_resp = await http.get_json('https://discord.com/api/users/@me', headers=headers)
+                if user_resp.status == 200:
+                    user_data = user_resp.data
+                    user_id = int(user_data['id'])
+                    
+                    # Store user installation
+                    async with db.pool.acquire() as conn:
+                        await conn.execute("""
+                            INSERT INTO user_installations 
+                            (user_id, access_token, refresh_token, token_expires_at)
+                            VALUES ($1, $2, $3, NOW() + INTERVAL '%s seconds')
+                            ON CONFLICT (user_id) 
+                            DO UPDATE SET 
+                                access_token = EXCLUDED.access_token,
+                                refresh_token = EXCLUDED.refresh_token,
+                                token_expires_at = EXCLUDED.token_expires_at,
+                                last_used = NOW()
+                        """, user_id, 
+                        token_response['access_token'],
+                        token_response.get('refresh_token'),
+                        token_response['expires_in'])
                     
+                    # Success page
                     return web.Response(
-                        text="<h1>❌ Authorization Failed</h1><p>Failed to exchange authorization code for access token.</p>",
-                        content_type='text/html',
-                        status=400
+                        text=f"""
+                        <html>
+                        <head><title>Bot Installation Successful</title></head>
+                        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; text-align: center;">
+                            <h1 style="color: #5865F2;">✅ Installation Successful!</h1>
+                            <p>Hello <strong>{user_data['username']}</strong>! The bot has been successfully installed for your personal use.</p>
+                            <h3>🎉 What's Next?</h3>
+                            <ul style="text-align: left; max-width: 400px; margin: 0 auto;">
+                                <li>Use <code>/mystats</code> to view your global stats</li>
+                                <li>Use <code>/remind</code> to set personal reminders</li>
+                                <li>Use <code>/privacy</code> to manage your data</li>
+                                <li>All your data is synced across servers</li>
+                            </ul>
+                            <p style="margin-top: 30px; color: #666;">You can now close this window and start using the bot!</p>
+                        </body>
+                        </html>
+                        """,
+                        content_type='text/html'
                     )
             
+            return web.Response(
+                text="<h1>❌ Authorization Failed</h1><p>Failed to exchange authorization code for access token.</p>",
+                content_type='text/html',
+                status=400
+            )
+            
         except Exception as e:
             return web.Response(
                 text=f"<h1>❌ Error</h1><p>An error occurred during installation: {str(e)}</p>",
@@ -207,8 +243,19 @@ class BotWebServer:
                 status=500
             )
     
+    async def stop(self, runner):
+        """Stop the health refresh task and shut down the aiohttp runner."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        await runner.cleanup()
+    
     async def start_server(self, host='0.0.0.0', port=5000):
         """Start the web server."""
+        # Serve health endpoints from a snapshot refreshed in the background
+        await self.refresh_health()
+        self._health_task = asyncio.create_task(self._health_loop())
+        
         max_retries = 5
         current_port = port
         